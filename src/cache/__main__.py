@@ -0,0 +1,36 @@
+# 📁 cache/__main__.py — Admin commands for the shared cache store
+#
+#   cd src && python -m cache stats
+#   cd src && python -m cache clear [--older-than-days 30 | --full]
+
+import argparse
+import sys
+
+from .manager import CacheManager
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or clear the ifc2quant cache store (shared by all sessions and the service)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats")
+    clear_cmd = sub.add_parser("clear")
+    clear_cmd.add_argument("--older-than-days", type=float, default=0, help="only entries not used for this long")
+    clear_cmd.add_argument("--full", action="store_true", help="remove the whole store (index and objects)")
+    args = parser.parse_args(argv)
+
+    cache = CacheManager()
+    if args.command == "stats":
+        for name, value in cache.stats().items():
+            print(f"{name:<15} {value}")
+    elif args.full:
+        cache.clear(full=True)
+        print(f"removed {cache.cache_dir}")
+    else:
+        before = cache.stats()["entries"]
+        cache.clear(max_age_seconds=int(args.older_than_days * 86400))
+        print(f"{before - cache.stats()['entries']} entries cleared")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
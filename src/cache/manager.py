@@ -1,112 +1,403 @@
-import time
+import hashlib
+import json
+import os
+import pickle
 import shutil
+import sqlite3
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Union
-import streamlit as st
+from typing import Any, Dict, List, Optional, Union
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL REFERENCES blobs(digest),
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats(name, value) VALUES ('total_size', 0), ('hits', 0), ('misses', 0);
+"""
+
+# Reads queue their access bookkeeping (last access, hit/miss counters) and write it in one
+# transaction once this many reads or seconds have accumulated, or with the next write
+ACCESS_FLUSH_READS = 64
+ACCESS_FLUSH_SECONDS = 5.0
+
+# Size limit of the store when none is passed: columnar property stores of large models run to
+# gigabytes each, so the default keeps several of them. Shared by every process through the environment.
+DEFAULT_MAX_SIZE_MB = 20 * 1024
+MAX_SIZE_ENV = "IFC2QUANT_CACHE_MAX_MB"
+
+# Read size when hashing / copying files into the store
+_CHUNK = 1024 * 1024
+
 
 class CacheManager:
     def __init__(
         self,
         cache_dir: Optional[Union[str, Path]] = None,
-        max_size_mb: int = 500,
+        max_size_mb: Optional[int] = None,
         app_name: str = "bim_app"
     ):
         """
-        Enhanced cache manager that stores cache and downloads in tests/ and protects its own file.
+        Content-addressed on-disk cache with a SQLite index.
+
+        Values are stored once per content digest under `objects/`, named entries point at them.
+        The index tracks size and last access per entry plus the running total size, so size
+        checks are O(1) and LRU eviction walks the `last_access` index instead of the directory.
+        Blob writes go to a temp file and are renamed into place; index updates run in
+        `BEGIN IMMEDIATE` transactions, which makes the cache safe to share between the
+        Streamlit session threads, the job pool and separate worker processes.
+        Reads do not write: their access bookkeeping is batched (best effort). If the store is
+        removed by a full clear elsewhere, every connection reopens and recreates the index.
 
         Args:
-            cache_dir: Custom cache directory path (overrides default under tests/cache)
-            max_size_mb: Maximum cache size in megabytes
-            app_name: Application name for folder naming (currently unused)
+            cache_dir: Custom cache directory path (defaults to <project>/cache/store)
+            max_size_mb: Maximum total size of stored blobs in megabytes
+                (default: `$IFC2QUANT_CACHE_MAX_MB`, else `DEFAULT_MAX_SIZE_MB`)
+            app_name: Application name (currently unused)
         """
-        # Path to this manager file to protect it from deletion
-        self._manager_file = Path(__file__).resolve()
-        # Determine project root (src/cache/manager.py -> project root)
-        project_root = self._manager_file.parents[2]
-
-        # Set cache directory under tests/cache by default
-        if cache_dir:
-            self.cache_dir = Path(cache_dir)
-        else:
-            self.cache_dir = project_root / "tests" / "cache"
-
-        # Set downloads directory under tests/downloads
-        self.download_dir = project_root / "tests" / "downloads"
+        project_root = Path(__file__).resolve().parents[2]
+        self.cache_dir = Path(cache_dir) if cache_dir else project_root / "cache" / "store"
+        self.objects_dir = self.cache_dir / "objects"
+        self.index_path = self.cache_dir / "index.sqlite"
 
-        # Size limit in bytes
+        if max_size_mb is None:
+            max_size_mb = int(os.environ.get(MAX_SIZE_ENV) or DEFAULT_MAX_SIZE_MB)
         self.max_size = max_size_mb * 1024 * 1024
         self.app_name = app_name
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
         self._setup_done = False
+        self._access_lock = threading.Lock()
+        self._pending_access: Dict[str, float] = {}
+        self._pending_counts = {"hits": 0, "misses": 0}
+        self._pending_reads = 0
+        self._last_flush = time.time()
+
+    # ------------------------------------------------------------------ setup
 
     def setup(self) -> None:
-        """Initialize cache and downloads directories and enforce limits."""
-        # Create cache and downloads folders if they don't exist
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.download_dir.mkdir(parents=True, exist_ok=True)
-        # Clean old cache files and enforce size limits
-        self._clean_old_files()
-        self._enforce_size_limit()
+        """Create the directories and index (idempotent) and enforce the size limit."""
+        conn = self._conn()
+        if self._setup_done:
+            return
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        conn.executescript(_SCHEMA)
         self._setup_done = True
+        self._write(self._evict, None)
 
-    def clear(self, full: bool = False) -> None:
-        """
-        Clear cached files while protecting manager file.
+    def _index_id(self) -> Optional[tuple]:
+        """Identity of the index file; inode numbers alone are reused when a file is deleted and recreated."""
+        try:
+            st = self.index_path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_ctime_ns
 
-        Args:
-            full: If True, clears entire cache except manager file; downloaded files remain.
-        """
-        # Target only cache_dir
-        if full:
-            for item in self.cache_dir.iterdir():
-                try:
-                    if item.resolve() == self._manager_file:
-                        continue
-                    if item.is_dir():
-                        shutil.rmtree(item, ignore_errors=True)
-                    else:
-                        item.unlink(missing_ok=True)
-                except (OSError, PermissionError):
-                    continue
-        else:
-            # Remove all cache files (age <= 0) except protected
-            self._clean_old_files(max_age_seconds=0)
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._index_id() != self._local.index_id:
+            # The index was removed or replaced (full clear by another instance or process): reopen it
+            conn.close()
+            conn = self._local.conn = None
+            self._setup_done = False
+        if conn is None:
+            if self._index_id() is None:
+                self._setup_done = False
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.index_id = self._index_id()
+        return conn
+
+    def _write(self, fn, *args):
+        """Run `fn(conn, *args)` inside one write transaction and return its result."""
+        self.setup()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._apply_access(conn)
+            result = fn(conn, *args)
+            conn.execute("COMMIT")
+            return result
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
 
-        # Clear any Streamlit cache resources
+    def _record_access(self, key: str, hit: bool) -> None:
+        """Queue the bookkeeping of one read and flush the queue when it is due."""
+        with self._access_lock:
+            if hit:
+                self._pending_access[key] = time.time()
+            self._pending_counts["hits" if hit else "misses"] += 1
+            self._pending_reads += 1
+            due = self._pending_reads >= ACCESS_FLUSH_READS or time.time() - self._last_flush >= ACCESS_FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def _apply_access(self, conn: sqlite3.Connection) -> None:
+        """Write the queued read bookkeeping inside the caller's transaction."""
+        with self._access_lock:
+            access, counts = self._pending_access, self._pending_counts
+            self._pending_access, self._pending_counts = {}, {"hits": 0, "misses": 0}
+            self._pending_reads = 0
+            self._last_flush = time.time()
+        if access:
+            conn.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(at, key) for key, at in access.items()],
+            )
+        for name, value in counts.items():
+            if value:
+                conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (value, name))
+
+    def flush(self) -> None:
+        """Write queued read bookkeeping now; while the index is busy it stays queued for a later flush."""
+        self.setup()
+        conn = self._conn()
+        conn.execute("PRAGMA busy_timeout = 100")
         try:
-            st.cache_resource.clear()
-        except Exception:
-            pass
-
-    def _clean_old_files(self, max_age_seconds: int = 86400) -> None:
-        """Remove old files in cache_dir while protecting manager file."""
-        now = time.time()
-        for f in self.cache_dir.iterdir():
+            self._write(lambda conn: None)
+        except sqlite3.OperationalError:
+            with self._access_lock:
+                self._pending_reads = 0
+                self._last_flush = time.time()
+        finally:
+            self._conn().execute("PRAGMA busy_timeout = 30000")
+
+    # ------------------------------------------------------------------ blobs
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _stage(self, data: bytes) -> Path:
+        """Write data to a temp file next to the object store (renamed into place later)."""
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        return Path(tmp)
+
+    def _add_ref(self, conn: sqlite3.Connection, digest: str, size: int, staged: Path) -> None:
+        target = self._blob_path(digest)
+        row = conn.execute("SELECT refs FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            conn.execute("INSERT INTO blobs(digest, size, refs) VALUES (?, ?, 0)", (digest, size))
+            conn.execute("UPDATE stats SET value = value + ? WHERE name = 'total_size'", (size,))
+        if target.exists():
+            staged.unlink(missing_ok=True)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged, target)
+        conn.execute("UPDATE blobs SET refs = refs + 1 WHERE digest = ?", (digest,))
+
+    def _drop_ref(self, conn: sqlite3.Connection, digest: str) -> None:
+        conn.execute("UPDATE blobs SET refs = refs - 1 WHERE digest = ?", (digest,))
+        row = conn.execute("SELECT refs, size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is not None and row[0] <= 0:
+            conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            conn.execute("UPDATE stats SET value = value - ? WHERE name = 'total_size'", (row[1],))
             try:
-                if f.resolve() == self._manager_file or f.is_dir():
-                    continue
-                # Delete if older than threshold or threshold zero
-                if max_age_seconds == 0 or f.stat().st_mtime < now - max_age_seconds:
-                    f.unlink(missing_ok=True)
-            except (OSError, PermissionError):
-                continue
-
-    def _enforce_size_limit(self) -> None:
-        """Enforce cache size limit by deleting oldest files first, protecting manager file."""
-        files = [f for f in self.cache_dir.iterdir() if f.is_file() and f.resolve() != self._manager_file]
-        current_size = sum(f.stat().st_size for f in files)
-        if current_size <= self.max_size:
-            return
-        # Sort files by age (oldest first)
-        files.sort(key=lambda f: f.stat().st_mtime)
+                self._blob_path(digest).unlink(missing_ok=True)
+            except PermissionError:
+                # Still memory-mapped by a reader (Windows); the orphan goes with the next full clear
+                pass
+
+    def _delete_entry(self, conn: sqlite3.Connection, key: str) -> None:
+        row = conn.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._drop_ref(conn, row[0])
+
+    def _evict(self, conn: sqlite3.Connection, keep: Optional[str]) -> int:
+        """Drop least recently used entries until the total size is back under 90% of the limit."""
+        total = self._total_size(conn)
+        if total <= self.max_size:
+            return 0
         target = self.max_size * 0.9
-        for f in files:
-            if current_size <= target:
+        evicted = 0
+        while total > target:
+            rows = conn.execute(
+                "SELECT key FROM entries WHERE key IS NOT ? ORDER BY last_access LIMIT 32", (keep,)
+            ).fetchall()
+            if not rows:
                 break
+            for (key,) in rows:
+                self._delete_entry(conn, key)
+                evicted += 1
+            total = self._total_size(conn)
+        return evicted
+
+    @staticmethod
+    def _total_size(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT value FROM stats WHERE name = 'total_size'").fetchone()[0]
+
+    # ------------------------------------------------------------------ API
+
+    def _put_staged(self, key: str, digest: str, size: int, staged: Path, meta: Optional[Dict[str, Any]]) -> str:
+        """Point `key` at the staged blob (renamed into place unless the content is already stored)."""
+        def txn(conn):
+            now = time.time()
+            row = conn.execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+            self._add_ref(conn, digest, size, staged)
+            if row is not None:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._drop_ref(conn, row[0])
+            conn.execute(
+                "INSERT INTO entries(key, digest, size, created, last_access, meta) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, digest, size, now, now, json.dumps(meta or {}, ensure_ascii=False)),
+            )
+            self._evict(conn, key)
+
+        try:
+            self._write(txn)
+        finally:
+            staged.unlink(missing_ok=True)
+        return digest
+
+    def put_bytes(self, key: str, data: bytes, meta: Optional[Dict[str, Any]] = None) -> str:
+        """Store `data` under `key` and return its content digest."""
+        return self._put_staged(key, hashlib.sha256(data).hexdigest(), len(data), self._stage(data), meta)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """Return the stored bytes for `key` (and refresh its last access) or None on a miss."""
+        self.setup()
+        row = self._conn().execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+        data = None
+        if row is not None:
             try:
-                size = f.stat().st_size
-                f.unlink(missing_ok=True)
-                current_size -= size
-            except (OSError, PermissionError):
-                continue
+                data = self._blob_path(row[0]).read_bytes()
+            except FileNotFoundError:
+                self._write(self._delete_entry, key)
+
+        self._record_access(key, data is not None)
+        if data is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return data
+
+    def put_object(self, key: str, obj: Any, meta: Optional[Dict[str, Any]] = None) -> str:
+        return self.put_bytes(key, pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), meta)
+
+    def get_object(self, key: str) -> Any:
+        data = self.get_bytes(key)
+        return pickle.loads(data) if data is not None else None
+
+    def put_file(self, key: str, path: Union[str, Path], meta: Optional[Dict[str, Any]] = None, move: bool = False) -> str:
+        """
+        Store the file at `path` under `key` and return its content digest, without reading it into memory.
+        With `move`, the file itself is renamed into the store (it must be on the same file system, e.g. a
+        temp file in `cache_dir`) and is gone afterwards; otherwise it is copied in chunks.
+        """
+        path = Path(path)
+        size = path.stat().st_size
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                h.update(chunk)
+        if move:
+            staged = path
+        else:
+            self.objects_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as out, open(path, "rb") as f:
+                shutil.copyfileobj(f, out, _CHUNK)
+            staged = Path(tmp)
+        return self._put_staged(key, h.hexdigest(), size, staged, meta)
+
+    def get_path(self, key: str) -> Optional[Path]:
+        """Path of the stored blob for `key` (read-only use), or None on a miss."""
+        self.setup()
+        row = self._conn().execute("SELECT digest FROM entries WHERE key = ?", (key,)).fetchone()
+        path = self._blob_path(row[0]) if row else None
+        if path is not None and path.exists():
+            self._record_access(key, True)
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def contains(self, key: str) -> bool:
+        self.setup()
+        return self._conn().execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
+
+    def delete(self, key: str) -> None:
+        self._write(self._delete_entry, key)
+
+    def entries(self, prefix: str = "") -> List[Dict[str, Any]]:
+        """Metadata of all entries whose key starts with `prefix`, most recently used first."""
+        self.setup()
+        rows = self._conn().execute(
+            "SELECT key, digest, size, created, last_access, meta FROM entries "
+            "WHERE substr(key, 1, ?) = ? ORDER BY last_access DESC",
+            (len(prefix), prefix),
+        ).fetchall()
+        return [
+            {"key": k, "digest": d, "size": s, "created": c, "last_access": a, "meta": json.loads(m or "{}")}
+            for k, d, s, c, a, m in rows
+        ]
+
+    def cache_size(self) -> int:
+        """Total size of stored blobs in bytes (O(1), read from the index)."""
+        self.setup()
+        return self._total_size(self._conn())
+
+    def stats(self) -> Dict[str, int]:
+        self.flush()
+        values = dict(self._conn().execute("SELECT name, value FROM stats").fetchall())
+        entries = self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {
+            "entries": entries,
+            "total_size": values["total_size"],
+            "max_size": self.max_size,
+            "hits": values["hits"],
+            "misses": values["misses"],
+            "session_hits": self.hits,
+            "session_misses": self.misses,
+        }
+
+    def clear(self, full: bool = False, max_age_seconds: int = 0) -> None:
+        """
+        Clear cached entries. The store is shared by all sessions, the service and its workers,
+        so this is an admin operation (`python -m cache clear`), not part of a session reset.
+
+        Args:
+            full: If True, removes the whole store (index and objects).
+            max_age_seconds: Otherwise drop entries not accessed within this many seconds (0 = all).
+        """
+        if full:
+            conn = getattr(self._local, "conn", None)
+            if conn is not None:
+                conn.close()
+                self._local.conn = None
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            self._setup_done = False
+            return
+
+        cutoff = time.time() - max_age_seconds
+
+        def txn(conn):
+            keys = [k for (k,) in conn.execute("SELECT key FROM entries WHERE last_access <= ?", (cutoff,)).fetchall()]
+            for key in keys:
+                self._delete_entry(conn, key)
 
-    # Other methods (get_cache_file, get_hashed_cache_file, cache_size, list_cached_files) remain unchanged
+        self._write(txn)
@@ -1,14 +1,48 @@
 # 📁 comparison_tab.py
 
 import streamlit as st
-import pandas as pd
 from pathlib import Path
-import ifcopenshell
 
 from translations import translations
-from ifc_processing.pset_reader import read_psets_from_model, flatten_psets
-from ifc_processing.render_rule_block import render_rule_block
-from tools.comparison_logic import prepare_comparison, format_diff_table_with_styles
+from ifc_processing.compiled_mapping import RULE_FIELDS
+from tools.ifchelper import mapping_hash, save_upload
+from tools.snapshots import SnapshotStore, snapshot_key
+from job_ui import run_job, job_ready
+from rule_editor import get_rule_store, render_rule_editor
+
+def _load_model_b(job, model_b_path: str, t, base_hash=None) -> dict:
+    from tools.core import ExtractOptions, extract
+
+    job.report("📂 " + t.get("job_open_ifc", "Opening IFC …"), 0.0)
+    model_b = extract(model_b_path, ExtractOptions(
+        progress=job.progress_callback("🔍 " + t.get("job_read_psets", "Reading PropertySets …"), 0.1, 1.0),
+        base_hash=base_hash,
+    ))
+    return {
+        "model": model_b.model, "store": model_b.property_store, "schema": model_b.schema, "spatial_index": model_b.spatial_index,
+        "model_hash": model_b.model_hash,
+    }
+
+def _compare_job(job, model_a, model_b, mapping_a, mapping_b, lang, t, store_a=None, store_b=None, schema_a=None, schema_b=None, snapshot=None):
+    from tools.core import CompareOptions, ExtractedModel, compare
+    from tools.jobs import using_models
+
+    def run():
+        # Model A is the session's model, which the preview jobs read as well
+        with using_models(job, model_a, model_b):
+            return compare(
+                ExtractedModel(model_a, property_store=store_a, schema=schema_a),
+                ExtractedModel(model_b, property_store=store_b, schema=schema_b),
+                mapping_a, mapping_b,
+                CompareOptions(
+                    lang=lang,
+                    progress_a=job.progress_callback("📊 " + t.get("job_aggregate", "Aggregating …") + " A", 0.0, 0.5),
+                    progress_b=job.progress_callback("📊 " + t.get("job_aggregate", "Aggregating …") + " B", 0.5, 1.0),
+                ),
+            )
+
+    # Same snapshot as the service's in-memory /compare of these models and mappings
+    return SnapshotStore().fetch(snapshot, run, source="ui")[0] if snapshot else run()
 
 def render_comparison_tab():
     lang = st.session_state.get("lang", "en")
@@ -34,69 +68,100 @@ def render_comparison_tab():
 
     uploaded_b = st.file_uploader("📂 " + t.get("comparison_upload_model_b", "Upload Model B"), type="ifc")
 
+    # Models loaded together on the upload tab are in the model cache already
+    loaded = {name: path for name, path in st.session_state.get("loaded_models", {}).items() if name != model_a_name}
+    picked_b = None
+    if loaded and not uploaded_b:
+        picked_b = st.selectbox("🗂️ " + t.get("comparison_pick_loaded", "… or pick a loaded model"), [None] + sorted(loaded), format_func=lambda name: name or "—", key="comparison_pick_loaded")
+
+    model_b_path = model_b_name = model_b_id = None
     if uploaded_b:
         cache_dir = Path(__file__).resolve().parent.parent / "cache"
         cache_dir.mkdir(exist_ok=True)
-        model_b_path = cache_dir / uploaded_b.name
-        model_b_path.write_bytes(uploaded_b.getbuffer())
-        model_b = ifcopenshell.open(str(model_b_path))
-
-        st.success(f"✅ {t.get('comparison_model_b_loaded', 'Model B')} '{uploaded_b.name}' {t.get('upload_success', 'loaded.')}" )
+        model_b_path = save_upload(uploaded_b.getbuffer(), uploaded_b.name, cache_dir)
+        model_b_name, model_b_id = uploaded_b.name, uploaded_b.file_id
+    elif picked_b:
+        model_b_path = Path(loaded[picked_b])
+        model_b_name, model_b_id = model_b_path.name, str(model_b_path)
+
+    if model_b_path is not None:
+        # Model B is usually a revision of Model A: only elements that changed against A are re-extracted
+        load_job = run_job(t.get("comparison_model_b_loaded", "Model B"), model_b_id, _load_model_b, str(model_b_path), t, st.session_state.get("model_hash"))
+        if not job_ready(load_job):
+            return
+        model_b = load_job.result["model"]
+        store_b = load_job.result["store"]
+
+        st.success(f"✅ {t.get('comparison_model_b_loaded', 'Model B')} '{model_b_name}' {t.get('upload_success', 'loaded.')}" )
 
         # 🔧 Build keys from Model B
-        psets = read_psets_from_model(model_b)
-        flat_data = flatten_psets(psets)
-        all_classes = sorted({el.is_a() for el in model_b.by_type("IfcElement")})
+        all_classes = store_b.classes()
         class_keys_map_b = {
-            cls: sorted({
-                k for gid, props in flat_data.items() if props.get("type") == cls
-                for k in props if not k.lower().startswith("type")
-            })
+            cls: [k for k in store_b.keys_for_class(cls) if not k.lower().startswith("type")]
             for cls in all_classes
         }
 
         st.subheader("🛠️ " + t.get("rules_per_class", "Rules per class (only if activated)"))
-        mapping_b = {}
-        activation_map = {}
-
-        for cls in all_classes:
-            existing = mapping.get("rules", {}).get(cls, {})
-            group_keys = class_keys_map_b.get(cls, [])
-
-            active_class_list = st.session_state.get("active_classes", [])
-            active = st.checkbox("✅ " + t["activate_class"].format(cls=cls), value=cls in active_class_list, key=f"active_b_{cls}")
-            activation_map[cls] = active
-
-            def filter_defaults(field: str):
-                return [v for v in existing.get(field, []) if v in group_keys]
 
-            with st.expander(f"{t.get('rules_for', 'Regeln für')} {cls}", expanded=active):
-                rule_set = {
-                    "group": st.multiselect("🔑 " + t.get("rule_group", "Group"), group_keys, default=filter_defaults("group"), key=f"group_b_{cls}"),
-                    "group2": st.multiselect("🎨 " + t.get("rule_type", "Type"), group_keys, default=filter_defaults("group2"), key=f"group2_b_{cls}"),
-                    "group3": st.multiselect("📌 " + t.get("rule_status", "Status"), group_keys, default=filter_defaults("group3"), key=f"group3_b_{cls}"),
-                    "sum": st.multiselect("➕ " + t.get("rule_sum", "Summed fields"), group_keys, default=filter_defaults("sum"), key=f"sum_b_{cls}"),
-                    "text": st.multiselect("📝 " + t.get("rule_text", "Text fields"), group_keys, default=filter_defaults("text"), key=f"text_b_{cls}"),
-                    "ignore": st.multiselect("🚫 " + t.get("rule_ignore", "Ignored"), group_keys, default=filter_defaults("ignore"), key=f"ignore_b_{cls}")
-                }
-                mapping_b[cls] = rule_set
-
-        active_classes = [cls for cls in all_classes if activation_map.get(cls)]
-        derived_mapping_b = {"rules": {cls: mapping_b[cls] for cls in active_classes}}
-
-        # 🔍 Run comparison
-        diff_df = prepare_comparison(model_a, model_b, mapping, derived_mapping_b)
+        # Model B's rules start from Model A's (limited to keys present in B) and are edited separately
+        seed_b = {"rules": {
+            cls: {
+                **{field: [k for k in mapping.get("rules", {}).get(cls, {}).get(field, []) if k in class_keys_map_b[cls]] for field in RULE_FIELDS},
+                "material": mapping.get("rules", {}).get(cls, {}).get("material", False),
+            }
+            for cls in all_classes
+        }}
+        active_a = st.session_state.get("active_classes", [])
+        store_rules_b = get_rule_store("rule_store_b", seed_b, [cls for cls in all_classes if cls in active_a], source=model_b_id)
+        render_rule_editor(store_rules_b, all_classes, class_keys_map_b, t, prefix="rules_b")
+
+        derived_mapping_b = {"rules": {cls: store_rules_b.rules_for(cls) for cls in store_rules_b.active_classes(all_classes)}}
+
+        # 🎚️ Default tolerance for all fields; per-field entries come from the mapping's "tolerances"
+        col_abs, col_rel = st.columns(2)
+        abs_tol = col_abs.number_input("🎚️ " + t.get("comparison_abs_tolerance", "Absolute tolerance"), min_value=0.0, value=0.0, step=0.001, format="%.4f", key="comparison_abs_tolerance")
+        rel_tol = col_rel.number_input("🎚️ " + t.get("comparison_rel_tolerance", "Relative tolerance (%)"), min_value=0.0, max_value=100.0, value=0.0, step=0.1, key="comparison_rel_tolerance")
+        st.caption(t.get("comparison_tolerance_hint", "Deltas within the tolerance are not reported; per-field values can be set under \"tolerances\" in the mapping JSON."))
+        if abs_tol or rel_tol:
+            mapping = {**mapping, "tolerances": {**mapping.get("tolerances", {}), "*": {"abs": abs_tol, "rel": rel_tol / 100}}}
+
+        # 🔍 Run comparison (in the background, once per model/mapping combination)
+        compare_key = f"{id(model_a)}:{model_b_id}:{mapping_hash(mapping)}:{mapping_hash(derived_mapping_b)}:{lang}"
+        snapshot = None
+        if "model_hash" in st.session_state:
+            snapshot = snapshot_key("compare", st.session_state["model_hash"], load_job.result["model_hash"], mapping_hash(mapping), mapping_hash(derived_mapping_b), lang, "memory")
+        compare_job = run_job(
+            t.get("comparison_tab_title", "Comparison"), compare_key, _compare_job, model_a, model_b, mapping, derived_mapping_b, lang, t,
+            st.session_state.get("property_store"), store_b, st.session_state.get("schema"), load_job.result["schema"], snapshot,
+        )
+        if not job_ready(compare_job):
+            return
+        diff_df = compare_job.result
 
         st.subheader("🔎 " + t.get("preview_tab", "Preview"))
 
+        unchanged = diff_df.attrs.get("unchanged_classes", [])
+        if unchanged:
+            st.caption("🟰 " + t.get("comparison_unchanged_classes", "Unchanged classes (skipped)") + ": " + ", ".join(unchanged))
+
         if diff_df.empty or diff_df.dropna(how="all").empty:
             st.info("ℹ️ " + t.get("no_differences", "No differences detected between Model A and Model B."))
         else:
             st.dataframe(diff_df, use_container_width=True)
 
+            # 📈 Largest swings first: partial selection of the top rows, no full sort
+            from tools.diff import rank_changes
+            st.subheader("📈 " + t.get("comparison_top_changes", "Largest changes"))
+            col_by, col_n = st.columns([2, 1])
+            rank_labels = {"abs": t.get("comparison_rank_abs", "Absolute change"), "rel": t.get("comparison_rank_rel", "Relative change")}
+            rank_by = col_by.radio(t.get("comparison_rank_by", "Rank by"), list(rank_labels), format_func=rank_labels.get, horizontal=True, key="comparison_rank_by")
+            top_n = col_n.number_input(t.get("comparison_top_n", "Rows"), min_value=1, max_value=1000, value=20, key="comparison_top_n")
+            st.dataframe(rank_changes(diff_df, int(top_n), rank_by, lang), use_container_width=True)
+
             # 📅 Export
             csv = diff_df.to_csv(index=False).encode("utf-8")
             st.download_button("📅 " + t.get("download_csv", "CSV Export"), data=csv, file_name="comparison.csv", mime="text/csv")
 
+            from tools.excel_export import format_diff_table_with_styles
             styled_excel = format_diff_table_with_styles(diff_df)
             st.download_button("📅 " + t.get("download_excel", "Styled Excel"), data=styled_excel, file_name="comparison.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
\ No newline at end of file
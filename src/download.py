@@ -1,9 +1,9 @@
 import streamlit as st
 import json
 import io
-import pandas as pd
 from pathlib import Path
 from translations import translations
+from job_ui import cancel_session_jobs
 
 def render_download_tab():
     lang = st.session_state.get("lang", "en")
@@ -52,6 +52,7 @@ def render_download_tab():
             mime="text/csv"
         )
 
+        import pandas as pd
         excel_bytes = io.BytesIO()
         with pd.ExcelWriter(excel_bytes, engine="xlsxwriter") as writer:
             df.to_excel(writer, index=False, sheet_name="Preview")
@@ -63,16 +64,10 @@ def render_download_tab():
         )
 
     if st.button("🔄 " + t.get("reset_all", "Reset all")):
+        # Only this session: the cache store and uploaded models are shared with other sessions and the
+        # service (full wipes: `python -m cache clear --full`)
+        cancel_session_jobs()
         st.session_state.clear()
 
-        project_root = Path(__file__).resolve().parent.parent
-        project_cache = project_root / "cache"
-        if project_cache.exists():
-            for file in project_cache.glob("*"):
-                try:
-                    file.unlink()
-                except Exception as e:
-                    st.warning(f"⚠️ {t.get('delete_failed', 'Could not delete file')}: {file.name} – {e}")
-
         st.success("🧹 " + t.get("reset_success", "Reset complete. Please reload the page."))
 
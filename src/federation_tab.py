@@ -0,0 +1,72 @@
+# 📁 federation_tab.py
+
+import streamlit as st
+from pathlib import Path
+
+from translations import translations
+from tools.ifchelper import mapping_hash, save_upload
+from job_ui import run_job, job_ready
+
+def _federation_job(job, paths, labels, mapping, by_source, t):
+    from tools.federation import build_federated_table
+    return build_federated_table(
+        paths, mapping, labels=labels, by_source=by_source,
+        progress=job.progress_callback("🧩 " + t.get("federation_running", "Extracting models …")),
+    )
+
+def render_federation_tab():
+    lang = st.session_state.get("lang", "en")
+    t = translations[lang]
+
+    st.header("🧩 " + t.get("federation_tab_title", "Federated models"))
+
+    if "class_rules" not in st.session_state or "active_classes" not in st.session_state:
+        st.warning("⚠️ " + t.get("preview_warning", "Please upload an IFC file and define rules first."))
+        return
+
+    class_rules = st.session_state["class_rules"]
+    mapping = {
+        "categories": st.session_state.get("category_mapping", {}),
+        "rules": {cls: class_rules.get(cls, {"text": [], "sum": []}) for cls in st.session_state["active_classes"]},
+        "units": st.session_state.get("loaded_mapping", {}).get("units", {}),
+    }
+
+    uploaded = st.file_uploader("📂 " + t.get("federation_upload_prompt", "Upload discipline models"), type=["ifc"], accept_multiple_files=True, key="federation_files")
+    st.caption(t.get("federation_hint", "All models are aggregated as one under the current mapping; already processed models are served from the cache."))
+    by_source = st.toggle("🏷️ " + t.get("federation_by_source", "One row per source model"), value=True, key="federation_by_source")
+
+    if not uploaded:
+        return
+
+    cache_dir = Path(__file__).resolve().parent.parent / "cache"
+    cache_dir.mkdir(exist_ok=True)
+
+    files = sorted(uploaded, key=lambda f: f.name)
+    paths = [save_upload(file.getbuffer(), file.name, cache_dir) for file in files]
+    labels = [Path(file.name).stem for file in files]
+
+    federation_key = ":".join(sorted(f.file_id for f in uploaded)) + ":" + mapping_hash(mapping) + f":{by_source}"
+    job = run_job(t.get("federation_tab_title", "Federated models"), federation_key, _federation_job, paths, labels, mapping, by_source, t)
+    if not job_ready(job):
+        return
+    table = job.result
+
+    if table.empty:
+        st.warning("⚠️ " + t.get("no_data_warning", "No data to display."))
+        return
+
+    from ifc_processing.transform import SOURCE_COL
+    from ifc_processing.material_index import MATERIAL_COL
+    table = table.rename(columns={
+        "Kategorie": t["Kategorie"],
+        "Gruppe": t["Gruppe"],
+        "Art": t["Art"],
+        "Status": t["Status"],
+        MATERIAL_COL: t.get(MATERIAL_COL, "Material"),
+        SOURCE_COL: t.get(SOURCE_COL, "Model"),
+        "Stückzahl": t.get("Stückzahl", "Count"),
+    })
+    st.dataframe(table, use_container_width=True)
+
+    csv = table.to_csv(index=False).encode("utf-8")
+    st.download_button("📥 " + t.get("download_csv", "Download CSV"), data=csv, file_name="federated.csv", mime="text/csv")
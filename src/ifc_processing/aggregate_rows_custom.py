@@ -1,14 +1,18 @@
 # 📁 tools/aggregate_rows_custom.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Iterator
 from ifcopenshell.file import file
-from ifc_processing.categorise_with_mapping import categorise_with_mapping
+from ifc_processing.query_plan import plan_extraction, execute_plan
+from ifc_processing.schema import NUMERIC, TEXT, parse_number
 
-def _make_row(cat, grp, art, status, prop, val, never_convert_fields=[], ifc_class="") -> Dict[str, Any]:
+def _make_row(cat, grp, art, status, prop, val, never_convert_fields=[], ifc_class="", global_id="", kind=None) -> Dict[str, Any]:
     try:
-        s = str(val).replace(",", ".").strip()
+        s = str(val).replace(",", ".").strip() if kind is None or prop in never_convert_fields else None
 
         if prop not in never_convert_fields:
-            if s.lstrip("-").replace(".", "", 1).isdigit():
+            # Columns typed by the model schema (`kind`) skip the per-value sniffing
+            if kind == NUMERIC:
+                val = parse_number(val)
+            elif kind != TEXT and s.lstrip("-").replace(".", "", 1).isdigit():
                 val = float(s)
         else:
             # 🚫 NEW: prevent "531.0" and convert to clean string
@@ -27,32 +31,40 @@ def _make_row(cat, grp, art, status, prop, val, never_convert_fields=[], ifc_cla
         "Eigenschaft": prop,
         "Wert": val,
         "OriginalClass": ifc_class,
+        "GlobalId": global_id,
     }
 
-def aggregate_rows_custom(ifc: file, mapping: Dict[str, Any]) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
+def aggregate_rows_custom(ifc: file, mapping: Dict[str, Any], progress: Optional[Callable[[int, int], None]] = None, spatial_index=None, classes: Optional[List[str]] = None, schema=None) -> List[Dict[str, Any]]:
+    return list(iter_rows_custom(ifc, mapping, progress, spatial_index, classes, schema))
 
-    for el in ifc.by_type("IfcElement"):
-        cat, grp, props = categorise_with_mapping(el, mapping)
+def iter_rows_custom(ifc: file, mapping: Dict[str, Any], progress: Optional[Callable[[int, int], None]] = None, spatial_index=None, classes: Optional[List[str]] = None, schema=None) -> Iterator[Dict[str, Any]]:
+    """
+    Long rows of `aggregate_rows_custom`, yielded one at a time (for chunked consumers).
+    `classes` limits the run to those classes; with the model's `schema`, values are converted by column type.
+    """
+    plan = plan_extraction(mapping, active_only=False, classes=classes)
+    compiled = plan.compiled
+
+    for el, cat, grp, props in execute_plan(ifc, plan, progress=progress, spatial_index=spatial_index):
 
         status = el.ObjectType or ""
         art = grp[1] if isinstance(grp, (tuple, list)) and len(grp) > 1 else ""
         grp = grp[0] if isinstance(grp, (tuple, list)) and len(grp) > 0 else ""
 
 
-        ifc_class = el.is_a()
-        rules = mapping.get("rules", {}).get(ifc_class, {})
-        text_fields = rules.get("text", [])
+        ifc_class = cat
+        selector = compiled.selector(ifc_class)
+        text_fields = selector.text_fields
+        gid = el.GlobalId
 
         for k, v in props.items():
-            rows.append(_make_row(cat, grp, art, status, k, v, text_fields, ifc_class))
-
-        rows.append(_make_row(cat, grp, art, status, "Stückzahl", 1, text_fields, ifc_class))
+            kind = schema.kind(ifc_class, k) if schema is not None else None
+            yield _make_row(cat, grp, art, status, k, v, text_fields, ifc_class, gid, kind)
 
-        if "Status" in text_fields or "Status" in rules.get("sum", []):
-            rows.append(_make_row(cat, grp, art, status, "Status", status, text_fields, ifc_class))
+        yield _make_row(cat, grp, art, status, "Stückzahl", 1, text_fields, ifc_class, gid, NUMERIC)
 
-        if "Art" in text_fields or "Art" in rules.get("sum", []):
-            rows.append(_make_row(cat, grp, art, status, "Art", art, text_fields, ifc_class))
+        if selector.wants_status:
+            yield _make_row(cat, grp, art, status, "Status", status, text_fields, ifc_class, gid)
 
-    return rows
\ No newline at end of file
+        if selector.wants_art:
+            yield _make_row(cat, grp, art, status, "Art", art, text_fields, ifc_class, gid)
\ No newline at end of file
@@ -1,29 +1,22 @@
-from typing import Dict, Any, Tuple, List
-from ifcopenshell.util.element import get_psets
+from typing import Dict, Any, Tuple, Union, Optional
+from ifc_processing.compiled_mapping import CompiledMapping, ClassSelector
+from ifc_processing.pset_reader import read_selected_psets, TypePsetCache
+from ifc_processing.spatial_index import SpatialIndex, SPATIAL_PSET
 
-def categorise_with_mapping(el, mapping: Dict[str, Any]) -> Tuple[str, Tuple[str, str, str], Dict[str, Any]]:
-    psets = get_psets(el)
-    name = el.Name or ""
+def categorise_with_mapping(el, mapping: Union[Dict[str, Any], CompiledMapping], type_cache: Optional[TypePsetCache] = None, spatial_index: Optional[SpatialIndex] = None) -> Tuple[str, Tuple[str, str, str], Dict[str, Any]]:
     cat = el.is_a()
-    gid = el.GlobalId
 
-    rules = mapping.get("rules", {}).get(cat, {})
-    selected_keys = set(rules.get("group", []) + rules.get("group2", []) +
-                        rules.get("group3", []) + rules.get("sum", []) +
-                        rules.get("text", []) + rules.get("ignore", []))
+    if isinstance(mapping, CompiledMapping):
+        selector = mapping.selector(cat)
+    else:
+        selector = ClassSelector(cat, mapping.get("rules", {}).get(cat, {}))
 
-    props = {}
-    for pset_name, keys in psets.items():
-        for k, v in keys.items():
-            combined = f"{pset_name}.{k}"
-            if combined in selected_keys:
-                props[combined] = v
+    values = read_selected_psets(el, selector, type_cache) if selector.keys else []
+    if spatial_index is not None and SPATIAL_PSET in selector.psets:
+        spatial_index.fill(el, selector.psets[SPATIAL_PSET], values)
 
-    def label_from(keys: List[str]) -> str:
-        return " / ".join(str(props.get(k, "")).strip() for k in keys) if keys else ""
+    gruppe = selector.label(values, selector.group_slots)
+    art    = selector.label(values, selector.group2_slots)
+    status = selector.label(values, selector.group3_slots)
 
-    gruppe = label_from(rules.get("group", []))
-    art    = label_from(rules.get("group2", []))
-    status = label_from(rules.get("group3", []))
-
-    return cat, (gruppe, art, status), props
+    return cat, (gruppe, art, status), selector.props(values)
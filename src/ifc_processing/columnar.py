@@ -0,0 +1,149 @@
+# 📁 ifc_processing/columnar.py — Single-file, memory-mappable columnar container for stores and tables
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"IFQCOL1\n"
+# Array offsets are aligned so every view keeps its dtype's alignment
+_ALIGN = 64
+_LEN = np.dtype("<u8")
+
+
+def write_arrays(path: Union[str, Path], header: Dict[str, Any], arrays: Dict[str, np.ndarray]) -> None:
+    """
+    Write `header` (JSON) and `arrays` into one file: magic, header length, header with the array
+    directory, then the raw array data at aligned offsets. Written to a temp file and renamed.
+    """
+    path = Path(path)
+    directory = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        directory[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    encoded = json.dumps({**header, "arrays": directory}, ensure_ascii=False, default=str).encode("utf-8")
+    start = -(-(len(MAGIC) + _LEN.itemsize + len(encoded)) // _ALIGN) * _ALIGN
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(MAGIC + np.array(len(encoded), dtype=_LEN).tobytes() + encoded)
+        for name, array in arrays.items():
+            f.seek(start + directory[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+
+
+def is_columnar(path: Union[str, Path]) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _read_header(path: Union[str, Path]) -> Tuple[Dict[str, Any], int]:
+    """(header, start of the array data)."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a columnar file: {path}")
+        length = int(np.frombuffer(f.read(_LEN.itemsize), dtype=_LEN)[0])
+        header = json.loads(f.read(length).decode("utf-8"))
+    return header, -(-(len(MAGIC) + _LEN.itemsize + length) // _ALIGN) * _ALIGN
+
+
+def map_arrays(path: Union[str, Path]) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Header and read-only array views over one memory map of the file: nothing is copied or read up front."""
+    header, start = _read_header(path)
+
+    directory = header.pop("arrays")
+    size = max((entry["offset"] + int(np.prod(entry["shape"])) * np.dtype(entry["dtype"]).itemsize for entry in directory.values()), default=0)
+    buffer = np.memmap(path, dtype=np.uint8, mode="r", offset=start, shape=(size,)) if size else np.empty(0, dtype=np.uint8)
+    arrays = {}
+    for name, entry in directory.items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"]))
+        arrays[name] = buffer[entry["offset"]:entry["offset"] + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+    return header, arrays
+
+
+# ------------------------------------------------------------------ tables
+
+def _json_value(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    return None if value is pd.NA else value
+
+
+def write_table(df: pd.DataFrame, path: Union[str, Path]) -> None:
+    """
+    Store a DataFrame column by column: numeric and boolean columns as raw arrays (nullable ones
+    with a mask), everything else dictionary-encoded into integer codes plus a JSON value list.
+    """
+    columns = []
+    arrays: Dict[str, np.ndarray] = {}
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        entry = {"name": name, "dtype": str(series.dtype)}
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(series.dtype):
+            mask = series.isna().to_numpy()
+            arrays[f"{i}.data"] = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            arrays[f"{i}.mask"] = mask
+            entry["encoding"] = "masked"
+        elif series.dtype.kind in "biuf":
+            arrays[f"{i}.data"] = series.to_numpy()
+            entry["encoding"] = "plain"
+        else:
+            codes, uniques = pd.factorize(series.astype(object), use_na_sentinel=False)
+            arrays[f"{i}.data"] = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+            entry["encoding"] = "dictionary"
+            entry["values"] = [_json_value(v) for v in uniques]
+        columns.append(entry)
+    write_arrays(path, {"kind": "table", "rows": len(df), "columns": columns, "attrs": df.attrs}, arrays)
+
+
+def attach_table(path: Union[str, Path]) -> pd.DataFrame:
+    """
+    The table in `path`, read-only: plain numeric columns are views into the shared memory map
+    (zero-copy, shared between processes through the page cache); dictionary-encoded columns are
+    decoded into object columns.
+    """
+    header, arrays = map_arrays(path)
+    if header.get("kind") != "table":
+        raise ValueError(f"Not a table: {path}")
+    data = {}
+    for i, entry in enumerate(header["columns"]):
+        values = arrays[f"{i}.data"]
+        if entry["encoding"] == "plain":
+            data[entry["name"]] = values
+        elif entry["encoding"] == "masked":
+            column = pd.array(values, dtype=entry["dtype"])
+            column[np.asarray(arrays[f"{i}.mask"])] = pd.NA
+            data[entry["name"]] = column
+        else:
+            lookup = np.empty(len(entry["values"]), dtype=object)
+            lookup[:] = entry["values"]
+            data[entry["name"]] = lookup[values]
+    df = pd.DataFrame(data, index=pd.RangeIndex(header["rows"]), columns=[entry["name"] for entry in header["columns"]], copy=False)
+    df.attrs.update(header.get("attrs", {}))
+    return df
+
+
+def attach(path: Union[str, Path]) -> Any:
+    """Whatever `path` holds: a DataFrame (`write_table`) or a `PropertyStore` (`PropertyStore.save`)."""
+    kind = _read_header(path)[0].get("kind")
+    if kind == "property_store":
+        from ifc_processing.property_store import PropertyStore
+        return PropertyStore.attach(path)
+    return attach_table(path)
+
+
+def save(obj: Any, path: Union[str, Path]) -> None:
+    """Counterpart of `attach`."""
+    if isinstance(obj, pd.DataFrame):
+        write_table(obj, path)
+    else:
+        obj.save(path)
@@ -0,0 +1,108 @@
+# 📁 ifc_processing/compiled_mapping.py — Mapping rules compiled into per-class selectors
+
+from typing import Dict, Any, List, Tuple, Union
+
+RULE_FIELDS = ("group", "group2", "group3", "sum", "text", "ignore")
+
+_MISSING = object()
+
+
+def _unique(keys) -> List[str]:
+    return list(dict.fromkeys(keys))
+
+
+class ClassSelector:
+    """
+    Rules of one IFC class, precomputed for the per-element hot loop.
+
+    - `keys`: all selected "Pset.Key" names in a fixed order (their position is the slot index)
+    - `psets`: pset name → {key: slot} so lookups go straight into the pset data
+    - `group_slots` / `group2_slots` / `group3_slots`: slot positions used for the labels
+    - `text_fields` / `sum_fields`: classification of the selected keys
+    """
+
+    __slots__ = (
+        "ifc_class", "category", "rules", "keys", "psets",
+        "group_slots", "group2_slots", "group3_slots",
+        "text_fields", "sum_fields", "wants_status", "wants_art",
+    )
+
+    def __init__(self, ifc_class: str, rules: Dict[str, Any], category: str = ""):
+        self.ifc_class = ifc_class
+        self.category = category or ifc_class
+        self.rules = rules
+        self.keys: Tuple[str, ...] = tuple(_unique(k for field in RULE_FIELDS for k in rules.get(field, [])))
+
+        slot_of = {k: i for i, k in enumerate(self.keys)}
+        self.psets: Dict[str, Dict[str, int]] = {}
+        for combined, slot in slot_of.items():
+            # A dotted name could be split at any dot, register every reading
+            for pos, char in enumerate(combined):
+                if char == ".":
+                    self.psets.setdefault(combined[:pos], {})[combined[pos + 1:]] = slot
+
+        self.group_slots = tuple(slot_of[k] for k in rules.get("group", []))
+        self.group2_slots = tuple(slot_of[k] for k in rules.get("group2", []))
+        self.group3_slots = tuple(slot_of[k] for k in rules.get("group3", []))
+
+        self.text_fields = frozenset(rules.get("text", []))
+        self.sum_fields = frozenset(rules.get("sum", []))
+        self.wants_status = "Status" in self.text_fields or "Status" in self.sum_fields
+        self.wants_art = "Art" in self.text_fields or "Art" in self.sum_fields
+
+    def empty_values(self) -> List[Any]:
+        return [_MISSING] * len(self.keys)
+
+    def select(self, psets: Dict[str, Dict[str, Any]]) -> List[Any]:
+        """Pick the selected values out of `get_psets`-shaped data into slot order (`_MISSING` if absent)."""
+        values = self.empty_values()
+        for pset_name, wanted in self.psets.items():
+            pset = psets.get(pset_name)
+            if not pset:
+                continue
+            for key, slot in wanted.items():
+                if key in pset:
+                    values[slot] = pset[key]
+        return values
+
+    def label(self, values: List[Any], slots: Tuple[int, ...]) -> str:
+        if not slots:
+            return ""
+        return " / ".join("" if values[s] is _MISSING else str(values[s]).strip() for s in slots)
+
+    def props(self, values: List[Any]) -> Dict[str, Any]:
+        return {k: v for k, v in zip(self.keys, values) if v is not _MISSING}
+
+
+class CompiledMapping:
+    """A mapping dict compiled once into `ClassSelector`s, plus derived field sets."""
+
+    def __init__(self, mapping: Dict[str, Any]):
+        self.mapping = mapping
+        self.categories: Dict[str, str] = mapping.get("categories", {})
+        self.selectors: Dict[str, ClassSelector] = {
+            cls: ClassSelector(cls, rules, self.categories.get(cls, cls)) for cls, rules in mapping.get("rules", {}).items()
+        }
+        self._empty: Dict[str, ClassSelector] = {}
+
+        self.never_convert_fields = set()
+        for rules in mapping.get("rules", {}).values():
+            for field in ("text", "group", "group2", "group3", "ignore"):
+                self.never_convert_fields.update(rules.get(field, []))
+
+    def selector(self, ifc_class: str) -> ClassSelector:
+        selector = self.selectors.get(ifc_class)
+        if selector is None:
+            selector = self._empty.get(ifc_class)
+            if selector is None:
+                selector = self._empty[ifc_class] = ClassSelector(ifc_class, {})
+        return selector
+
+    def active_classes(self) -> List[str]:
+        return list(self.selectors)
+
+
+def compile_mapping(mapping: Union[Dict[str, Any], CompiledMapping]) -> CompiledMapping:
+    if isinstance(mapping, CompiledMapping):
+        return mapping
+    return CompiledMapping(mapping)
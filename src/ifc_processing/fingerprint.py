@@ -0,0 +1,95 @@
+# 📁 ifc_processing/fingerprint.py — Order-independent per-class fingerprints of the mapped property data
+
+import hashlib
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ifc_processing.compiled_mapping import RULE_FIELDS, compile_mapping
+from ifc_processing.property_store import PropertyStore
+
+# Bump when the extraction rows change in a way the fingerprint does not capture
+FINGERPRINT_VERSION = "1"
+
+
+def _rule_signature(rules: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a class rule that influence its rows ("ignore": [] and a missing key are the same)."""
+    return {field: list(rules.get(field, [])) for field in RULE_FIELDS}
+
+
+def _multiset_hash(frame: pd.DataFrame) -> int:
+    """Sum of the row hashes mod 2**64: independent of element order, sensitive to every value and to the count."""
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy(dtype=np.uint64)
+    return int(row_hashes.sum(dtype=np.uint64))
+
+
+def _class_frame(store: PropertyStore, ifc, ifc_class: str, keys) -> pd.DataFrame:
+    """One row per element: its `ObjectType` (the row status) and the values of the selected keys (None if absent)."""
+    gids = store.gids(ifc_class)
+    object_types = {el.GlobalId: el.ObjectType or "" for el in ifc.by_type(ifc_class, include_subtypes=False)}
+    columns = {"ObjectType": [object_types.get(gid, "") for gid in gids]}
+    for key in keys:
+        values, mask = store.values(ifc_class, key)
+        column = values.astype(object)
+        column[~mask] = None
+        columns[key] = column
+    return pd.DataFrame(columns)
+
+
+def class_fingerprints(
+    store: PropertyStore,
+    ifc,
+    mapping: Dict[str, Any],
+    factors: Optional[Dict[Tuple[str, str], float]] = None,
+) -> Dict[str, str]:
+    """
+    IFC class → fingerprint of everything its comparison rows are derived from: the class rule,
+    the unit factors of its keys, and per element the `ObjectType` and the values of the keys the
+    rule selects. Element hashes are combined by summation, so the result does not depend on the
+    order of the elements in the file.
+    """
+    compiled = compile_mapping(mapping)
+    factors = factors or {}
+    fingerprints: Dict[str, str] = {}
+
+    for ifc_class in store.classes():
+        selector = compiled.selector(ifc_class)
+        try:
+            frame = _class_frame(store, ifc, ifc_class, selector.keys)
+        except RuntimeError:
+            # Class not part of this model's schema
+            continue
+        header = json.dumps([
+            FINGERPRINT_VERSION,
+            ifc_class,
+            _rule_signature(selector.rules),
+            sorted((key, factor) for (cls, key), factor in factors.items() if cls == ifc_class),
+            len(frame),
+        ], sort_keys=True, default=str)
+        digest = hashlib.blake2b(header.encode("utf-8"), digest_size=16)
+        digest.update(_multiset_hash(frame).to_bytes(8, "little"))
+        fingerprints[ifc_class] = digest.hexdigest()
+    return fingerprints
+
+
+def unchanged_classes(
+    fingerprints_a: Dict[str, str],
+    fingerprints_b: Dict[str, str],
+    mapping_a: Dict[str, Any],
+    mapping_b: Dict[str, Any],
+) -> List[str]:
+    """
+    Classes whose fingerprints match in both models, i.e. whose comparison rows are identical.
+    Classes with a material breakdown are never reported: their fingerprint does not cover the
+    material associations.
+    """
+    flagged = {
+        cls for m in (mapping_a, mapping_b)
+        for cls, rules in m.get("rules", {}).items() if rules.get("material")
+    }
+    return sorted(
+        cls for cls, fingerprint in fingerprints_a.items()
+        if cls not in flagged and fingerprints_b.get(cls) == fingerprint
+    )
@@ -0,0 +1,224 @@
+# 📁 ifc_processing/incremental.py — STEP-level change detection between model revisions and patched re-extraction
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ifc_processing.pset_reader import TypePsetCache, PROGRESS_EVERY, iter_property_definitions
+from ifc_processing.property_store import PropertyStore
+from ifc_processing.spatial_index import SpatialIndex, SPATIAL_PSET
+
+# Statements end with ";" and (almost always) a line break; a ";" + line break inside a string is rejoined
+_STATEMENT_END = re.compile(rb";[ \t]*\r?\n")
+# A quoted STEP string ('' escapes read as two adjacent strings)
+_STRING = re.compile(rb"'[^']*'")
+_ENTITY = re.compile(rb"\s*#(\d+)\s*=\s*([A-Za-z0-9_]+)\s*\((.*)\)\s*$", re.S)
+_REF = re.compile(rb"#(\d+)")
+# A string (kept as is) or a reference
+_STRING_OR_REF = re.compile(rb"'[^']*'|#(\d+)")
+
+_OWNER_HISTORY = b"IFCOWNERHISTORY"
+
+_DEFINES_BY_PROPERTIES = b"IFCRELDEFINESBYPROPERTIES"
+_DEFINES_BY_TYPE = b"IFCRELDEFINESBYTYPE"
+# IfcTypeObject (GlobalId, OwnerHistory, Name, Description, ApplicableOccurrence, HasPropertySets, …)
+_TYPE_PSETS = 5
+
+
+def read_entities(path) -> Dict[int, Tuple[bytes, bytes]]:
+    """Entity id → (upper-case class, raw argument text) of the DATA section of a STEP file."""
+    data = Path(path).read_bytes()
+    start = data.find(b"DATA;") + len(b"DATA;")
+    end = data.rfind(b"ENDSEC;")
+    entities = {}
+    pending = b""
+    for statement in _STATEMENT_END.split(data[start:end]):
+        if pending:
+            statement = pending + b";\n" + statement
+        # An odd number of quotes: the statement continues after a ";" inside a string
+        if statement.count(b"'") % 2:
+            pending = statement
+            continue
+        pending = b""
+        entity = _ENTITY.match(statement)
+        if entity:
+            entities[int(entity.group(1))] = (entity.group(2).upper(), entity.group(3))
+    return entities
+
+
+def _split_args(args: bytes) -> List[bytes]:
+    """Top-level attributes of an argument list (nested lists and strings kept whole)."""
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(args):
+        c = args[i:i + 1]
+        if c == b"'":
+            i = args.index(b"'", i + 1)
+        elif c == b"(":
+            depth += 1
+        elif c == b")":
+            depth -= 1
+        elif c == b"," and depth == 0:
+            parts.append(args[start:i].strip())
+            start = i + 1
+        i += 1
+    parts.append(args[start:].strip())
+    return parts
+
+
+def _refs(text: bytes) -> List[int]:
+    return [int(r) for r in _REF.findall(_STRING.sub(b"", text))]
+
+
+def _relation(args: bytes) -> Tuple[List[int], List[int]]:
+    """(RelatedObjects, Relating…) of an IfcRelDefinesBy* line: the first list after the string/reference attributes."""
+    args = _STRING.sub(b"", args)
+    start = args.index(b"(")
+    end = args.index(b")", start)
+    return _refs(args[start:end]), _refs(args[end + 1:])
+
+
+class _Hasher:
+    """
+    Content hashes of entity subtrees: the entity's line with every reference replaced by the hash of
+    the referenced subtree, so entity ids never count (a re-export that renumbers gives the same hashes).
+    References to the IfcOwnerHistory are blanked; it changes with every save, not with the content.
+    """
+
+    def __init__(self, entities: Dict[int, Tuple[bytes, bytes]]):
+        self.entities = entities
+        self._memo: Dict[int, bytes] = {}
+
+    def _inline(self, match: "re.Match[bytes]") -> bytes:
+        if match.group(1) is None:
+            return match.group(0)
+        ref = int(match.group(1))
+        if self.entities.get(ref, (b"",))[0] == _OWNER_HISTORY:
+            return b"#"
+        return b"#" + self.subtree(ref).hex().encode()
+
+    def subtree(self, eid: int) -> bytes:
+        digest = self._memo.get(eid)
+        if digest is None:
+            self._memo[eid] = b""  # cycle guard
+            ifc_class, args = self.entities.get(eid, (b"", b""))
+            line = ifc_class + b"(" + _STRING_OR_REF.sub(self._inline, args) + b")"
+            digest = self._memo[eid] = hashlib.blake2b(line, digest_size=16).digest()
+        return digest
+
+
+def _blank_refs(ifc_class: bytes, args: bytes) -> bytes:
+    """The entity's own line with every reference (outside strings) blanked."""
+    return ifc_class + b"(" + _STRING_OR_REF.sub(lambda m: b"#" if m.group(1) else m.group(0), args) + b")"
+
+
+def element_hashes(path, elements: Iterable[Tuple[int, str]]) -> Dict[str, str]:
+    """
+    GlobalId → hash of everything the extraction reads for one element:
+
+    - its own line, with references blanked (renumbered placements or geometry do not count)
+    - the property/quantity set subtrees attached by its IfcRelDefinesByProperties
+    - its type object's line (references blanked) and property set subtrees (IfcRelDefinesByType)
+
+    Subtrees are hashed by content (see `_Hasher`), without entity ids or the owner history.
+
+    `elements` are the (entity id, GlobalId) pairs to hash. Spatial levels are not part of the hash;
+    they are always re-attached from the current model's spatial index.
+    """
+    entities = read_entities(path)
+    hasher = _Hasher(entities)
+    definitions: Dict[int, List[int]] = {}
+    types: Dict[int, List[int]] = {}
+    for eid, (ifc_class, args) in entities.items():
+        if ifc_class == _DEFINES_BY_PROPERTIES or ifc_class == _DEFINES_BY_TYPE:
+            related, relating = _relation(args)
+            target = definitions if ifc_class == _DEFINES_BY_PROPERTIES else types
+            for element in related:
+                target.setdefault(element, []).extend(relating)
+
+    type_digests: Dict[int, bytes] = {}
+
+    def type_digest(type_id: int) -> bytes:
+        digest = type_digests.get(type_id)
+        if digest is None:
+            type_class, type_args = entities.get(type_id, (b"", b""))
+            h = hashlib.blake2b(_blank_refs(type_class, type_args), digest_size=16)
+            attrs = _split_args(type_args)
+            for pset in _refs(attrs[_TYPE_PSETS]) if len(attrs) > _TYPE_PSETS else []:
+                h.update(hasher.subtree(pset))
+            digest = type_digests[type_id] = h.digest()
+        return digest
+
+    hashes = {}
+    for eid, gid in elements:
+        ifc_class, args = entities.get(eid, (b"", b""))
+        h = hashlib.blake2b(_blank_refs(ifc_class, args), digest_size=16)
+        # Sorted, so the file order of the relationships (which a re-export may change) does not count
+        for digest in sorted(hasher.subtree(definition) for definition in definitions.get(eid, [])):
+            h.update(digest)
+        for type_id in types.get(eid, []):
+            h.update(type_digest(type_id))
+        hashes[gid] = h.hexdigest()
+    return hashes
+
+
+def _definition_ids(el) -> List[Tuple[str, Any]]:
+    """
+    The `"<Pset>.id"` items of an element: the entity id of each of its property / quantity sets in this
+    model, type first and occurrence last, as `get_psets` merges them.
+    """
+    ids: Dict[str, Any] = {}
+    for definition in iter_property_definitions(el):
+        ids[f"{definition.Name}.id"] = definition.id()
+    return list(ids.items())
+
+
+def changed_elements(hashes: Dict[str, str], base_hashes: Dict[str, str]) -> Set[str]:
+    """GlobalIds that are new or whose hash differs from the base revision."""
+    return {gid for gid, digest in hashes.items() if base_hashes.get(gid) != digest}
+
+
+def patched_store(
+    ifc,
+    base: PropertyStore,
+    changed: Set[str],
+    spatial_index: SpatialIndex,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> PropertyStore:
+    """
+    The model's property store with only the `changed` elements read from `ifc`; all other rows are
+    patched in from the base revision's store. Entity ids are not part of the element hashes, so the
+    `"<Pset>.id"` values of patched rows are taken from `ifc`, and spatial levels are re-attached for
+    every element. Same content as
+    `PropertyStore.from_psets(attach_spatial_psets(ifc, read_psets_from_model(ifc), index))`, also after
+    a re-export that renumbered the entities.
+    """
+    type_cache = TypePsetCache()
+    spatial_prefix = SPATIAL_PSET + "."
+
+    def rows() -> Iterator[Tuple[str, str, Iterable[Tuple[str, Any]]]]:
+        elements = ifc.by_type("IfcElement")
+        read = 0
+        for el in elements:
+            gid = el.GlobalId
+            if gid in changed or gid not in base:
+                if progress and read % PROGRESS_EVERY == 0:
+                    progress(read, len(changed))
+                read += 1
+                items: List[Tuple[str, Any]] = [
+                    (f"{pset_name}.{k}", v)
+                    for pset_name, pset in type_cache.psets(el).items()
+                    for k, v in pset.items()
+                ]
+            else:
+                items = [
+                    (k, v) for k, v in base.row(gid).items()
+                    if k != "type" and not k.startswith(spatial_prefix) and not k.endswith(".id")
+                ]
+                items += _definition_ids(el)
+            levels = spatial_index.levels(el)
+            if levels["Path"]:
+                items += [(spatial_prefix + k, v) for k, v in levels.items()]
+            yield gid, el.is_a(), items
+
+    return PropertyStore.from_rows(rows())
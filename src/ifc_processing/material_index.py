@@ -0,0 +1,183 @@
+# 📁 ifc_processing/material_index.py — Material / layer-set breakdown from a cached IfcRelAssociatesMaterial index
+
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from ifcopenshell.util.element import get_type
+
+# Grouping column added to the long rows / aggregated tables for classes with `"material": true`
+MATERIAL_COL = "Baustoff"
+
+# The count row every element gets (see aggregate_rows_custom)
+_COUNT = "Stückzahl"
+
+Parts = Tuple[Tuple[str, float], ...]
+
+
+def _material_name(material) -> str:
+    return (material.Name or "") if material is not None else ""
+
+
+def _normalise(parts: List[Tuple[str, float]]) -> Parts:
+    """Merge repeated materials and scale the weights to fractions summing to 1 (equal split if all weights are 0)."""
+    merged: Dict[str, float] = {}
+    for name, weight in parts:
+        merged[name] = merged.get(name, 0.0) + max(float(weight or 0.0), 0.0)
+    total = sum(merged.values())
+    if total <= 0:
+        return tuple((name, 1.0 / len(merged)) for name in merged)
+    return tuple((name, weight / total) for name, weight in merged.items())
+
+
+class MaterialIndex:
+    """
+    Object → material parts, built from one pass over `IfcRelAssociatesMaterial`.
+
+    Each material definition is resolved once into `(material name, fraction)` pairs:
+    layer sets by layer thickness, constituent sets by their `Fraction` (equal split if unset),
+    profile sets and material lists by equal split. Occurrence associations take precedence
+    over the association of the element's type; type results are cached per type object.
+    """
+
+    def __init__(self):
+        self._assoc: Dict[int, Any] = {}
+        self._assoc_by_gid: Dict[str, Any] = {}
+        self._definitions: Dict[int, Parts] = {}
+        self._types: Dict[int, Parts] = {}
+        self._by_gid: Optional[Dict[str, Parts]] = None
+
+    @classmethod
+    def from_model(cls, ifc) -> "MaterialIndex":
+        index = cls()
+        for rel in ifc.by_type("IfcRelAssociatesMaterial"):
+            for obj in rel.RelatedObjects or []:
+                index._assoc[obj.id()] = rel.RelatingMaterial
+                index._assoc_by_gid[obj.GlobalId] = rel.RelatingMaterial
+        return index
+
+    def resolve(self, definition) -> Parts:
+        """Material parts of one material select (IfcMaterial, layer/profile/constituent set, usage or list)."""
+        key = definition.id()
+        parts = self._definitions.get(key)
+        if parts is not None:
+            return parts
+
+        ifc_class = definition.is_a()
+        if ifc_class == "IfcMaterialLayerSetUsage":
+            parts = self.resolve(definition.ForLayerSet)
+        elif ifc_class == "IfcMaterialProfileSetUsage" or ifc_class == "IfcMaterialProfileSetUsageTapering":
+            parts = self.resolve(definition.ForProfileSet)
+        elif ifc_class == "IfcMaterialLayerSet":
+            parts = _normalise([(_material_name(layer.Material), layer.LayerThickness) for layer in definition.MaterialLayers or []])
+        elif ifc_class == "IfcMaterialProfileSet":
+            parts = _normalise([(_material_name(profile.Material), 1.0) for profile in definition.MaterialProfiles or []])
+        elif ifc_class == "IfcMaterialConstituentSet":
+            constituents = definition.MaterialConstituents or []
+            if constituents and all(c.Fraction for c in constituents):
+                parts = _normalise([(_material_name(c.Material), c.Fraction) for c in constituents])
+            else:
+                parts = _normalise([(_material_name(c.Material), 1.0) for c in constituents])
+        elif ifc_class == "IfcMaterialList":
+            parts = _normalise([(_material_name(m), 1.0) for m in definition.Materials or []])
+        elif ifc_class in ("IfcMaterialLayer", "IfcMaterialProfile", "IfcMaterialConstituent"):
+            parts = ((_material_name(definition.Material), 1.0),)
+        elif ifc_class == "IfcMaterial":
+            parts = ((definition.Name or "", 1.0),)
+        else:
+            parts = ()
+
+        self._definitions[key] = parts
+        return parts
+
+    def _type_parts(self, element_type) -> Parts:
+        key = element_type.id()
+        parts = self._types.get(key)
+        if parts is None:
+            definition = self._assoc.get(key)
+            parts = self._types[key] = self.resolve(definition) if definition is not None else ()
+        return parts
+
+    def parts(self, el) -> Parts:
+        """`(material name, fraction)` pairs of an element; empty if no material is associated."""
+        definition = self._assoc.get(el.id())
+        if definition is not None:
+            return self.resolve(definition)
+        element_type = get_type(el)
+        return self._type_parts(element_type) if element_type is not None else ()
+
+    def parts_by_gid(self, ifc) -> Dict[str, Parts]:
+        """GlobalId → material parts of every object with a material, from one pass over the type relations (cached)."""
+        if self._by_gid is None:
+            by_gid: Dict[str, Parts] = {}
+            for rel in ifc.by_type("IfcRelDefinesByType"):
+                parts = self._type_parts(rel.RelatingType)
+                if parts:
+                    for obj in rel.RelatedObjects or []:
+                        by_gid[obj.GlobalId] = parts
+            for gid, definition in self._assoc_by_gid.items():
+                by_gid[gid] = self.resolve(definition)
+            self._by_gid = by_gid
+        return self._by_gid
+
+    def material_table(self, ifc, global_ids: Iterable[str]) -> pd.DataFrame:
+        """One row per (GlobalId, material) with the material's share `_fraction` of the element."""
+        by_gid = self.parts_by_gid(ifc)
+        rows = [(gid, name, fraction) for gid in global_ids for name, fraction in by_gid.get(gid, ())]
+        return pd.DataFrame(rows, columns=["GlobalId", MATERIAL_COL, "_fraction"])
+
+
+def build_material_index(ifc) -> MaterialIndex:
+    return MaterialIndex.from_model(ifc)
+
+
+def split_by_material(
+    df: pd.DataFrame,
+    ifc,
+    mapping: Dict[str, Any],
+    index: Optional[MaterialIndex] = None,
+) -> pd.DataFrame:
+    """
+    Break the long rows of classes with `"material": true` down per material.
+
+    Rows of those classes are joined with the material table on GlobalId; their sum fields are
+    scaled by the material fraction (so the totals per element are preserved) and text fields are
+    repeated per material. The count row and numeric values of fields that are neither `"sum"` nor
+    `"text"` (which the aggregation may still sum) stay one per element, on its main material (largest
+    fraction), so they are not counted once per material. All other rows get an empty material;
+    without any flagged class the frame is returned unchanged. `df` itself is not modified.
+    """
+    if df.empty or "GlobalId" not in df.columns:
+        return df
+
+    rules = mapping.get("rules", {})
+    classes = [cls for cls, r in rules.items() if r.get("material")]
+    flagged = df["OriginalClass"].isin(classes)
+    if not flagged.any():
+        return df
+
+    index = index or build_material_index(ifc)
+    table = index.material_table(ifc, df.loc[flagged, "GlobalId"].unique())
+
+    rows = df[flagged].drop(columns=MATERIAL_COL, errors="ignore").reset_index(drop=True)
+    split = rows.rename_axis("_row").reset_index().merge(table, on="GlobalId", how="left")
+    split[MATERIAL_COL] = split[MATERIAL_COL].fillna("")
+    split["_fraction"] = split["_fraction"].fillna(1.0)
+
+    def fields(kind: str) -> pd.MultiIndex:
+        return pd.MultiIndex.from_tuples([(cls, field) for cls in classes for field in rules[cls].get(kind, [])] or [("", "")])
+
+    keys = pd.MultiIndex.from_arrays([split["OriginalClass"], split["Eigenschaft"]])
+    is_sum = keys.isin(fields("sum"))
+    is_numeric = pd.to_numeric(split["Wert"], errors="coerce").notna().to_numpy()
+    # Count and undefined numeric rows once per element: the one of its largest material share
+    once = (split["Eigenschaft"] == _COUNT).to_numpy() | (is_numeric & ~is_sum & ~keys.isin(fields("text")))
+    kept = split[once].sort_values("_fraction", ascending=False, kind="stable").drop_duplicates("_row")
+    split = pd.concat([split[~once], kept]).sort_index()
+
+    values = pd.to_numeric(split["Wert"], errors="coerce")
+    scale = pd.MultiIndex.from_arrays([split["OriginalClass"], split["Eigenschaft"]]).isin(fields("sum")) & values.notna().to_numpy()
+    split["Wert"] = split["Wert"].astype(object)
+    split.loc[scale, "Wert"] = values[scale] * split.loc[scale, "_fraction"]
+
+    split = split.drop(columns=["_row", "_fraction"])
+    return pd.concat([df[~flagged].assign(**{MATERIAL_COL: ""}), split], ignore_index=True)
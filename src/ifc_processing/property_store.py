@@ -0,0 +1,298 @@
+# 📁 ifc_processing/property_store.py — Compact columnar store for extracted Pset data
+
+import sys
+from typing import Dict, Any, Callable, List, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+_NUMERIC = 0
+_CATEGORICAL = 1
+
+
+class _Column:
+    """One (class, key) column: float64 values or dictionary codes plus a packed presence bitmap."""
+
+    __slots__ = ("kind", "data", "present", "is_int")
+
+    def __init__(self, kind: int, data: np.ndarray, present: np.ndarray, is_int: bool = False):
+        self.kind = kind
+        self.data = data
+        self.present = present
+        self.is_int = is_int
+
+    def has(self, row: int) -> bool:
+        return bool((self.present[row >> 3] >> (7 - (row & 7))) & 1)
+
+    def mask(self, n_rows: int) -> np.ndarray:
+        return np.unpackbits(self.present, count=n_rows).astype(bool)
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.present.nbytes
+
+
+class _ClassBlock:
+    """All elements of one IFC class, stored column-wise by interned key id."""
+
+    __slots__ = ("name", "gids", "columns")
+
+    def __init__(self, name: str, gids: List[str], columns: Dict[int, _Column]):
+        self.name = name
+        self.gids = gids
+        self.columns = columns
+
+
+class PropertyStore:
+    """
+    Memory-compact replacement for the flattened `GlobalId → {"Pset.Key": value}` dicts.
+
+    - Keys are interned once and referenced by integer id.
+    - Text/boolean values are dictionary-encoded into one shared value table.
+    - Purely numeric columns are kept as float64 arrays.
+    - Each class keeps a sparse set of columns with packed presence bitmaps,
+      so absent keys cost nothing and present ones cost one bit per element.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._values: List[Any] = []
+        self._value_ids: Dict[Tuple[type, Any], int] = {}
+        self._blocks: Dict[str, _ClassBlock] = {}
+        self._rows: Dict[str, Tuple[_ClassBlock, int]] = {}
+
+    # ------------------------------------------------------------------ build
+
+    @classmethod
+    def from_psets(cls, pset_data: Dict[str, Dict[str, Any]]) -> "PropertyStore":
+        """Build from `read_psets_from_model` output without materialising flat dicts."""
+        def flat_rows():
+            for gid, entry in pset_data.items():
+                yield gid, entry["type"], (
+                    (f"{pset_name}.{k}", v)
+                    for pset_name, pset in entry["psets"].items()
+                    for k, v in pset.items()
+                )
+        return cls._build(flat_rows())
+
+    @classmethod
+    def from_flat(cls, flat_data: Dict[str, Dict[str, Any]]) -> "PropertyStore":
+        """Build from `flatten_psets` output."""
+        return cls._build(
+            (gid, row.get("type", ""), ((k, v) for k, v in row.items() if k != "type"))
+            for gid, row in flat_data.items()
+        )
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, Iterable[Tuple[str, Any]]]]) -> "PropertyStore":
+        """Build from `(GlobalId, class, ("Pset.Key", value) pairs)` rows."""
+        return cls._build(rows)
+
+    @classmethod
+    def _build(cls, rows: Iterable[Tuple[str, str, Iterable[Tuple[str, Any]]]]) -> "PropertyStore":
+        store = cls()
+        staging: Dict[str, Tuple[List[str], Dict[int, List[Tuple[int, Any]]]]] = {}
+
+        for gid, ifc_class, items in rows:
+            gids, cols = staging.setdefault(ifc_class, ([], {}))
+            row = len(gids)
+            gids.append(gid)
+            for key, value in items:
+                if not isinstance(value, (int, float)):
+                    value = str(value).strip()
+                cols.setdefault(store._intern_key(key), []).append((row, value))
+
+        for ifc_class, (gids, cols) in staging.items():
+            n = len(gids)
+            columns = {key_id: store._encode_column(entries, n) for key_id, entries in cols.items()}
+            block = _ClassBlock(ifc_class, gids, columns)
+            store._blocks[ifc_class] = block
+            for row, gid in enumerate(gids):
+                store._rows[gid] = (block, row)
+
+        return store
+
+    def _intern_key(self, key: str) -> int:
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = len(self._keys)
+            key = sys.intern(key)
+            self._keys.append(key)
+            self._key_ids[key] = key_id
+        return key_id
+
+    def _intern_value(self, value: Any) -> int:
+        token = (type(value), value)
+        value_id = self._value_ids.get(token)
+        if value_id is None:
+            value_id = len(self._values)
+            self._values.append(sys.intern(value) if isinstance(value, str) else value)
+            self._value_ids[token] = value_id
+        return value_id
+
+    def _encode_column(self, entries: List[Tuple[int, Any]], n_rows: int) -> _Column:
+        mask = np.zeros(n_rows, dtype=bool)
+        rows = np.fromiter((r for r, _ in entries), dtype=np.int64, count=len(entries))
+        mask[rows] = True
+        present = np.packbits(mask)
+
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for _, v in entries)
+        if numeric:
+            data = np.full(n_rows, np.nan, dtype=np.float64)
+            data[rows] = [v for _, v in entries]
+            is_int = all(isinstance(v, int) for _, v in entries)
+            return _Column(_NUMERIC, data, present, is_int)
+
+        codes = [self._intern_value(v) for _, v in entries]
+        data = np.zeros(n_rows, dtype=np.min_scalar_type(max(len(self._values), 1)))
+        data[rows] = codes
+        return _Column(_CATEGORICAL, data, present)
+
+    def _decode(self, col: _Column, row: int) -> Any:
+        if col.kind == _NUMERIC:
+            val = float(col.data[row])
+            return int(val) if col.is_int else val
+        return self._values[int(col.data[row])]
+
+    # ---------------------------------------------------------------- lookups
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, gid: str) -> bool:
+        return gid in self._rows
+
+    def classes(self) -> List[str]:
+        return sorted(self._blocks)
+
+    def gids(self, ifc_class: Optional[str] = None) -> List[str]:
+        if ifc_class is not None:
+            block = self._blocks.get(ifc_class)
+            return list(block.gids) if block else []
+        return list(self._rows)
+
+    def class_of(self, gid: str) -> Optional[str]:
+        entry = self._rows.get(gid)
+        return entry[0].name if entry else None
+
+    def keys_for_class(self, ifc_class: str) -> List[str]:
+        """Sorted "Pset.Key" names present on at least one element of the class."""
+        block = self._blocks.get(ifc_class)
+        if block is None:
+            return []
+        return sorted(self._keys[key_id] for key_id in block.columns)
+
+    def get(self, gid: str, key: str, default: Any = None) -> Any:
+        entry = self._rows.get(gid)
+        key_id = self._key_ids.get(key)
+        if entry is None or key_id is None:
+            return default
+        block, row = entry
+        col = block.columns.get(key_id)
+        if col is None or not col.has(row):
+            return default
+        return self._decode(col, row)
+
+    def row(self, gid: str) -> Dict[str, Any]:
+        """Reconstruct the flat `{"type": cls, "Pset.Key": value}` dict of one element."""
+        block, row = self._rows[gid]
+        result: Dict[str, Any] = {"type": block.name}
+        for key_id, col in block.columns.items():
+            if col.has(row):
+                result[self._keys[key_id]] = self._decode(col, row)
+        return result
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for gid in self._rows:
+            yield gid, self.row(gid)
+
+    def values(self, ifc_class: str, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Column view for one (class, key): returns (values, present_mask) aligned with `gids(ifc_class)`.
+        Numeric columns come back as float64, text columns as object arrays.
+        """
+        block = self._blocks.get(ifc_class)
+        n = len(block.gids) if block else 0
+        col = block.columns.get(self._key_ids.get(key, -1)) if block else None
+        if col is None:
+            return np.full(n, np.nan), np.zeros(n, dtype=bool)
+        mask = col.mask(n)
+        if col.kind == _NUMERIC:
+            return col.data, mask
+        lookup = np.asarray(self._values, dtype=object)
+        values = lookup[col.data]
+        values[~mask] = None
+        return values, mask
+
+    def profile(self, ifc_class: str, key: str, classify: Callable[[Any], str]) -> Dict[str, int]:
+        """
+        Label → number of present values of one (class, key) column. Numeric columns are counted as
+        "int"/"float" by integrality; text columns call `classify` once per distinct value.
+        """
+        block = self._blocks.get(ifc_class)
+        col = block.columns.get(self._key_ids.get(key, -1)) if block else None
+        if col is None:
+            return {}
+        mask = col.mask(len(block.gids))
+        if col.kind == _NUMERIC:
+            values = col.data[mask]
+            integral = len(values) if col.is_int else int(np.count_nonzero(np.mod(values, 1) == 0))
+            counts = {"int": integral, "float": len(values) - integral}
+            return {label: n for label, n in counts.items() if n}
+
+        counts: Dict[str, int] = {}
+        occurrences = np.bincount(col.data[mask].astype(np.int64))
+        for code in np.flatnonzero(occurrences):
+            label = classify(self._values[code])
+            counts[label] = counts.get(label, 0) + int(occurrences[code])
+        return counts
+
+    def nbytes(self) -> int:
+        """Approximate size of the column arrays (excludes the shared key/value tables)."""
+        return sum(col.nbytes for block in self._blocks.values() for col in block.columns.values())
+
+    # ------------------------------------------------------------ persistence
+
+    def save(self, path) -> None:
+        """Write the store into one memory-mappable file (see `ifc_processing.columnar`)."""
+        from ifc_processing.columnar import write_arrays
+
+        arrays: Dict[str, np.ndarray] = {}
+        blocks = []
+        for b, block in enumerate(self._blocks.values()):
+            for key_id, col in block.columns.items():
+                arrays[f"{b}.{key_id}.data"] = col.data
+                arrays[f"{b}.{key_id}.present"] = col.present
+            blocks.append({
+                "name": block.name,
+                "gids": block.gids,
+                "columns": [[key_id, col.kind, col.is_int] for key_id, col in block.columns.items()],
+            })
+        write_arrays(path, {"kind": "property_store", "keys": self._keys, "values": self._values, "blocks": blocks}, arrays)
+
+    @classmethod
+    def attach(cls, path) -> "PropertyStore":
+        """
+        Read-only store over a file written by `save`. The column arrays are views into one memory
+        map, so processes attaching the same file share one physical copy; only the key/value tables
+        and the GlobalId index are loaded.
+        """
+        from ifc_processing.columnar import map_arrays
+
+        header, arrays = map_arrays(path)
+        if header.get("kind") != "property_store":
+            raise ValueError(f"Not a property store: {path}")
+        store = cls()
+        store._keys = [sys.intern(key) for key in header["keys"]]
+        store._key_ids = {key: key_id for key_id, key in enumerate(store._keys)}
+        store._values = [sys.intern(v) if isinstance(v, str) else v for v in header["values"]]
+        for b, entry in enumerate(header["blocks"]):
+            columns = {
+                key_id: _Column(kind, arrays[f"{b}.{key_id}.data"], arrays[f"{b}.{key_id}.present"], is_int)
+                for key_id, kind, is_int in entry["columns"]
+            }
+            block = _ClassBlock(entry["name"], entry["gids"], columns)
+            store._blocks[block.name] = block
+            for row, gid in enumerate(block.gids):
+                store._rows[gid] = (block, row)
+        return store
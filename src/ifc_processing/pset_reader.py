@@ -1,16 +1,72 @@
 # ifc_processing/pset_reader.py
 
 import ifcopenshell
-from ifcopenshell.util.element import get_psets
-from typing import Dict, Any
+from collections import ChainMap
+from ifcopenshell.util.element import get_psets, get_type, get_properties, get_quantities, get_property_definition
+from typing import Dict, Any, List, Iterator, Mapping, Optional, Callable
 
 
-def read_psets_from_model(ifc) -> Dict[str, Dict[str, Any]]:
-    """Return a mapping of GlobalId → all Psets and type."""
+class TypePsetCache:
+    """
+    Resolves the property sets of each IfcTypeObject once and shares them across its occurrences.
+
+    Cached type psets are shared by reference between elements and must be treated as read-only;
+    occurrence-level psets are layered on top with a ChainMap instead of being merged into a copy.
+    """
+
+    def __init__(self):
+        self._full: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        self._selected: Dict[Any, Dict[int, List[Any]]] = {}
+
+    def type_psets(self, element_type) -> Dict[str, Dict[str, Any]]:
+        psets = self._full.get(element_type.id())
+        if psets is None:
+            psets = self._full[element_type.id()] = get_psets(element_type)
+        return psets
+
+    def psets(self, el) -> Dict[str, Mapping[str, Any]]:
+        """Same result as `get_psets(el)`, with inherited type psets resolved only once per type."""
+        element_type = get_type(el)
+        if element_type is None:
+            return get_psets(el)
+
+        type_psets = self.type_psets(element_type)
+        occurrence_psets = get_psets(el, should_inherit=False)
+        if not occurrence_psets:
+            return type_psets
+
+        psets: Dict[str, Mapping[str, Any]] = dict(type_psets)
+        for name, pset in occurrence_psets.items():
+            psets[name] = ChainMap(pset, type_psets[name]) if name in type_psets else pset
+        return psets
+
+    def type_values(self, element_type, selector) -> List[Any]:
+        """Slot values a selector reads from a type object, resolved once per (type, selector)."""
+        per_type = self._selected.setdefault(selector, {})
+        values = per_type.get(element_type.id())
+        if values is None:
+            values = per_type[element_type.id()] = selector.empty_values()
+            _read_definitions(element_type.HasPropertySets or [], selector.psets, values)
+        return values
+
+
+PROGRESS_EVERY = 250
+
+
+def read_psets_from_model(
+    ifc,
+    type_cache: Optional[TypePsetCache] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Return a mapping of GlobalId → all Psets and type. `progress(done, total)` is called periodically."""
+    type_cache = type_cache or TypePsetCache()
     result = {}
-    for el in ifc.by_type("IfcElement"):
+    elements = ifc.by_type("IfcElement")
+    for i, el in enumerate(elements):
+        if progress and i % PROGRESS_EVERY == 0:
+            progress(i, len(elements))
         global_id = el.GlobalId
-        psets = get_psets(el)  # returns {PsetName: {key: val}}
+        psets = type_cache.psets(el)  # returns {PsetName: {key: val}}
         result[global_id] = {
             "type": el.is_a(),
             "psets": psets
@@ -35,3 +91,78 @@ def flatten_psets(pset_data: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, A
                 row[key] = val
         flattened[gid] = row
     return flattened
+
+
+def iter_property_definitions(el) -> Iterator[Any]:
+    """Yield the property set definitions of an element like `get_psets` merges them: type first, occurrence last."""
+    if el.is_a("IfcTypeObject"):
+        yield from el.HasPropertySets or []
+        return
+
+    element_type = get_type(el)
+    if element_type is not None:
+        yield from element_type.HasPropertySets or []
+
+    yield from iter_occurrence_definitions(el)
+
+
+def iter_occurrence_definitions(el) -> Iterator[Any]:
+    """Yield only the property set definitions attached to the occurrence itself."""
+    for rel in getattr(el, "IsDefinedBy", None) or []:
+        if rel.is_a("IfcRelDefinesByProperties"):
+            definition = rel.RelatingPropertyDefinition
+            if definition.is_a("IfcPropertySetDefinitionSet"):
+                yield from definition.wrappedValue
+            else:
+                yield definition
+
+
+def read_selected_properties(definition, wanted: Dict[str, int], values: List[Any]) -> None:
+    """Resolve only the properties named in `wanted` (key → slot) of one pset/qto into `values`."""
+    ifc_class = definition.is_a()
+    if ifc_class == "IfcElementQuantity":
+        for quantity in definition.Quantities or []:
+            slot = wanted.get(quantity[0])
+            if slot is not None:
+                resolved = get_quantities([quantity])
+                if quantity[0] in resolved:
+                    values[slot] = resolved[quantity[0]]
+    elif ifc_class == "IfcPropertySet":
+        for prop in definition.HasProperties or []:
+            slot = wanted.get(prop[0])
+            if slot is not None:
+                resolved = get_properties([prop])
+                if prop[0] in resolved:
+                    values[slot] = resolved[prop[0]]
+    else:
+        for k, v in (get_property_definition(definition) or {}).items():
+            slot = wanted.get(k)
+            if slot is not None:
+                values[slot] = v
+
+    slot = wanted.get("id")
+    if slot is not None:
+        values[slot] = definition.id()
+
+
+def _read_definitions(definitions, wanted_psets: Dict[str, Dict[str, int]], values: List[Any]) -> None:
+    for definition in definitions:
+        wanted = wanted_psets.get(definition.Name)
+        if wanted:
+            read_selected_properties(definition, wanted, values)
+
+
+def read_selected_psets(el, selector, type_cache: Optional[TypePsetCache] = None) -> List[Any]:
+    """Slot-ordered values of the keys a `ClassSelector` references; psets without referenced keys are never resolved."""
+    if type_cache is None or el.is_a("IfcTypeObject"):
+        values = selector.empty_values()
+        _read_definitions(iter_property_definitions(el), selector.psets, values)
+        return values
+
+    element_type = get_type(el)
+    if element_type is not None:
+        values = list(type_cache.type_values(element_type, selector))
+    else:
+        values = selector.empty_values()
+    _read_definitions(iter_occurrence_definitions(el), selector.psets, values)
+    return values
@@ -0,0 +1,86 @@
+# 📁 ifc_processing/query_plan.py — Push the mapping's class and property footprint down into extraction
+
+from typing import Dict, Any, List, Optional, Iterator, Tuple, Union, Callable
+
+from ifc_processing.categorise_with_mapping import categorise_with_mapping
+from ifc_processing.compiled_mapping import CompiledMapping, compile_mapping
+from ifc_processing.pset_reader import TypePsetCache, PROGRESS_EVERY
+from ifc_processing.spatial_index import SpatialIndex, SPATIAL_PSET, build_spatial_index
+
+
+class ExtractionPlan:
+    """
+    What an extraction run has to touch:
+
+    - `classes`: IFC classes queried directly (None → every IfcElement)
+    - `compiled`: per-class selectors; only psets that hold a referenced key are resolved,
+      and within them only the referenced properties
+    - `needs_spatial`: whether any rule groups by a `Spatial.*` level, i.e. the spatial index is needed
+    """
+
+    def __init__(self, compiled: CompiledMapping, classes: Optional[List[str]]):
+        self.compiled = compiled
+        self.classes = classes
+        self.needs_spatial = any(SPATIAL_PSET in s.psets for s in compiled.selectors.values())
+
+    def footprint(self) -> Dict[str, Dict[str, List[str]]]:
+        """Class → pset → referenced property names (for display/debugging)."""
+        classes = self.classes if self.classes is not None else list(self.compiled.selectors)
+        return {
+            cls: {pset: sorted(keys) for pset, keys in self.compiled.selector(cls).psets.items()}
+            for cls in classes
+        }
+
+
+def plan_extraction(
+    mapping: Union[Dict[str, Any], CompiledMapping],
+    active_only: bool = True,
+    classes: Optional[List[str]] = None,
+) -> ExtractionPlan:
+    """
+    Build an `ExtractionPlan` from a mapping.
+    With `active_only`, only the classes that have rules are queried; otherwise all IfcElements are
+    visited (classes without rules still produce their count rows) but psets are still pruned.
+    An explicit `classes` list restricts the run to exactly those classes.
+    """
+    compiled = compile_mapping(mapping)
+    if classes is None:
+        classes = compiled.active_classes() if active_only else None
+    return ExtractionPlan(compiled, classes)
+
+
+def iter_plan_elements(ifc, plan: ExtractionPlan) -> Iterator[Any]:
+    if plan.classes is None:
+        yield from ifc.by_type("IfcElement")
+        return
+
+    for cls in plan.classes:
+        try:
+            yield from ifc.by_type(cls, include_subtypes=False)
+        except RuntimeError:
+            # Class not part of this model's schema
+            continue
+
+
+def execute_plan(
+    ifc,
+    plan: ExtractionPlan,
+    type_cache: Optional[TypePsetCache] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    spatial_index: Optional[SpatialIndex] = None,
+    elements: Optional[List[Any]] = None,
+) -> Iterator[Tuple[Any, str, Tuple[str, str, str], Dict[str, Any]]]:
+    """
+    Yield `(element, ifc_class, (gruppe, art, status), props)` for every element the plan covers,
+    or only for `elements` (e.g. a sample of them) if given.
+    The spatial index is built here only if the plan needs it and none was passed in.
+    """
+    type_cache = type_cache or TypePsetCache()
+    if spatial_index is None and plan.needs_spatial:
+        spatial_index = build_spatial_index(ifc)
+    elements = list(iter_plan_elements(ifc, plan)) if elements is None else elements
+    for i, el in enumerate(elements):
+        if progress and i % PROGRESS_EVERY == 0:
+            progress(i, len(elements))
+        cat, grp, props = categorise_with_mapping(el, plan.compiled, type_cache, spatial_index)
+        yield el, cat, grp, props
@@ -4,7 +4,7 @@ import streamlit as st
 def filter_existing(keys: List[str], default: List[str]) -> List[str]:
     return [v for v in default if v in keys]
 
-def render_rule_block(cls: str, all_keys: List[str], existing: Dict[str, Any], label2="Art", label3="Status") -> Dict[str, List[str]]:
+def render_rule_block(cls: str, all_keys: List[str], existing: Dict[str, Any], label2="Art", label3="Status") -> Dict[str, Any]:
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         group = st.multiselect("🔗 Gruppe", all_keys, default=filter_existing(all_keys, existing.get("group", [])), key=f"{cls}_group")
@@ -21,11 +21,14 @@ def render_rule_block(cls: str, all_keys: List[str], existing: Dict[str, Any], l
     with col6:
         ignore = st.multiselect("🚫 Ignorieren", all_keys, default=filter_existing(all_keys, existing.get("ignore", [])), key=f"{cls}_ignore")
 
+    material = st.checkbox("🧱 Nach Baustoff aufteilen", value=existing.get("material", False), key=f"{cls}_material")
+
     return {
         "group": group,
         "group2": art,
         "group3": status,
         "sum": summe,
         "text": text,
-        "ignore": ignore
+        "ignore": ignore,
+        "material": material
     }
@@ -0,0 +1,119 @@
+# 📁 ifc_processing/sampling.py — Stratified element samples, extrapolated group totals and their error bounds
+
+import random
+from typing import Dict, Any, List, Iterable
+
+import numpy as np
+import pandas as pd
+
+from ifc_processing.query_plan import ExtractionPlan, iter_plan_elements
+
+# Elements categorised per class for a quick preview; smaller classes are read completely
+SAMPLE_PER_CLASS = 200
+# Two-sided 95 % quantile of the normal distribution
+Z_95 = 1.96
+# Prefix of the error-bound column next to every extrapolated numeric column
+BOUND_PREFIX = "± "
+
+
+class ElementSample:
+    """
+    A stratified sample of an extraction plan's elements. The IFC classes are the strata: of
+    `population[cls]` elements, `sampled[cls]` were drawn without replacement, so each sampled
+    element stands for `weight(cls)` elements of its class.
+    """
+
+    def __init__(self, elements: List[Any], population: Dict[str, int], sampled: Dict[str, int]):
+        self.elements = elements
+        self.population = population
+        self.sampled = sampled
+
+    def weight(self, ifc_class: str) -> float:
+        return self.population[ifc_class] / self.sampled[ifc_class] if self.sampled.get(ifc_class) else 1.0
+
+    @property
+    def size(self) -> int:
+        return sum(self.sampled.values())
+
+    @property
+    def total(self) -> int:
+        return sum(self.population.values())
+
+
+def sample_elements(ifc, plan: ExtractionPlan, per_class: int = SAMPLE_PER_CLASS, seed: int = 0) -> ElementSample:
+    """Up to `per_class` elements of every class the plan covers, drawn reproducibly and kept in file order."""
+    by_class: Dict[str, List[Any]] = {}
+    for el in iter_plan_elements(ifc, plan):
+        by_class.setdefault(el.is_a(), []).append(el)
+
+    rng = random.Random(seed)
+    elements: List[Any] = []
+    population: Dict[str, int] = {}
+    sampled: Dict[str, int] = {}
+    for ifc_class, class_elements in by_class.items():
+        picked = class_elements if len(class_elements) <= per_class else rng.sample(class_elements, per_class)
+        elements.extend(sorted(picked, key=lambda el: el.id()))
+        population[ifc_class] = len(class_elements)
+        sampled[ifc_class] = len(picked)
+    return ElementSample(elements, population, sampled)
+
+
+def _numeric_mask(values: pd.Series) -> pd.Series:
+    return values.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool))
+
+
+def extrapolate_rows(df: pd.DataFrame, sample: ElementSample, never_convert_fields: Iterable[str] = ()) -> pd.DataFrame:
+    """Long rows with every numeric value scaled by its class weight, so group sums estimate the population totals."""
+    df = df.copy()
+    mask = _numeric_mask(df["Wert"]) & ~df["Eigenschaft"].isin(set(never_convert_fields))
+    weights = df.loc[mask, "OriginalClass"].map(sample.weight)
+    df.loc[mask, "Wert"] = df.loc[mask, "Wert"].astype(float) * weights
+    return df
+
+
+def variance_rows(df: pd.DataFrame, sample: ElementSample, group_cols: List[str]) -> pd.DataFrame:
+    """
+    Long rows `± <field>` holding the variance of every extrapolated group total, computed from the
+    unscaled long rows of the sample. Aggregated like any summed field, they add up the variances
+    of all classes in a group; `apply_error_bounds` turns the sums into bounds.
+
+    Per class, each sampled element contributes its value to a group total (0 if it is not in the
+    group). The estimate N · mean has the variance N² · (1 − n/N) · s² / n, which is 0 for classes
+    read completely.
+    """
+    numeric = df[_numeric_mask(df["Wert"])]
+    if numeric.empty:
+        return df.iloc[0:0]
+
+    keys = ["OriginalClass"] + group_cols + ["Eigenschaft"]
+    per_element = numeric.assign(Wert=numeric["Wert"].astype(float)).groupby(keys + ["GlobalId"], dropna=False)["Wert"].sum()
+    stats = per_element.groupby(level=keys, dropna=False).agg(["sum", lambda s: (s ** 2).sum()])
+    stats.columns = ["s1", "s2"]
+    stats = stats.reset_index()
+
+    n = stats["OriginalClass"].map(sample.sampled).astype(float)
+    big_n = stats["OriginalClass"].map(sample.population).astype(float)
+    mean = stats["s1"] / n
+    s_sq = ((stats["s2"] - n * mean ** 2) / (n - 1).where(n > 1)).fillna(0).clip(lower=0)
+    stats["Wert"] = big_n ** 2 * (1 - n / big_n) * s_sq / n
+
+    # Named like the aggregated table's columns ('LL AM.Höhe' → '± Höhe')
+    stats["Eigenschaft"] = BOUND_PREFIX + stats["Eigenschaft"].str.split(".").str[-1]
+    return stats.drop(columns=["s1", "s2"]).assign(GlobalId="")
+
+
+def apply_error_bounds(df_final: pd.DataFrame) -> pd.DataFrame:
+    """
+    Summed variances → 95 % bounds, each placed right after its column. Bounds of columns the
+    aggregation dropped (group keys) are removed.
+    """
+    columns = []
+    for col in df_final.columns:
+        if col.startswith(BOUND_PREFIX):
+            continue
+        columns.append(col)
+        bound = BOUND_PREFIX + col
+        if bound in df_final.columns:
+            df_final[bound] = np.sqrt(pd.to_numeric(df_final[bound], errors="coerce").fillna(0).clip(lower=0)) * Z_95
+            columns.append(bound)
+    return df_final[columns]
@@ -0,0 +1,103 @@
+# 📁 ifc_processing/schema.py — Per (class, key) value types inferred once after extraction
+
+from typing import Dict, Any, Optional, Tuple
+
+from ifc_processing.property_store import PropertyStore
+from ifc_processing.spatial_index import SPATIAL_PSET
+from ifc_processing.units import sample_measures
+
+NUMERIC = "numeric"
+TEXT = "text"
+
+_INT, _FLOAT, _BOOL, _EMPTY, _TEXT = "int", "float", "bool", "empty", "text"
+
+
+def parse_number(value) -> Optional[float]:
+    """The number a value stands for the way the extraction reads it (numbers, "12", "-1,5"); None otherwise."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    s = str(value).replace(",", ".").strip()
+    if s.lstrip("-").replace(".", "", 1).isdigit():
+        return float(s)
+    return None
+
+
+def classify_value(value) -> str:
+    if isinstance(value, bool):
+        return _BOOL
+    number = parse_number(value)
+    if number is None:
+        return _EMPTY if str(value).strip() == "" else _TEXT
+    return _INT if number.is_integer() else _FLOAT
+
+
+class ColumnInfo:
+    """
+    Inferred type of one (class, "Pset.Key") column:
+
+    - `numeric_ratio`: share of the present values that read as numbers
+    - `is_int`: all numeric values are integral
+    - `ambiguous`: some values are booleans or empty strings, which pandas may still read as numbers
+    - `measure` / `unit_type` / `unit`: IFC measure class (e.g. "IfcVolumeMeasure"), its unit type and
+      the property's own unit, from a sample of the model (None if not seen or not a measure)
+    """
+
+    __slots__ = ("present", "numeric_ratio", "is_int", "ambiguous", "measure", "unit_type", "unit")
+
+    def __init__(self, counts: Dict[str, int]):
+        self.present = sum(counts.values())
+        numeric = counts.get(_INT, 0) + counts.get(_FLOAT, 0)
+        self.numeric_ratio = numeric / self.present if self.present else 0.0
+        self.is_int = numeric > 0 and not counts.get(_FLOAT)
+        self.ambiguous = bool(counts.get(_BOOL) or counts.get(_EMPTY))
+        self.measure: Optional[str] = None
+        self.unit_type: Optional[str] = None
+        self.unit: Any = None
+
+    @property
+    def kind(self) -> Optional[str]:
+        """NUMERIC / TEXT if every value agrees, None for mixed or ambiguous columns."""
+        if self.numeric_ratio == 1.0:
+            return NUMERIC
+        if self.numeric_ratio == 0.0 and not self.ambiguous:
+            return TEXT
+        return None
+
+
+class ModelSchema:
+    """(class, "Pset.Key") → `ColumnInfo` for one extracted model, read by the row, unit and aggregation stages."""
+
+    def __init__(self, columns: Dict[Tuple[str, str], ColumnInfo]):
+        self.columns = columns
+
+    @classmethod
+    def from_store(cls, store: PropertyStore, ifc=None) -> "ModelSchema":
+        """One pass over the store's columns; with the model, also the measure types of a sample of elements."""
+        columns = {
+            (ifc_class, key): ColumnInfo(store.profile(ifc_class, key, classify_value))
+            for ifc_class in store.classes()
+            for key in store.keys_for_class(ifc_class)
+        }
+        if ifc is not None:
+            wanted = {
+                ifc_class: [key for key in store.keys_for_class(ifc_class) if not key.startswith(SPATIAL_PSET + ".")]
+                for ifc_class in store.classes()
+            }
+            for column, (unit_type, unit, measure) in sample_measures(ifc, wanted).items():
+                info = columns[column]
+                info.unit_type, info.unit, info.measure = unit_type, unit, measure
+        return cls(columns)
+
+    def info(self, ifc_class: str, key: str) -> Optional[ColumnInfo]:
+        return self.columns.get((ifc_class, key))
+
+    def kind(self, ifc_class: str, key: str) -> Optional[str]:
+        """NUMERIC / TEXT for columns of a single type, None for mixed or unknown ones (callers fall back to parsing)."""
+        info = self.columns.get((ifc_class, key))
+        return info.kind if info is not None else None
+
+
+def build_schema(store: PropertyStore, ifc=None) -> ModelSchema:
+    return ModelSchema.from_store(store, ifc)
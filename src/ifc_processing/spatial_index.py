@@ -0,0 +1,117 @@
+# 📁 ifc_processing/spatial_index.py — Element → spatial path index built in one pass over the relationships
+
+from typing import Dict, Any, List, Tuple
+
+# Pseudo property set under which the spatial levels are offered as grouping keys ("Spatial.Storey", ...)
+SPATIAL_PSET = "Spatial"
+
+_LEVEL_NAMES = {
+    "IfcSite": "Site",
+    "IfcBuilding": "Building",
+    "IfcBuildingStorey": "Storey",
+    "IfcSpace": "Space",
+}
+
+
+def _level_name(ifc_class: str) -> str:
+    return _LEVEL_NAMES.get(ifc_class, ifc_class[3:] if ifc_class.startswith("Ifc") else ifc_class)
+
+
+class SpatialIndex:
+    """
+    Maps every contained element to its full spatial path (Site → Building → Storey → Space …).
+
+    Built from one pass over `IfcRelAggregates`, `IfcRelContainedInSpatialStructure` and the zone
+    assignments; element parts without own containment inherit the path of their aggregate.
+    """
+
+    def __init__(self):
+        self._parent: Dict[int, Any] = {}
+        self._container: Dict[int, Any] = {}
+        self._zones: Dict[int, List[str]] = {}
+        self._paths: Dict[int, Tuple[Any, ...]] = {}
+        self._levels: Dict[int, Dict[str, str]] = {}
+        self.level_keys: List[str] = []
+
+    @classmethod
+    def from_model(cls, ifc) -> "SpatialIndex":
+        index = cls()
+
+        for rel in ifc.by_type("IfcRelAggregates"):
+            for child in rel.RelatedObjects or []:
+                index._parent[child.id()] = rel.RelatingObject
+
+        for rel in ifc.by_type("IfcRelContainedInSpatialStructure"):
+            for el in rel.RelatedElements or []:
+                index._container[el.id()] = rel.RelatingStructure
+
+        for rel in ifc.by_type("IfcRelAssignsToGroup"):
+            group = rel.RelatingGroup
+            if group is not None and group.is_a("IfcZone"):
+                for obj in rel.RelatedObjects or []:
+                    index._zones.setdefault(obj.id(), []).append(group.Name or "")
+
+        levels = {_level_name(s.is_a()) for s in ifc.by_type("IfcSpatialStructureElement")}
+        if index._zones:
+            levels.add("Zone")
+        order = list(_LEVEL_NAMES.values())
+        index.level_keys = [
+            f"{SPATIAL_PSET}.{name}" for name in sorted(levels, key=lambda n: (order.index(n) if n in order else len(order), n))
+        ] + [f"{SPATIAL_PSET}.Path"]
+        return index
+
+    def _spatial_path(self, spatial) -> Tuple[Any, ...]:
+        key = spatial.id()
+        path = self._paths.get(key)
+        if path is None:
+            parent = self._parent.get(key)
+            head = self._spatial_path(parent) if parent is not None and not parent.is_a("IfcProject") else ()
+            path = self._paths[key] = head + (spatial,)
+        return path
+
+    def path(self, el) -> Tuple[Any, ...]:
+        """Spatial elements from the outermost one down to the element's container."""
+        seen = set()
+        current = el
+        while current is not None and current.id() not in seen:
+            seen.add(current.id())
+            container = self._container.get(current.id())
+            if container is not None:
+                return self._spatial_path(container)
+            current = self._parent.get(current.id())
+        return ()
+
+    def levels(self, el) -> Dict[str, str]:
+        """Level name → spatial element name (e.g. {"Storey": "EG", "Path": "Site / B1 / EG"})."""
+        key = el.id()
+        levels = self._levels.get(key)
+        if levels is None:
+            path = self.path(el)
+            levels = {_level_name(s.is_a()): s.Name or "" for s in path}
+            zones = [z for obj_id in (key, *(s.id() for s in path)) for z in self._zones.get(obj_id, [])]
+            if zones:
+                levels["Zone"] = " / ".join(dict.fromkeys(zones))
+            levels["Path"] = " / ".join(s.Name or "" for s in path)
+            self._levels[key] = levels
+        return levels
+
+    def fill(self, el, wanted: Dict[str, int], values: List[Any]) -> None:
+        """Write the requested levels (key → slot) of one element into a selector's slot values."""
+        levels = self.levels(el)
+        for key, slot in wanted.items():
+            if key in levels:
+                values[slot] = levels[key]
+
+
+def build_spatial_index(ifc) -> SpatialIndex:
+    return SpatialIndex.from_model(ifc)
+
+
+def attach_spatial_psets(ifc, pset_data: Dict[str, Dict[str, Any]], index: SpatialIndex) -> Dict[str, Dict[str, Any]]:
+    """Add the spatial levels of each element as pseudo pset to `read_psets_from_model` output (in place)."""
+    for gid, entry in pset_data.items():
+        levels = index.levels(ifc.by_guid(gid))
+        if levels["Path"]:
+            # New outer dict: the pset dicts may be shared type psets from the TypePsetCache
+            entry["psets"] = {**entry["psets"], SPATIAL_PSET: levels}
+    return pset_data
@@ -1,6 +1,11 @@
 import pandas as pd
 from typing import Dict, Any
 from collections import OrderedDict
+from ifc_processing.material_index import MATERIAL_COL
+from ifc_processing.schema import NUMERIC, TEXT
+
+# Source model of each row when several models are aggregated as one (see tools/federation.py)
+SOURCE_COL = "Modell"
 
 def ordered_text_join_debug(x, label=None):
     values = [str(v).strip() for v in x if str(v).strip()]
@@ -8,14 +13,15 @@ def ordered_text_join_debug(x, label=None):
     #print(f"[DEBUG] Group: {label or ''} -> Ordered Join: {joined} from values: {values}")
     return joined
 
-def aggregate_by_mapping_per_class(df: pd.DataFrame, mapping: Dict[str, Any]) -> pd.DataFrame:
+def aggregate_by_mapping_per_class(df: pd.DataFrame, mapping: Dict[str, Any], schema=None) -> pd.DataFrame:
     grouped_dfs = []
+    # Material breakdown (split_by_material) and federated models add one more grouping dimension each
+    group_cols = ["Kategorie", "Gruppe", "Art", "Status"] + [col for col in (MATERIAL_COL, SOURCE_COL) if col in df.columns]
 
     for ifc_class in df["OriginalClass"].unique():
         print(f"\n[DEBUG] Processing class: {ifc_class}")
         class_df = df[df["OriginalClass"] == ifc_class].copy()
         rules = mapping.get("rules", {}).get(ifc_class, {})
-        group_cols = ["Kategorie", "Gruppe", "Art", "Status"]
 
         explicit_text_fields = set(rules.get("text", []))
         explicit_sum_fields = set(rules.get("sum", []))
@@ -32,6 +38,14 @@ def aggregate_by_mapping_per_class(df: pd.DataFrame, mapping: Dict[str, Any]) ->
         #print(f"[DEBUG] Undefined Fields: {undefined_fields}")
 
         for field in undefined_fields:
+            # The model schema already knows the type of extracted columns; only unknown or mixed ones are parsed
+            kind = schema.kind(ifc_class, field) if schema is not None else None
+            if kind == NUMERIC:
+                sum_fields.add(field)
+                continue
+            if kind == TEXT:
+                text_fields.add(field)
+                continue
             try:
                 pd.to_numeric(class_df[class_df["Eigenschaft"] == field]["Wert"], errors="raise")
                 sum_fields.add(field)
@@ -43,7 +57,8 @@ def aggregate_by_mapping_per_class(df: pd.DataFrame, mapping: Dict[str, Any]) ->
 
         result_df = class_df[group_cols].drop_duplicates().reset_index(drop=True)
 
-        for field in sum_fields:
+        # Sorted, so the column order is the same in every process (set order depends on the string hash seed)
+        for field in sorted(sum_fields):
             numeric_agg = (
                 class_df[class_df["Eigenschaft"] == field]
                 .groupby(group_cols)["Wert"]
@@ -53,7 +68,7 @@ def aggregate_by_mapping_per_class(df: pd.DataFrame, mapping: Dict[str, Any]) ->
             )
             result_df = result_df.merge(numeric_agg.fillna(0), on=group_cols, how="left")
 
-        for field in text_fields:
+        for field in sorted(text_fields):
             field_df = class_df[class_df["Eigenschaft"] == field]
             text_agg = (
                 field_df.groupby(group_cols)["Wert"]
@@ -73,26 +88,30 @@ def aggregate_by_mapping_per_class(df: pd.DataFrame, mapping: Dict[str, Any]) ->
     # Rename columns like 'LL AM.Höhe' → 'Höhe'
     rename_map = {
         col: col.split(".")[-1] for col in df_final.columns
-        if "." in col and col not in ["Kategorie", "Gruppe", "Art", "Status"]
+        if "." in col and col not in group_cols
     }
     df_final = df_final.rename(columns=rename_map)
 
     for col in df_final.columns:
-        if col in ["Kategorie", "Gruppe", "Art", "Status"]:
+        if col in group_cols:
             continue
         if col in text_fields:
             df_final[col] = df_final[col].fillna("").astype(str)
         else:
             df_final[col] = df_final[col].fillna(0)
+    df_final.drop(columns=[col for col in dropped_group_columns(mapping) if col in df_final.columns], inplace=True)
+
+    return df_final
+
+
+def dropped_group_columns(mapping: Dict[str, Any]) -> set:
+    """Columns `aggregate_by_mapping_per_class` removes: the short names of the mapping's group keys."""
     group_keys = set()
     for rule in mapping["rules"].values():
         group_keys.update(rule.get("group", []))
         group_keys.update(rule.get("group2", []))
         group_keys.update(rule.get("group3", []))
-
-    df_final.drop(columns=[col.split(".")[-1] for col in group_keys if col.split(".")[-1] in df_final.columns], inplace=True)
-
-    return df_final
+    return {col.split(".")[-1] for col in group_keys} - {MATERIAL_COL}
 
 
 def simplify_text_fields(df: pd.DataFrame, mapping: Dict[str, Any]) -> pd.DataFrame:
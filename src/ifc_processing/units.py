@@ -0,0 +1,172 @@
+# 📁 ifc_processing/units.py — Convert summed quantities from the project's IfcUnitAssignment to target units
+
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+import pandas as pd
+from ifcopenshell.util.unit import calculate_unit_scale, get_measure_unit_type, get_prefix_multiplier
+
+try:
+    from ifcopenshell.util.unit import get_unit_scale
+except ImportError:  # ifcopenshell < 0.9
+    def get_unit_scale(unit) -> float:
+        """Scale from `unit` to SI: SI prefixes, conversion-based unit chains and derived units."""
+        if unit.is_a("IfcDerivedUnit"):
+            scale = 1.0
+            for element in unit.Elements:
+                scale *= get_unit_scale(element.Unit) ** element.Exponent
+            return scale
+        scale = 1.0
+        while unit.is_a("IfcConversionBasedUnit"):
+            scale *= unit.ConversionFactor.ValueComponent.wrappedValue
+            unit = unit.ConversionFactor.UnitComponent
+        if unit.is_a("IfcSIUnit"):
+            scale *= get_prefix_multiplier(unit.Prefix)
+        return scale
+
+from ifc_processing.compiled_mapping import CompiledMapping, compile_mapping
+from ifc_processing.pset_reader import iter_property_definitions
+
+# Supported target units per IFC unit type, as scale to the SI base unit
+TARGET_SCALES: Dict[str, Dict[str, float]] = {
+    "LENGTHUNIT": {"m": 1.0, "cm": 0.01, "mm": 0.001, "km": 1000.0},
+    "AREAUNIT": {"m2": 1.0, "cm2": 1e-4, "mm2": 1e-6, "ha": 1e4, "km2": 1e6},
+    "VOLUMEUNIT": {"m3": 1.0, "l": 1e-3, "cm3": 1e-6, "mm3": 1e-9},
+    "MASSUNIT": {"kg": 1.0, "g": 1e-3, "t": 1000.0},
+}
+
+DEFAULT_UNITS = {"LENGTHUNIT": "m", "AREAUNIT": "m2", "VOLUMEUNIT": "m3", "MASSUNIT": "kg"}
+
+_QUANTITY_UNIT_TYPES = {
+    "IfcQuantityLength": "LENGTHUNIT",
+    "IfcQuantityArea": "AREAUNIT",
+    "IfcQuantityVolume": "VOLUMEUNIT",
+    "IfcQuantityWeight": "MASSUNIT",
+}
+
+# Elements inspected per class to find the measure type of every summed key
+SAMPLE_LIMIT = 200
+
+
+def target_units(mapping: Dict[str, Any]) -> Dict[str, str]:
+    """Target unit per unit type: the mapping's `"units"` section over the SI defaults."""
+    units = {**DEFAULT_UNITS, **mapping.get("units", {})}
+    for unit_type, symbol in units.items():
+        if symbol not in TARGET_SCALES.get(unit_type, {}):
+            raise ValueError(f"Unsupported target unit {symbol!r} for {unit_type}")
+    return units
+
+
+def _measure_of(prop) -> Optional[Tuple[Optional[str], Any, str]]:
+    """
+    (unit type or None, explicit unit or None, measure class) of a quantity / single value property,
+    e.g. ("LENGTHUNIT", None, "IfcLengthMeasure") or (None, None, "IfcLabel"); None if it has no value type.
+    """
+    ifc_class = prop.is_a()
+    if ifc_class in _QUANTITY_UNIT_TYPES:
+        return _QUANTITY_UNIT_TYPES[ifc_class], prop.Unit, ifc_class
+    if ifc_class == "IfcPropertySingleValue" and prop.NominalValue is not None:
+        measure = prop.NominalValue.is_a()
+        try:
+            unit_type = get_measure_unit_type(measure)
+        except Exception:
+            unit_type = None
+        return unit_type, prop.Unit, measure
+    return None
+
+
+def _properties(definition):
+    if definition.is_a("IfcElementQuantity"):
+        return definition.Quantities or []
+    if definition.is_a("IfcPropertySet"):
+        return definition.HasProperties or []
+    return []
+
+
+def sample_measures(ifc, wanted: Dict[str, Iterable[str]]) -> Dict[Tuple[str, str], Tuple[Optional[str], Any, str]]:
+    """
+    (class, "Pset.Key") → `_measure_of` result for the wanted keys of each class.
+    Each class is sampled only until all of its wanted keys were seen once.
+    """
+    found: Dict[Tuple[str, str], Tuple[Optional[str], Any, str]] = {}
+    for ifc_class, keys in wanted.items():
+        missing = set(keys)
+        if not missing:
+            continue
+        try:
+            elements = ifc.by_type(ifc_class, include_subtypes=False)
+        except RuntimeError:
+            continue
+        for el in elements[:SAMPLE_LIMIT]:
+            for definition in iter_property_definitions(el):
+                for prop in _properties(definition):
+                    key = f"{definition.Name}.{prop.Name}"
+                    if key not in missing:
+                        continue
+                    measure = _measure_of(prop)
+                    if measure is not None:
+                        found[(ifc_class, key)] = measure
+                    missing.discard(key)
+            if not missing:
+                break
+    return found
+
+
+def measure_types(ifc, compiled: CompiledMapping, schema=None) -> Dict[Tuple[str, str], Tuple[str, Any]]:
+    """
+    (class, "Pset.Key") → (unit type, explicit unit) for the summed keys of every class in the mapping.
+    Read from the model's `ModelSchema` if given, otherwise sampled from the model.
+    """
+    if schema is not None:
+        measures = {
+            (ifc_class, key): (info.unit_type, info.unit, info.measure)
+            for ifc_class, selector in compiled.selectors.items()
+            for key in selector.sum_fields
+            for info in [schema.info(ifc_class, key)] if info is not None and info.measure
+        }
+    else:
+        measures = sample_measures(ifc, {cls: s.sum_fields for cls, s in compiled.selectors.items()})
+    return {key: (unit_type, unit) for key, (unit_type, unit, _) in measures.items() if unit_type is not None}
+
+
+def unit_factors(ifc, mapping: Dict[str, Any], schema=None) -> Dict[Tuple[str, str], float]:
+    """(class, "Pset.Key") → factor from the stored value to the mapping's target unit (only factors ≠ 1)."""
+    units = target_units(mapping)
+    project_scales: Dict[str, float] = {}
+    factors: Dict[Tuple[str, str], float] = {}
+
+    for key, (unit_type, unit) in measure_types(ifc, compile_mapping(mapping), schema).items():
+        if unit_type not in units:
+            continue
+        if unit is not None:
+            source = get_unit_scale(unit)
+        else:
+            if unit_type not in project_scales:
+                project_scales[unit_type] = calculate_unit_scale(ifc, unit_type)
+            source = project_scales[unit_type]
+        factor = source / TARGET_SCALES[unit_type][units[unit_type]]
+        if factor != 1.0:
+            factors[key] = factor
+    return factors
+
+
+def convert_units(
+    df: pd.DataFrame,
+    ifc,
+    mapping: Dict[str, Any],
+    factors: Optional[Dict[Tuple[str, str], float]] = None,
+) -> pd.DataFrame:
+    """Scale the numeric `Wert` of every (OriginalClass, Eigenschaft) pair with a unit factor in one multiply."""
+    if df.empty:
+        return df
+    factors = unit_factors(ifc, mapping) if factors is None else factors
+    if not factors:
+        return df
+
+    table = pd.Series(list(factors.values()), index=pd.MultiIndex.from_tuples(list(factors), names=["OriginalClass", "Eigenschaft"]))
+    scale = table.reindex(pd.MultiIndex.from_frame(df[["OriginalClass", "Eigenschaft"]])).to_numpy()
+    values = pd.to_numeric(df["Wert"], errors="coerce").to_numpy()
+    mask = ~pd.isna(scale) & ~pd.isna(values)
+
+    df["Wert"] = df["Wert"].astype(object)
+    df.loc[mask, "Wert"] = values[mask] * scale[mask]
+    return df
@@ -0,0 +1,83 @@
+# 📁 job_ui.py — Streamlit glue for background jobs (submit, poll, cancel, hand off)
+
+import os
+import uuid
+from typing import Optional
+
+import streamlit as st
+
+from tools.jobs import JobRunner, Job, DONE, FAILED, CANCELLED
+from translations import translations
+
+
+@st.cache_resource
+def get_job_runner() -> JobRunner:
+    # Shared by all sessions; each session runs at most two jobs at once, the rest wait their turn
+    return JobRunner(max_workers=max(4, os.cpu_count() or 1), per_group=2)
+
+
+def _session_prefix() -> str:
+    if "session_id" not in st.session_state:
+        st.session_state["session_id"] = uuid.uuid4().hex
+    return st.session_state["session_id"] + ":"
+
+
+def run_job(name: str, key: str, fn, *args, **kwargs) -> Job:
+    """
+    Submit `fn(job, ...)` once per (session, name, key) and return the job on every rerun.
+    A session keeps one job per name: a new key (e.g. a changed mapping) replaces the previous job.
+    """
+    prefix = _session_prefix()
+    return get_job_runner().submit(f"{prefix}{name}:{key}", name, fn, *args, group=prefix, slot=prefix + name, **kwargs)
+
+
+def find_job(name: str, key: str) -> Optional[Job]:
+    """The session's job for (name, key) if one was submitted, without starting it."""
+    return get_job_runner().get(f"{_session_prefix()}{name}:{key}")
+
+
+def cancel_session_jobs() -> None:
+    get_job_runner().discard_prefix(_session_prefix())
+
+
+def render_job_status(job: Job) -> None:
+    """Show progress and a cancel button; polls in a fragment and reruns the app when the job finishes."""
+    t = translations[st.session_state.get("lang", "en")]
+
+    @st.fragment(run_every=0.5)
+    def _poll():
+        if job.done:
+            st.rerun()
+        label = f"{job.name}: {job.stage}" if job.stage else job.name
+        st.progress(job.progress, text=f"⏳ {label}")
+        for part, progress in list(job.parts.items()):
+            st.progress(progress, text=("✅ " if progress >= 1.0 else "⏳ ") + part)
+        if st.button("✖ " + t.get("job_cancel", "Cancel"), key=f"cancel_{job.id}"):
+            job.cancel()
+            st.rerun()
+
+    _poll()
+
+
+def job_ready(job: Job) -> bool:
+    """Render the state of a job (progress, error or cancel notice) and report whether its result is ready."""
+    t = translations[st.session_state.get("lang", "en")]
+
+    if job.status == DONE:
+        return True
+    if job.status == FAILED:
+        st.error("❌ " + t.get("job_failed", "Job failed") + f": {job.name}")
+        st.code(job.error or "")
+    elif job.status == CANCELLED:
+        st.info("ℹ️ " + t.get("job_cancelled", "Job cancelled") + f": {job.name}")
+    else:
+        render_job_status(job)
+    return False
+
+
+def is_new_result(job: Job, handoff_key: str) -> bool:
+    """True the first time a finished job's result is seen for `handoff_key`."""
+    if st.session_state.get(handoff_key) == job.id:
+        return False
+    st.session_state[handoff_key] = job.id
+    return True
@@ -1,13 +1,113 @@
 import streamlit as st
-import pandas as pd
-from ifc_processing.categorise_with_mapping import categorise_with_mapping
-from ifc_processing.aggregate_rows_custom import _make_row
-from ifc_processing.transform import (
-    aggregate_by_mapping_per_class,
-    simplify_text_fields,
-    format_display,
-)
+from ifc_processing.compiled_mapping import compile_mapping
+from tools.ifchelper import mapping_hash
+from tools.snapshots import SnapshotStore, snapshot_key
 from translations import translations
+from job_ui import run_job, job_ready, render_job_status, find_job
+from tools.jobs import DONE, using_models
+
+# The pipeline below imports pandas / ifcopenshell when it first runs, so drawing the tab stays cheap
+
+def _count_labels(t):
+    """Internal → display names of the count column and its error bound."""
+    from ifc_processing.sampling import BOUND_PREFIX
+    from tools.core import COUNT
+
+    count_label = t.get("Stückzahl", "Count")
+    return {COUNT: count_label, BOUND_PREFIX + COUNT: BOUND_PREFIX + count_label}
+
+def build_preview_table(ifc_model, mapping, t, progress=None, spatial_index=None, material_index=None, schema=None):
+    """Extract, aggregate and label the preview table for a mapping; None if nothing matched. `schema` types the values."""
+    from tools.core import ExtractedModel, AggregateOptions, aggregate
+
+    model = ExtractedModel(ifc_model, schema=schema, spatial_index=spatial_index, material_index=material_index)
+    df_final = aggregate(model, mapping, AggregateOptions(progress=progress))
+    if df_final.empty:
+        return None
+    return _finish_preview_table(df_final.rename(columns=_count_labels(t)), mapping, t)
+
+def build_preview_estimate(ifc_model, mapping, t, progress=None, spatial_index=None, material_index=None, schema=None, per_class=None):
+    """
+    The preview table estimated from a stratified sample of each class: numeric columns are
+    extrapolated to the class sizes and get a `± …` column with their 95 % error bound.
+    Returns (table, sample), or None if nothing matched.
+    """
+    from ifc_processing.sampling import SAMPLE_PER_CLASS
+    from tools.core import ExtractedModel, AggregateOptions, aggregate
+
+    model = ExtractedModel(ifc_model, schema=schema, spatial_index=spatial_index, material_index=material_index)
+    df_final = aggregate(model, mapping, AggregateOptions(progress=progress, sample_per_class=per_class or SAMPLE_PER_CLASS))
+    if df_final.empty:
+        return None
+    sample = df_final.attrs.pop("sample")
+    return _finish_preview_table(df_final.rename(columns=_count_labels(t)), mapping, t), sample
+
+def build_preview_table_sql(ifc_model, property_store, model_key, mapping, t, schema=None):
+    """Same table as `build_preview_table`, with the mapping compiled into one SQL GROUP BY over the model's SQL table."""
+    from ifc_processing.units import unit_factors
+    from tools.sql_backend import ensure_sql_db, aggregate_sql
+
+    db_path = ensure_sql_db(property_store, model_key)
+    df_final = aggregate_sql(db_path, mapping, unit_factors(ifc_model, mapping, schema))
+    if df_final.empty:
+        return None
+    return _finish_preview_table(df_final, mapping, t)
+
+def _finish_preview_table(df_final, mapping, t):
+    import pandas as pd
+    from ifc_processing.material_index import MATERIAL_COL
+
+    count_label = t.get("Stückzahl", "Count")
+
+    for col in ["Status", "Art", MATERIAL_COL]:
+        is_used = any(col in rules.get("text", []) or col in rules.get("sum", []) for rules in mapping["rules"].values())
+        if col in df_final.columns and not is_used:
+            if df_final[col].replace("", pd.NA).isna().all():
+                df_final.drop(columns=[col], inplace=True)
+
+    for col in df_final.select_dtypes(include="object").columns:
+        df_final[col] = df_final[col].astype(str)
+
+    if count_label in df_final.columns:
+        df_final[count_label] = pd.to_numeric(df_final[count_label], errors="coerce").fillna(0).astype("Int64")
+
+    df_final.fillna("", inplace=True)
+    df_final.rename(columns={
+        "Kategorie": t.get("Kategorie", "Category"),
+        "Gruppe": t.get("Gruppe", "Group"),
+        "Art": t.get("Art", "Type"),
+        "Status": t.get("Status", "Status"),
+        MATERIAL_COL: t.get(MATERIAL_COL, "Material"),
+        "Stückzahl": count_label
+    }, inplace=True)
+    return df_final
+
+def _preview_job(job, ifc_model, mapping, t, spatial_index=None, material_index=None, sql_source=None, schema=None, snapshot=None):
+    def build():
+        with using_models(job, ifc_model):
+            # The SQL table has no per-element material rows, material breakdowns always use the pandas path
+            if sql_source is not None and not any(r.get("material") for r in mapping["rules"].values()):
+                job.report("🗄️ SQL", 0.5)
+                return build_preview_table_sql(ifc_model, *sql_source, mapping, t, schema)
+            return build_preview_table(ifc_model, mapping, t, progress=job.progress_callback("📊 " + t.get("job_aggregate", "Aggregating …")), spatial_index=spatial_index, material_index=material_index, schema=schema)
+
+    if snapshot is None:
+        return build()
+    return SnapshotStore().fetch(snapshot, build, source="ui")[0]
+
+def _estimate_job(job, ifc_model, mapping, t, spatial_index=None, material_index=None, schema=None):
+    with using_models(job, ifc_model):
+        return build_preview_estimate(ifc_model, mapping, t, progress=job.progress_callback("🎲 " + t.get("preview_quick_job", "Quick preview")), spatial_index=spatial_index, material_index=material_index, schema=schema)
+
+def _format_style(t) -> str:
+    # 🔘 Format toggle UI
+    format_style = st.radio(
+        t.get("number_format_label", "Choose number format:"),
+        options=["🇩🇪 Deutsch (1.234,56)", "🇬🇧 English (1,234.56)"],
+        index=0,
+        horizontal=True,
+    )
+    return "de" if "Deutsch" in format_style else "en"
 
 def render_preview_tab():
     lang = st.session_state.get("lang", "en")
@@ -27,87 +127,60 @@ def render_preview_tab():
         "rules": {
             cls: class_rules.get(cls, {"text": [], "sum": []}) for cls in active_classes
         },
+        "units": st.session_state.get("loaded_mapping", {}).get("units", {}),
     }
-
-    never_convert_fields = set()
-    for cls, rules in mapping["rules"].items():
-        never_convert_fields.update(rules.get("text", []))
-        never_convert_fields.update(rules.get("group", []))
-        never_convert_fields.update(rules.get("group2", []))
-        never_convert_fields.update(rules.get("group3", []))
-        never_convert_fields.update(rules.get("ignore", []))
+    never_convert_fields = compile_mapping(mapping).never_convert_fields
 
     st.session_state["final_mapping"] = mapping
 
-    preview_rows = []
-    seen_ids = set()
-    for el in ifc_model.by_type("IfcElement"):
-        if el.id() in seen_ids:
-            continue
-        seen_ids.add(el.id())
-        if el.is_a() not in active_classes:
-            continue
-
-        original_cat, grp, props = categorise_with_mapping(el, mapping)
-        cat = mapping["categories"].get(el.is_a(), original_cat)
-
-        if grp and len(grp) == 3:
-            group_label, art, status = grp
-        else:
-            group_label, art, status = "", "", ""
-
-        cat_label = t.get("Kategorie", "Category")
-        group_label_name = t.get("Gruppe", "Group")
-        art_label = t.get("Art", "Type")
-        status_label = t.get("Status", "Status")
-        count_label = t.get("Stückzahl", "Count")
-
-        for k, v in props.items():
-            if k in never_convert_fields:
-                v = str(v)
-            preview_rows.append(_make_row(cat, group_label, art, status, k, v, never_convert_fields) | {"OriginalClass": el.is_a()})
-
-        preview_rows.append(_make_row(cat, group_label, art, status, count_label, 1, never_convert_fields) | {"OriginalClass": el.is_a()})
-
-    if preview_rows:
-        df = pd.DataFrame(preview_rows)
-        df_final = aggregate_by_mapping_per_class(df, mapping)
-        df_final = simplify_text_fields(df_final, mapping)
-
-        for col in ["Status", "Art"]:
-            is_used = any(col in rules.get("text", []) or col in rules.get("sum", []) for rules in mapping["rules"].values())
-            if col in df_final.columns and not is_used:
-                if df_final[col].replace("", pd.NA).isna().all():
-                    df_final.drop(columns=[col], inplace=True)
-
-        for col in df_final.select_dtypes(include="object").columns:
-            df_final[col] = df_final[col].astype(str)
-
-        if count_label in df_final.columns:
-            df_final[count_label] = pd.to_numeric(df_final[count_label], errors="coerce").fillna(0).astype("Int64")
-
-        df_final.fillna("", inplace=True)
-        df_final.rename(columns={
-            "Kategorie": t.get("Kategorie", "Category"),
-            "Gruppe": t.get("Gruppe", "Group"),
-            "Art": t.get("Art", "Type"),
-            "Status": t.get("Status", "Status"),
-            "Stückzahl": count_label
-        }, inplace=True)
+    use_sql = "model_hash" in st.session_state and st.toggle("🗄️ " + t.get("preview_use_sql", "Aggregate with the SQL backend"), key="preview_use_sql")
+    sql_source = (st.session_state["property_store"], st.session_state["model_hash"]) if use_sql else None
+
+    quick = st.toggle("⚡ " + t.get("preview_quick", "Quick preview from a sample while the exact table is computed"), key="preview_quick")
+
+    # Re-aggregates only when model, mapping, language or backend change; earlier runs are served from their snapshot
+    snapshot = None
+    if "model_hash" in st.session_state:
+        snapshot = snapshot_key("preview-sql" if use_sql else "preview", st.session_state["model_hash"], mapping_hash(mapping), lang)
+    preview_name, preview_key = t.get("preview_tab", "Preview"), f"{id(ifc_model)}:{mapping_hash(mapping)}:{lang}:{use_sql}"
+    exact = find_job(preview_name, preview_key)
+    # Both jobs read the same model, so they run one after another: the estimate is submitted first
+    estimate = None
+    if quick and (exact is None or not exact.done):
+        estimate = run_job(
+            t.get("preview_quick_job", "Quick preview"), f"{id(ifc_model)}:{mapping_hash(mapping)}:{lang}", _estimate_job,
+            ifc_model, mapping, t, st.session_state.get("spatial_index"), st.session_state.get("material_index"),
+            st.session_state.get("schema"),
+        )
+    job = run_job(
+        preview_name, preview_key, _preview_job,
+        ifc_model, mapping, t, st.session_state.get("spatial_index"), st.session_state.get("material_index"), sql_source,
+        st.session_state.get("schema"), snapshot,
+    )
+
+    # The estimate is shown until the exact job finishes (its poll reruns the app then)
+    if estimate is not None and not job.done:
+        if estimate.status == DONE and estimate.result is not None:
+            render_job_status(job)
+            estimate_df, sample = estimate.result
+            st.info("🎲 " + t.get("preview_estimate_note", "Estimated from {n} of {total} elements; ± is the 95 % error bound. The exact table replaces it when ready.").format(n=sample.size, total=sample.total))
+            from ifc_processing.transform import format_display
+            st.dataframe(format_display(estimate_df, style=_format_style(t), never_convert_fields=never_convert_fields), use_container_width=True)
+            return
+        if not estimate.done:
+            render_job_status(estimate)
+
+    if not job_ready(job):
+        return
 
+    df_final = job.result
+    if df_final is not None:
         st.session_state["df_final"] = df_final
 
         display_df = df_final
+        style_key = _format_style(t)
 
-        # 🔘 Format toggle UI
-        format_style = st.radio(
-            t.get("number_format_label", "Choose number format:"),
-            options=["🇩🇪 Deutsch (1.234,56)", "🇬🇧 English (1,234.56)"],
-            index=0,
-            horizontal=True,
-        )
-        style_key = "de" if "Deutsch" in format_style else "en"
-
+        from ifc_processing.transform import format_display
         display_df = format_display(display_df, style=style_key, never_convert_fields=never_convert_fields)
         st.dataframe(display_df, use_container_width=True)
 
@@ -0,0 +1,63 @@
+# 📁 query_tab.py
+
+import sqlite3
+import streamlit as st
+
+from translations import translations
+from job_ui import run_job, job_ready
+
+def _sql_db_job(job, property_store, model_key, t):
+    from tools.sql_backend import ensure_sql_db
+    job.report("🗄️ " + t.get("query_building", "Building SQL table …"), 0.0)
+    return ensure_sql_db(property_store, model_key)
+
+def render_query_tab():
+    lang = st.session_state.get("lang", "en")
+    t = translations[lang]
+
+    st.header("🗄️ " + t.get("query_tab_title", "SQL Query"))
+
+    if "property_store" not in st.session_state or "model_hash" not in st.session_state:
+        st.warning("⚠️ " + t.get("query_warning", "Please upload an IFC file first."))
+        return
+
+    import pandas as pd
+    from tools.sql_backend import run_query, table_columns, quote
+
+    model_key = st.session_state["model_hash"]
+    job = run_job(t.get("query_tab_title", "SQL Query"), model_key, _sql_db_job, st.session_state["property_store"], model_key, t)
+    if not job_ready(job):
+        return
+    db_path = job.result
+
+    columns = table_columns(db_path)
+    classes = [name for name in columns if name.startswith("Ifc")]
+    st.caption(t.get("query_hint", "One table per IFC class with a column per \"Pset.Key\"; quote names with double quotes."))
+
+    with st.expander("📋 " + t.get("query_tables", "Tables and columns")):
+        selected = st.selectbox(t.get("query_table", "Table"), classes, key="query_table") if classes else None
+        if selected:
+            st.code(", ".join(quote(c) for c in columns[selected]), language="sql")
+
+    default_sql = f"SELECT * FROM {quote(classes[0])} LIMIT 100" if classes else "SELECT * FROM elements LIMIT 100"
+    st.session_state.setdefault("query_sql", default_sql)
+    with st.form("query_form"):
+        sql = st.text_area("SQL", key="query_sql", height=140)
+        submitted = st.form_submit_button("▶️ " + t.get("query_run", "Run query"))
+
+    if submitted:
+        try:
+            st.session_state["query_result"] = run_query(db_path, sql)
+        except (sqlite3.Error, pd.errors.DatabaseError, ValueError) as e:
+            st.session_state.pop("query_result", None)
+            st.error("❌ " + str(e))
+
+    result = st.session_state.get("query_result")
+    if result is not None:
+        st.dataframe(result, use_container_width=True)
+        st.download_button(
+            "📥 " + t.get("download_csv", "Download CSV"),
+            result.to_csv(index=False).encode("utf-8"),
+            f"{st.session_state.get('ifc_filename', 'export')}_query.csv",
+            "text/csv",
+        )
@@ -0,0 +1,196 @@
+# 📁 rule_editor.py — Lazy, searchable per-class rule editor backed by a compact rule store
+
+from typing import Dict, Any, List, Optional
+
+import streamlit as st
+
+from ifc_processing.compiled_mapping import RULE_FIELDS
+from tools.ifchelper import mapping_hash
+
+# Classes rendered with full widgets at once; more matches ask for a narrower search
+MAX_RENDERED = 25
+
+_FIELD_LABELS = {
+    "group": ("🔑", "rule_group", "Group"),
+    "group2": ("🎨", "rule_type", "Type"),
+    "group3": ("📌", "rule_status", "Status"),
+    "sum": ("➕", "rule_sum", "Summed fields"),
+    "text": ("📝", "rule_text", "Text fields"),
+    "ignore": ("🚫", "rule_ignore", "Ignored"),
+}
+
+
+def _empty_rules() -> Dict[str, Any]:
+    rules: Dict[str, Any] = {field: [] for field in RULE_FIELDS}
+    rules["material"] = False
+    return rules
+
+
+class RuleStore:
+    """
+    Rules, category labels and activation of all classes as plain dicts.
+
+    Only classes with at least one rule and only renamed categories are kept, so the store stays
+    small for models with many classes. Widgets never own the state: they are rendered from the
+    store and write back into it on submit. `source` identifies what the store was seeded from,
+    `generation` changes when it is re-seeded (so stale widget state is dropped) and `revision`
+    on every edit.
+    """
+
+    def __init__(self, mapping: Optional[Dict[str, Any]] = None, active: Optional[List[str]] = None, source: str = ""):
+        mapping = mapping or {}
+        self.rules: Dict[str, Dict[str, Any]] = {}
+        self.categories: Dict[str, str] = {}
+        self.active: List[str] = []
+        self.source = source
+        self.generation = 0
+        self.revision = 0
+        self.load(mapping, active)
+
+    def load(self, mapping: Dict[str, Any], active: Optional[List[str]] = None, source: Optional[str] = None) -> None:
+        self.rules = {}
+        for cls, rules in mapping.get("rules", {}).items():
+            self.update(cls, rules)
+        self.categories = {cls: label for cls, label in mapping.get("categories", {}).items() if label and label != cls}
+        self.active = list(active if active is not None else mapping.get("rules", {}))
+        if source is not None:
+            self.source = source
+        self.generation += 1
+        self.revision += 1
+
+    def rules_for(self, cls: str) -> Dict[str, Any]:
+        return {**_empty_rules(), **self.rules.get(cls, {})}
+
+    def update(self, cls: str, rules: Dict[str, Any]) -> None:
+        compact = {field: list(rules[field]) for field in RULE_FIELDS if rules.get(field)}
+        if rules.get("material"):
+            compact["material"] = True
+        if compact:
+            self.rules[cls] = compact
+        else:
+            self.rules.pop(cls, None)
+        self.revision += 1
+
+    def category(self, cls: str) -> str:
+        return self.categories.get(cls, cls)
+
+    def rename(self, cls: str, label: str) -> None:
+        label = label.strip()
+        if label and label != cls:
+            self.categories[cls] = label
+        else:
+            self.categories.pop(cls, None)
+        self.revision += 1
+
+    def is_active(self, cls: str) -> bool:
+        return cls in self.active
+
+    def set_active(self, cls: str, active: bool) -> None:
+        if active and cls not in self.active:
+            self.active.append(cls)
+        elif not active and cls in self.active:
+            self.active.remove(cls)
+        self.revision += 1
+
+    def active_classes(self, order: List[str]) -> List[str]:
+        return [cls for cls in order if cls in self.active]
+
+    def class_rules(self, all_classes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Full rule dicts for every class that is active or has rules (the `class_rules` session shape)."""
+        return {cls: self.rules_for(cls) for cls in all_classes if cls in self.rules or cls in self.active}
+
+
+def get_rule_store(name: str, mapping: Dict[str, Any], active: Optional[List[str]] = None, source: Optional[str] = None) -> RuleStore:
+    """
+    The session's rule store `name`, (re-)seeded from `mapping` when it does not exist yet or
+    when `source` (default: the mapping's hash) differs from what it was seeded from.
+    """
+    source = source if source is not None else mapping_hash(mapping)
+    store = st.session_state.get(name)
+    if store is None:
+        store = st.session_state[name] = RuleStore(mapping, active, source)
+    elif store.source != source:
+        store.load(mapping, active, source)
+    return store
+
+
+def _render_overview(store: RuleStore, all_classes: List[str], t, prefix: str, rename: bool) -> None:
+    """Activation (and category labels) of all classes as one table, applied in one submit."""
+    import pandas as pd
+
+    table = pd.DataFrame({
+        "ifc_class": all_classes,
+        "active": [store.is_active(cls) for cls in all_classes],
+        **({"category": [store.category(cls) for cls in all_classes]} if rename else {}),
+    })
+    with st.form(f"{prefix}_overview_form"):
+        edited = st.data_editor(
+            table,
+            key=f"{prefix}_overview_{store.revision}",
+            hide_index=True,
+            disabled=["ifc_class"],
+            use_container_width=True,
+            column_config={
+                "ifc_class": st.column_config.TextColumn(t.get("rule_editor_class", "IFC class")),
+                "active": st.column_config.CheckboxColumn("✅ " + t.get("rule_editor_active", "Active")),
+                "category": st.column_config.TextColumn("📚 " + t.get("rule_editor_category", "Category")),
+            },
+        )
+        if st.form_submit_button("💾 " + t.get("rule_editor_apply", "Apply")):
+            for row in edited.itertuples(index=False):
+                if store.is_active(row.ifc_class) != bool(row.active):
+                    store.set_active(row.ifc_class, bool(row.active))
+                if rename and row.category != store.category(row.ifc_class):
+                    store.rename(row.ifc_class, str(row.category or ""))
+            st.rerun()
+
+
+def _render_class_form(store: RuleStore, cls: str, keys: List[str], t, prefix: str) -> None:
+    rules = store.rules_for(cls)
+    widget = f"{prefix}{store.generation}"
+    with st.expander(f"{t.get('rules_for', 'Regeln für')} {cls}", expanded=True):
+        with st.form(f"{widget}_form_{cls}"):
+            active = st.checkbox("✅ " + t.get("activate_class", "{cls} aktivieren").format(cls=cls), value=store.is_active(cls), key=f"{widget}_active_{cls}_{store.revision}")
+            picked = {
+                field: st.multiselect(
+                    f"{icon} {t.get(label_key, default)}", keys,
+                    default=[k for k in rules[field] if k in keys], key=f"{widget}_{field}_{cls}",
+                )
+                for field, (icon, label_key, default) in _FIELD_LABELS.items()
+            }
+            material = st.checkbox("🧱 " + t.get("rule_material", "Split quantities by material (layer thickness)"), value=rules["material"], key=f"{widget}_material_{cls}")
+            if st.form_submit_button("💾 " + t.get("rule_editor_apply", "Apply")):
+                store.update(cls, {**picked, "material": material})
+                store.set_active(cls, active)
+                st.rerun()
+
+
+def render_rule_editor(store: RuleStore, all_classes: List[str], class_keys_map: Dict[str, List[str]], t, prefix: str, rename: bool = False) -> None:
+    """
+    Overview table for activation / category labels, plus full rule widgets only for the classes
+    that are opened or match the search (class name or one of its keys). Every block is a form,
+    so edits are applied together instead of rerunning the app per click.
+    """
+    _render_overview(store, all_classes, t, prefix, rename)
+
+    col_search, col_open = st.columns(2)
+    with col_search:
+        query = st.text_input("🔍 " + t.get("rule_editor_search", "Search classes or keys"), key=f"{prefix}_search").strip().lower()
+    with col_open:
+        opened = st.multiselect("📂 " + t.get("rule_editor_open", "Edit classes"), all_classes, key=f"{prefix}_open")
+
+    matches = [
+        cls for cls in all_classes
+        if query and (query in cls.lower() or any(query in k.lower() for k in class_keys_map.get(cls, [])))
+    ]
+    shown = [cls for cls in all_classes if cls in opened or cls in matches]
+    if not shown:
+        st.caption(t.get("rule_editor_hint", "Search or pick classes to edit their rules."))
+        return
+    if len(shown) > MAX_RENDERED:
+        st.caption(t.get("rule_editor_more", "{n} more classes match, refine the search.").format(n=len(shown) - MAX_RENDERED))
+        shown = [cls for cls in shown if cls in opened] + [cls for cls in shown if cls not in opened]
+        shown = shown[:MAX_RENDERED]
+
+    for cls in shown:
+        _render_class_form(store, cls, class_keys_map.get(cls, []), t, prefix)
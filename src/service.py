@@ -0,0 +1,307 @@
+# 📁 service.py — Local JSON/HTTP API for quantity extraction and model comparison
+#
+#   python src/service.py --port 8765 --workers 2 --queue 8
+#
+#   POST /aggregate  {"path": "model.ifc" | "ifc": "<base64>", "mapping": {...}}
+#   POST /compare    {"a": {"path" | "ifc"}, "b": {"path" | "ifc"}, "mapping": {...}, "mapping_b": {...}, "lang": "de",
+#                     "memory_limit_mb": 4096}   ← optional: out-of-core comparison for very large models
+#   GET  /health
+
+import argparse
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from cache import CacheManager
+from tools.ifchelper import file_hash, mapping_hash
+from tools.snapshots import SnapshotStore, snapshot_key
+
+UPLOAD_DIR = Path(__file__).resolve().parent.parent / "cache"
+
+# Largest request body read; base64 models are about 4/3 of their file size
+MAX_BODY_MB = 512
+
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------------------------------------------- workers
+
+def _frame_to_json(df) -> Dict[str, Any]:
+    return json.loads(df.to_json(orient="split", index=False, force_ascii=False))
+
+
+def _timed(fn: Callable[..., Any], *args) -> Tuple[Any, float]:
+    """`fn(*args)` and its run time in the worker, in seconds."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, round(time.perf_counter() - start, 3)
+
+
+def _aggregate_worker(path: str, mapping: Dict[str, Any]):
+    from tools.core import aggregate, extract
+    # Same pipeline (plan, categories, schema) as the UI preview
+    return aggregate(extract(path), mapping)
+
+
+def _compare_worker(path_a: str, path_b: str, mapping_a: Dict[str, Any], mapping_b: Dict[str, Any], lang: str):
+    from tools.core import CompareOptions, compare
+    return compare(path_a, path_b, mapping_a, mapping_b, CompareOptions(lang=lang))
+
+
+def _compare_ooc_worker(path_a: str, path_b: str, mapping_a: Dict[str, Any], mapping_b: Dict[str, Any], lang: str, memory_limit_mb: int):
+    from tools.core import CompareOptions, compare
+    return compare(path_a, path_b, mapping_a, mapping_b, CompareOptions(lang=lang, memory_limit_mb=memory_limit_mb))
+
+
+# --------------------------------------------------------------------- service
+
+class ExtractionService:
+    """
+    Bounded process pool with admission control and a result cache.
+
+    - At most `workers` computations run at once, at most `queue` more wait for a worker;
+      further requests are rejected with 503 instead of piling up.
+    - Result tables are cached in memory (LRU) by (operation, model hash(es), mapping hash(es)) and
+      persisted as snapshots (`tools.snapshots`) of the engine version, so they survive restarts and
+      are shared with the UI and other processes; identical concurrent requests share one in-flight
+      computation.
+    """
+
+    def __init__(self, workers: int = 2, queue: int = 8, cache_entries: int = 64, store: Optional[CacheManager] = None):
+        self.workers = workers
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._cache_entries = cache_entries
+        self._inflight: Dict[Tuple, Future] = {}
+        self._store = store or CacheManager()
+        self._snapshots = SnapshotStore(self._store)
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "inflight": len(self._inflight),
+            "cache_entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "store": self._store.stats(),
+        }
+
+    def _remember(self, key: Tuple, result: Any) -> None:
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_entries:
+                self._cache.popitem(last=False)
+
+    def run(self, key: Tuple, fn: Callable[..., Any], *args) -> Tuple[Any, bool]:
+        """Return `(result, cached)`; computes `fn(*args)` in the pool on a cache miss."""
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key], True
+
+        store_key = snapshot_key(*key)
+        stored = self._snapshots.get(store_key)
+        if stored is not None:
+            self.hits += 1
+            self._remember(key, stored)
+            return stored, True
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                if not self._slots.acquire(blocking=False):
+                    raise ServiceError(503, "Worker queue is full, retry later.")
+                self.misses += 1
+                future = self._pool.submit(_timed, fn, *args)
+                future.add_done_callback(lambda _f: self._slots.release())
+                self._inflight[key] = future
+
+        try:
+            result, seconds = future.result()
+        except Exception as e:
+            raise ServiceError(500, f"{type(e).__name__}: {e}")
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        self._snapshots.put(store_key, result, {"compute_s": seconds}, source="service")
+        self._remember(key, result)
+        return result, False
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(cancel_futures=True)
+
+
+def _check_mapping(mapping: Any, name: str) -> None:
+    if not isinstance(mapping, dict):
+        raise ServiceError(400, f"'{name}' must be a mapping object.")
+    for section in ("categories", "rules", "units", "tolerances"):
+        if not isinstance(mapping.get(section, {}), dict):
+            raise ServiceError(400, f"'{name}.{section}' must be an object.")
+    for cls, rule in mapping.get("rules", {}).items():
+        if not isinstance(rule, dict):
+            raise ServiceError(400, f"'{name}.rules.{cls}' must be an object.")
+
+
+def _resolve_model(spec: Dict[str, Any]) -> Tuple[str, str]:
+    """`{"path": ...}` or `{"ifc": base64}` → (local path, content hash)."""
+    if not isinstance(spec, dict):
+        raise ServiceError(400, "A model must be given as {\"path\": ...} or {\"ifc\": ...}.")
+    if spec.get("path"):
+        path = Path(spec["path"])
+        if not path.is_file():
+            raise ServiceError(404, f"IFC not found: {path}")
+        return str(path), file_hash(path)
+
+    if spec.get("ifc"):
+        try:
+            data = base64.b64decode(spec["ifc"], validate=True)
+        except ValueError:
+            raise ServiceError(400, "'ifc' must be base64 encoded.")
+        UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = UPLOAD_DIR / f"svc_{threading.get_ident()}.tmp"
+        tmp.write_bytes(data)
+        digest = file_hash(tmp)
+        path = UPLOAD_DIR / f"svc_{digest[:16]}.ifc"
+        os.replace(tmp, path)
+        return str(path), digest
+
+    raise ServiceError(400, "Provide the model as 'path' or base64 'ifc'.")
+
+
+def handle_aggregate(service: ExtractionService, body: Dict[str, Any]) -> Dict[str, Any]:
+    mapping = body.get("mapping")
+    _check_mapping(mapping, "mapping")
+    path, model_key = _resolve_model(body)
+    map_key = mapping_hash(mapping)
+
+    result, cached = service.run(("aggregate", model_key, map_key), _aggregate_worker, path, mapping)
+    return {"model_hash": model_key, "mapping_hash": map_key, "cached": cached, **_frame_to_json(result)}
+
+
+def handle_compare(service: ExtractionService, body: Dict[str, Any]) -> Dict[str, Any]:
+    mapping_a = body.get("mapping")
+    mapping_b = body.get("mapping_b", mapping_a)
+    _check_mapping(mapping_a, "mapping")
+    _check_mapping(mapping_b, "mapping_b")
+    path_a, key_a = _resolve_model(body.get("a") or {})
+    path_b, key_b = _resolve_model(body.get("b") or {})
+    lang = body.get("lang", "en")
+    if not isinstance(lang, str):
+        raise ServiceError(400, "'lang' must be a string.")
+
+    key = ("compare", key_a, key_b, mapping_hash(mapping_a), mapping_hash(mapping_b), lang)
+    memory_limit_mb = body.get("memory_limit_mb")
+    if memory_limit_mb is not None:
+        if not isinstance(memory_limit_mb, int) or memory_limit_mb <= 0:
+            raise ServiceError(400, "'memory_limit_mb' must be a positive integer.")
+        # Each mode has its own cache entry, so a divergence between the two is never masked
+        result, cached = service.run(key + ("ooc",), _compare_ooc_worker, path_a, path_b, mapping_a, mapping_b, lang, memory_limit_mb)
+    else:
+        result, cached = service.run(key + ("memory",), _compare_worker, path_a, path_b, mapping_a, mapping_b, lang)
+    return {"model_hash_a": key_a, "model_hash_b": key_b, "cached": cached, **_frame_to_json(result)}
+
+
+ROUTES = {
+    "/aggregate": handle_aggregate,
+    "/compare": handle_compare,
+}
+
+
+def make_handler(service: ExtractionService, max_body_mb: int = MAX_BODY_MB):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict[str, Any]) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok", **service.stats()})
+            else:
+                self._send(404, {"error": "Not found"})
+
+        def do_POST(self):
+            handler = ROUTES.get(self.path)
+            if handler is None:
+                self._send(404, {"error": "Not found"})
+                return
+            try:
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                except ValueError:
+                    raise ServiceError(400, "Content-Length must be an integer.")
+                if length < 0:
+                    raise ServiceError(400, "Content-Length must not be negative.")
+                if length > max_body_mb * 1024 * 1024:
+                    # The body is not read, so the connection cannot be reused
+                    self.close_connection = True
+                    raise ServiceError(413, f"Request body exceeds {max_body_mb} MB.")
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ServiceError(400, "Request body must be a JSON object.")
+                self._send(200, handler(service, body))
+            except json.JSONDecodeError as e:
+                self._send(400, {"error": f"Invalid JSON: {e}"})
+            except ServiceError as e:
+                self._send(e.status, {"error": str(e)})
+            except Exception as e:
+                self.log_error("%s failed: %r", self.path, e)
+                self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    return Handler
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    workers: int = 2,
+    queue: int = 8,
+    server_ready: Optional[Callable] = None,
+    max_body_mb: int = MAX_BODY_MB,
+) -> None:
+    service = ExtractionService(workers=workers, queue=queue)
+    server = ThreadingHTTPServer((host, port), make_handler(service, max_body_mb))
+    if server_ready:
+        server_ready(server)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="ifc2quant extraction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--queue", type=int, default=8, help="requests allowed to wait for a worker")
+    parser.add_argument("--max-body-mb", type=int, default=MAX_BODY_MB, help="larger request bodies are rejected with 413")
+    args = parser.parse_args(argv)
+    print(f"ifc2quant service on http://{args.host}:{args.port} ({args.workers} workers)")
+    serve(args.host, args.port, args.workers, args.queue, max_body_mb=args.max_body_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# 📁 timeline_tab.py
+
+import streamlit as st
+from pathlib import Path
+
+from translations import translations
+from tools.ifchelper import mapping_hash, save_upload
+from job_ui import run_job, job_ready
+
+def _timeline_job(job, paths, mapping, t):
+    from tools.timeline import build_timeline
+    job.report("📈 " + t.get("timeline_running", "Building timeline …"), 0.0)
+    return build_timeline(paths, mapping)
+
+def render_timeline_tab():
+    lang = st.session_state.get("lang", "en")
+    t = translations[lang]
+
+    st.header("📈 " + t.get("timeline_tab_title", "Timeline"))
+
+    if "class_rules" not in st.session_state or "active_classes" not in st.session_state:
+        st.warning("⚠️ " + t.get("preview_warning", "Please upload an IFC file and define rules first."))
+        return
+
+    class_rules = st.session_state["class_rules"]
+    mapping = {
+        "categories": st.session_state.get("category_mapping", {}),
+        "rules": {cls: class_rules.get(cls, {"text": [], "sum": []}) for cls in st.session_state["active_classes"]},
+        "units": st.session_state.get("loaded_mapping", {}).get("units", {}),
+    }
+
+    uploaded = st.file_uploader("📂 " + t.get("timeline_upload_prompt", "Upload revisions"), type=["ifc"], accept_multiple_files=True, key="timeline_files")
+    st.caption(t.get("timeline_order_hint", "Revisions are ordered by file name."))
+
+    if not uploaded:
+        return
+
+    cache_dir = Path(__file__).resolve().parent.parent / "cache"
+    cache_dir.mkdir(exist_ok=True)
+
+    paths = [save_upload(file.getbuffer(), file.name, cache_dir) for file in sorted(uploaded, key=lambda f: f.name)]
+
+    timeline_key = ":".join(f.file_id for f in uploaded) + ":" + mapping_hash(mapping)
+    job = run_job(t.get("timeline_tab_title", "Timeline"), timeline_key, _timeline_job, paths, mapping, t)
+    if not job_ready(job):
+        return
+    matrix = job.result
+
+    if matrix.empty:
+        st.warning("⚠️ " + t.get("no_data_warning", "No data to display."))
+        return
+
+    matrix = matrix.rename(columns={
+        "Kategorie": t["Kategorie"],
+        "Gruppe": t["Gruppe"],
+        "Art": t["Art"],
+        "Status": t["Status"],
+        "Eigenschaft": t["Property"],
+    })
+    st.dataframe(matrix, use_container_width=True)
+
+    csv = matrix.to_csv(index=False).encode("utf-8")
+    st.download_button("📥 " + t.get("download_csv", "Download CSV"), data=csv, file_name="timeline.csv", mime="text/csv")
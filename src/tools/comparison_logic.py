@@ -1,30 +1,73 @@
 # 📁 tools/comparison_logic.py — Prepare and align grouped tables for comparison
 
-import streamlit as st
 import pandas as pd
 from ifc_processing.aggregate_rows_custom import aggregate_rows_custom
 from ifc_processing.transform import aggregate_by_mapping_per_class, simplify_text_fields
-from tools.diff import compare_grouped_quantities
+from ifc_processing.material_index import split_by_material, MATERIAL_COL
+from ifc_processing.units import convert_units, unit_factors
+from ifc_processing.fingerprint import class_fingerprints, unchanged_classes
+from tools.diff import compare_grouped_quantities, field_tolerance, within_tolerance
 from tools.text_diff import compare_text_fields
-from tools.excel_export import format_diff_table_with_styles
 from translations import translations
 
 
-def prepare_comparison(model_a, model_b, mapping_a, mapping_b):
+def prepare_comparison(model_a, model_b, mapping_a, mapping_b, lang="en", progress_a=None, progress_b=None, store_a=None, store_b=None, schema_a=None, schema_b=None):
     """
     Generate and align comparison-ready dataframes from both models.
     Only compares mapped numeric and text fields, always includes count (©Stückzahl).
+    `progress_a` / `progress_b` are optional `(done, total)` callbacks for the two extractions.
+
+    With the property stores of both models, classes whose fingerprints match are skipped
+    entirely (no extraction, aggregation or diff); they are listed in `attrs["unchanged_classes"]`.
+    The models' `ModelSchema`s, if given, replace value sniffing and unit sampling.
     """
-    lang = st.session_state.get("lang", "en")
-    t = translations[lang]
+    factors_a = unit_factors(model_a, mapping_a, schema_a)
+    factors_b = unit_factors(model_b, mapping_b, schema_b)
+
+    classes = None
+    unchanged = []
+    if store_a is not None and store_b is not None:
+        unchanged = unchanged_classes(
+            class_fingerprints(store_a, model_a, mapping_a, factors_a),
+            class_fingerprints(store_b, model_b, mapping_b, factors_b),
+            mapping_a, mapping_b,
+        )
+        classes = sorted((set(store_a.classes()) | set(store_b.classes())) - set(unchanged))
+
+    if classes == []:
+        result = finalise_diff(pd.DataFrame(), lang)
+    else:
+        # Both models are brought to the same target units before anything is compared
+        df_a = convert_units(pd.DataFrame(aggregate_rows_custom(model_a, mapping_a, progress=progress_a, classes=classes, schema=schema_a)), model_a, mapping_a, factors_a)
+        df_b = convert_units(pd.DataFrame(aggregate_rows_custom(model_b, mapping_b, progress=progress_b, classes=classes, schema=schema_b)), model_b, mapping_b, factors_b)
+        df_a = split_by_material(df_a, model_a, mapping_a)
+        df_b = split_by_material(df_b, model_b, mapping_b)
+        result = finalise_diff(diff_tables(df_a, df_b, mapping_a, mapping_b, lang, schema_a, schema_b), lang)
+
+    result.attrs["unchanged_classes"] = unchanged
+    return result
 
-    df_a = pd.DataFrame(aggregate_rows_custom(model_a, mapping_a))
-    df_b = pd.DataFrame(aggregate_rows_custom(model_b, mapping_b))
 
-    grouped_a = simplify_text_fields(aggregate_by_mapping_per_class(df_a, mapping_a), mapping_a)
-    grouped_b = simplify_text_fields(aggregate_by_mapping_per_class(df_b, mapping_b), mapping_b)
+def diff_tables(df_a: pd.DataFrame, df_b: pd.DataFrame, mapping_a, mapping_b, lang: str, schema_a=None, schema_b=None) -> pd.DataFrame:
+    """
+    Aggregate two long row tables and diff them; internal column names, no final layout.
+    Numeric deltas within the field's tolerance (`mapping_a["tolerances"]`, see `field_tolerance`) are dropped.
+    """
+    tolerances = mapping_a.get("tolerances")
+    # A side without any rows still needs the row columns for the text comparison
+    if df_a.empty and not df_b.empty:
+        df_a = df_b.iloc[0:0]
+    elif df_b.empty and not df_a.empty:
+        df_b = df_a.iloc[0:0]
+    grouped_a = simplify_text_fields(aggregate_by_mapping_per_class(df_a, mapping_a, schema_a), mapping_a)
+    grouped_b = simplify_text_fields(aggregate_by_mapping_per_class(df_b, mapping_b, schema_b), mapping_b)
+    # One side without rows (e.g. a class only present in one model): diff against an empty table of the same shape
+    if grouped_a.empty and not grouped_b.empty:
+        grouped_a = grouped_b.iloc[0:0]
+    elif grouped_b.empty and not grouped_a.empty:
+        grouped_b = grouped_a.iloc[0:0]
 
-    index_cols = [col for col in ["Kategorie", "Gruppe", "Art", "Status"] if col in grouped_a.columns and col in grouped_b.columns]
+    index_cols = [col for col in ["Kategorie", "Gruppe", "Art", "Status", MATERIAL_COL] if col in grouped_a.columns and col in grouped_b.columns]
     diff_rows = []
 
     # Collect all explicitly mapped fields (preserve order)
@@ -40,7 +83,7 @@ def prepare_comparison(model_a, model_b, mapping_a, mapping_b):
             b_series = grouped_b.set_index(index_cols)[field].astype(float)
             diff = compare_grouped_quantities(a_series, b_series, lang=lang)
             if diff is not None and "Delta" in diff.columns:
-                diff = diff[diff["Delta"].ne(0)]
+                diff = diff[~within_tolerance(diff["Wert A"], diff["Wert B"], *field_tolerance(tolerances, field))]
             if diff is not None and not diff.empty:
                 label = custom_label if custom_label else (field.split(".")[-1] if "." in field else field)
                 diff["Eigenschaft"] = label
@@ -58,12 +101,17 @@ def prepare_comparison(model_a, model_b, mapping_a, mapping_b):
     if "Eigenschaft" in df_a.columns and "Eigenschaft" in df_b.columns:
         df_a_text = df_a[df_a["Eigenschaft"].isin(mapped_fields)]
         df_b_text = df_b[df_b["Eigenschaft"].isin(mapped_fields)]
-        text_diff = compare_text_fields(df_a_text, df_b_text, lang=lang)
+        text_diff = compare_text_fields(df_a_text, df_b_text, lang=lang, tolerances=tolerances)
         if text_diff is not None and not text_diff.empty:
             text_diff = text_diff[text_diff["Delta"] != ""]
             diff_rows.append(text_diff)
 
-    combined = pd.concat(diff_rows, ignore_index=True, sort=False) if diff_rows else pd.DataFrame()
+    return pd.concat(diff_rows, ignore_index=True, sort=False) if diff_rows else pd.DataFrame()
+
+
+def finalise_diff(combined: pd.DataFrame, lang: str) -> pd.DataFrame:
+    """Translate and order the columns of a `diff_tables` result."""
+    t = translations[lang]
 
     # Rename only once at the end
     rename = {
@@ -71,6 +119,7 @@ def prepare_comparison(model_a, model_b, mapping_a, mapping_b):
         "Gruppe": t["Gruppe"],
         "Art": t["Art"],
         "Status": t["Status"],
+        MATERIAL_COL: t[MATERIAL_COL],
         "Eigenschaft": t["Property"],
         "Wert A": t["Wert A"],
         "Wert B": t["Wert B"],
@@ -80,9 +129,11 @@ def prepare_comparison(model_a, model_b, mapping_a, mapping_b):
         if col not in combined.columns:
             combined[col] = ""
 
+    has_material = MATERIAL_COL in combined.columns and combined[MATERIAL_COL].fillna("").astype(str).ne("").any()
     combined.rename(columns=rename, inplace=True)
 
     return combined[[
         t["Kategorie"], t["Gruppe"], t["Art"], t["Status"],
+        *([t[MATERIAL_COL]] if has_material else []),
         t["Property"], t["Wert A"], t["Wert B"], "Delta", t["Change"]
     ]]
@@ -0,0 +1,319 @@
+# 📁 tools/core.py — UI-free library API: extract a model, aggregate it under a mapping, compare two models
+#
+#   from tools.core import extract, aggregate, compare, AggregateOptions, CompareOptions
+#
+#   model = extract("model.ifc")
+#   table = aggregate(model, mapping)                       # grouped quantities, internal column names
+#   diff = compare("rev1.ifc", "rev2.ifc", mapping, options=CompareOptions(lang="de"))
+#   hashes = preload(["landscape.ifc", "civil.ifc", "drainage.ifc"])   # concurrent, into the snapshot store
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from queue import Empty
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import ifcopenshell
+import pandas as pd
+
+from ifc_processing.aggregate_rows_custom import _make_row
+from ifc_processing.material_index import MATERIAL_COL, build_material_index, split_by_material
+from ifc_processing.query_plan import ExtractionPlan, plan_extraction, execute_plan
+from ifc_processing.schema import NUMERIC, build_schema
+from ifc_processing.spatial_index import build_spatial_index
+from ifc_processing.transform import aggregate_by_mapping_per_class, simplify_text_fields
+from ifc_processing.units import convert_units, unit_factors
+from cache import CacheManager
+from tools.ifchelper import file_hash
+from tools.snapshots import SnapshotStore, model_store, snapshot_key
+
+COUNT = "Stückzahl"
+
+Progress = Optional[Callable[[int, int], None]]
+# (file index, done, total)
+FileProgress = Optional[Callable[[int, int, int], None]]
+
+
+class ExtractOptions:
+    """
+    - `progress`: `(done, total)` callback while PropertySets are read
+    - `base_hash`: file hash of the previous revision; only elements changed since then are re-extracted
+    - `revision`: the model is a revision of `base_hash`; otherwise the base is only used if most elements match
+    - `cache_dir`: snapshot store directory (default: the project cache)
+    """
+
+    def __init__(
+        self, progress: Progress = None, base_hash: Optional[str] = None, cache_dir: Optional[Path] = None,
+        revision: bool = False,
+    ):
+        self.progress = progress
+        self.base_hash = base_hash
+        self.revision = revision
+        self.cache_dir = cache_dir
+
+
+class AggregateOptions:
+    """
+    - `progress`: `(done, total)` callback while elements are categorised
+    - `sample_per_class`: estimate from a stratified sample of that many elements per class; numeric
+      columns are extrapolated and get a `± …` column with their 95 % error bound
+    """
+
+    def __init__(self, progress: Progress = None, sample_per_class: Optional[int] = None):
+        self.progress = progress
+        self.sample_per_class = sample_per_class
+
+
+class CompareOptions:
+    """
+    - `lang`: language of the column names and change labels of the result
+    - `progress_a` / `progress_b`: `(done, total)` callbacks for the two extractions
+    - `skip_unchanged`: skip classes whose fingerprints match (needs the property stores of both models)
+    - `memory_limit_mb`: compare out of core, class by class, within this budget (paths only)
+    - `tolerances`: per-field absolute / relative tolerances, merged over the mapping's `"tolerances"`
+      (see `tools.diff.field_tolerance`); deltas within them are not reported
+    """
+
+    def __init__(
+        self,
+        lang: str = "en",
+        progress_a: Progress = None,
+        progress_b: Progress = None,
+        skip_unchanged: bool = True,
+        memory_limit_mb: Optional[int] = None,
+        tolerances: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        self.lang = lang
+        self.progress_a = progress_a
+        self.progress_b = progress_b
+        self.skip_unchanged = skip_unchanged
+        self.memory_limit_mb = memory_limit_mb
+        self.tolerances = tolerances
+
+
+class ExtractedModel:
+    """An opened model with what the pipeline derives from it once; all but `model` are optional."""
+
+    def __init__(self, model, path: Optional[str] = None, model_hash: Optional[str] = None, property_store=None, schema=None, spatial_index=None, material_index=None):
+        self.model = model
+        self.path = path
+        self.model_hash = model_hash
+        self.property_store = property_store
+        self.schema = schema
+        self.spatial_index = spatial_index
+        self.material_index = material_index
+
+    def classes(self) -> List[str]:
+        return self.property_store.classes() if self.property_store is not None else []
+
+    def class_keys(self) -> Dict[str, List[str]]:
+        """Class → "Pset.Key" names offered for mapping (type attributes left out)."""
+        return {
+            cls: [k for k in self.property_store.keys_for_class(cls) if not k.lower().startswith("type")]
+            for cls in self.classes()
+        }
+
+
+ModelLike = Union[ExtractedModel, str, Path, Any]
+
+
+def extract(path: Union[str, Path], options: Optional[ExtractOptions] = None) -> ExtractedModel:
+    """Open a model and build its property store (cached per file hash), schema, spatial and material indexes."""
+    options = options or ExtractOptions()
+    model = ifcopenshell.open(str(path))
+    model_hash = file_hash(path)
+    spatial_index = build_spatial_index(model)
+    store = model_store(
+        model, model_hash, spatial_index, progress=options.progress,
+        snapshots=SnapshotStore(CacheManager(options.cache_dir)), path=str(path),
+        base_hash=options.base_hash, revision=options.revision,
+    )
+    return ExtractedModel(
+        model, str(path), model_hash, store,
+        schema=build_schema(store, model), spatial_index=spatial_index, material_index=build_material_index(model),
+    )
+
+
+def _preload_one(path: str, model_hash: str, cache_dir: Optional[str], progress: Progress = None) -> str:
+    model = ifcopenshell.open(path)
+    model_store(
+        model, model_hash, build_spatial_index(model), progress=progress,
+        snapshots=SnapshotStore(CacheManager(cache_dir)), path=path,
+    )
+    return model_hash
+
+
+# Progress queue of a preload worker process, set by the pool initializer
+_updates = None
+
+
+def _init_preload_worker(updates) -> None:
+    global _updates
+    _updates = updates
+
+
+def _preload_worker(args: Tuple[int, str, str, Optional[str]]) -> str:
+    index, path, model_hash, cache_dir = args
+    return _preload_one(path, model_hash, cache_dir, progress=lambda done, total: _updates.put((index, done, total)))
+
+
+def preload(
+    paths: Sequence[Union[str, Path]],
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    progress: FileProgress = None,
+) -> List[str]:
+    """
+    Extract several models concurrently, one worker process per file, and return their model hashes in order.
+    Each property store lands in the snapshot store as soon as its file is done, so `extract` of any of
+    the paths afterwards attaches it instead of reading PropertySets; models already there are skipped.
+    `progress` gets `(file index, done, total)` per file; a file is complete at `done == total`.
+    """
+    cache = CacheManager(cache_dir)
+    cache_dir = str(cache.cache_dir)
+    paths = [str(p) for p in paths]
+    hashes = [file_hash(p) for p in paths]
+    report = progress or (lambda index, done, total: None)
+
+    todo = []
+    for index, (path, model_hash) in enumerate(zip(paths, hashes)):
+        if cache.contains(snapshot_key("store", model_hash)):
+            report(index, 1, 1)
+        else:
+            todo.append((index, path, model_hash, cache_dir))
+
+    if len(todo) == 1:
+        index, path, model_hash, _ = todo[0]
+        _preload_one(path, model_hash, cache_dir, progress=lambda done, total: report(index, done, total))
+        report(index, 1, 1)
+    elif todo:
+        updates = multiprocessing.Queue()
+        workers = min(len(todo), max_workers or os.cpu_count() or 1)
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_preload_worker, initargs=(updates,))
+        try:
+            pending = {pool.submit(_preload_worker, args): args[0] for args in todo}
+            finished = set()
+            while pending:
+                done, _ = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                while True:
+                    try:
+                        index, n, total = updates.get_nowait()
+                    except Empty:
+                        break
+                    # Late updates of a file that is already complete are dropped
+                    if index not in finished:
+                        report(index, n, total)
+                for future in done:
+                    future.result()
+                    index = pending.pop(future)
+                    finished.add(index)
+                    report(index, 1, 1)
+        finally:
+            # A cancelled caller does not wait for the remaining files
+            pool.shutdown(wait=False, cancel_futures=True)
+    return hashes
+
+
+def _as_model(model: ModelLike) -> ExtractedModel:
+    """An `ExtractedModel` as is, a path opened (not extracted), an opened `ifcopenshell.file` wrapped."""
+    if isinstance(model, ExtractedModel):
+        return model
+    if isinstance(model, (str, Path)):
+        return ExtractedModel(ifcopenshell.open(str(model)), str(model))
+    return ExtractedModel(model)
+
+
+def mapped_rows(model: ExtractedModel, plan: ExtractionPlan, progress: Progress = None, elements=None, count_label: str = COUNT) -> List[Dict[str, Any]]:
+    """Long rows (one per element and mapped property, plus a count row) of all elements the plan covers, or of `elements` only."""
+    compiled = plan.compiled
+    never_convert_fields = compiled.never_convert_fields
+    schema = model.schema
+
+    rows = []
+    for el, original_cat, grp, props in execute_plan(model.model, plan, progress=progress, spatial_index=model.spatial_index, elements=elements):
+        cat = compiled.categories.get(original_cat, original_cat)
+
+        if grp and len(grp) == 3:
+            group_label, art, status = grp
+        else:
+            group_label, art, status = "", "", ""
+
+        for k, v in props.items():
+            if k in never_convert_fields:
+                v = str(v)
+            kind = schema.kind(original_cat, k) if schema is not None else None
+            rows.append(_make_row(cat, group_label, art, status, k, v, never_convert_fields, original_cat, el.GlobalId, kind))
+
+        rows.append(_make_row(cat, group_label, art, status, count_label, 1, never_convert_fields, original_cat, el.GlobalId, NUMERIC))
+    return rows
+
+
+def aggregate(model: ModelLike, mapping: Dict[str, Any], options: Optional[AggregateOptions] = None) -> pd.DataFrame:
+    """
+    The grouped quantity table of a model under a mapping: one row per (Kategorie, Gruppe, Art, Status[, Material]),
+    one column per mapped field plus `COUNT`, in the mapping's target units. Empty if nothing matched.
+    With `sample_per_class`, the table is estimated and `attrs["sample"]` holds the `ElementSample`.
+    """
+    options = options or AggregateOptions()
+    model = _as_model(model)
+    ifc, schema = model.model, model.schema
+
+    plan = plan_extraction(mapping)
+    sample = None
+    if options.sample_per_class:
+        from ifc_processing.sampling import sample_elements
+        sample = sample_elements(ifc, plan, options.sample_per_class)
+    rows = mapped_rows(model, plan, options.progress, sample.elements if sample is not None else None)
+    if not rows:
+        return pd.DataFrame()
+
+    df = convert_units(pd.DataFrame(rows), ifc, mapping, unit_factors(ifc, mapping, schema))
+    df = split_by_material(df, ifc, mapping, model.material_index)
+    if sample is not None:
+        from ifc_processing.sampling import extrapolate_rows, variance_rows
+        group_cols = ["Kategorie", "Gruppe", "Art", "Status"] + ([MATERIAL_COL] if MATERIAL_COL in df.columns else [])
+        df = pd.concat([extrapolate_rows(df, sample, plan.compiled.never_convert_fields), variance_rows(df, sample, group_cols)], ignore_index=True)
+
+    table = simplify_text_fields(aggregate_by_mapping_per_class(df, mapping, schema), mapping)
+    if sample is not None:
+        from ifc_processing.sampling import apply_error_bounds
+        table = apply_error_bounds(table)
+        if COUNT in table.columns:
+            table[COUNT] = pd.to_numeric(table[COUNT], errors="coerce").round()
+        table.attrs["sample"] = sample
+    return table
+
+
+def compare(
+    model_a: ModelLike,
+    model_b: ModelLike,
+    mapping_a: Dict[str, Any],
+    mapping_b: Optional[Dict[str, Any]] = None,
+    options: Optional[CompareOptions] = None,
+) -> pd.DataFrame:
+    """
+    Differences of the grouped quantities and mapped text fields of two models, with translated
+    column names (`options.lang`). `mapping_b` defaults to `mapping_a`.
+    Classes skipped as unchanged are listed in `attrs["unchanged_classes"]`.
+    """
+    options = options or CompareOptions()
+    mapping_b = mapping_b if mapping_b is not None else mapping_a
+    if options.tolerances:
+        mapping_a = {**mapping_a, "tolerances": {**mapping_a.get("tolerances", {}), **options.tolerances}}
+
+    if options.memory_limit_mb:
+        from tools.ooc_compare import compare_out_of_core
+        if not isinstance(model_a, (str, Path)) or not isinstance(model_b, (str, Path)):
+            raise ValueError("Out-of-core comparison needs model paths")
+        return compare_out_of_core(str(model_a), str(model_b), mapping_a, mapping_b, lang=options.lang, memory_limit_mb=options.memory_limit_mb)
+
+    from tools.comparison_logic import prepare_comparison
+    a, b = _as_model(model_a), _as_model(model_b)
+    skip = options.skip_unchanged
+    return prepare_comparison(
+        a.model, b.model, mapping_a, mapping_b, lang=options.lang,
+        progress_a=options.progress_a, progress_b=options.progress_b,
+        store_a=a.property_store if skip else None, store_b=b.property_store if skip else None,
+        schema_a=a.schema, schema_b=b.schema,
+    )
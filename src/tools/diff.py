@@ -1,57 +1,90 @@
 # 📁 tools/diff.py — Comparison logic for grouped quantities
 
-import streamlit as st
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
 import pandas as pd
 from translations import translations
+from ifc_processing.material_index import MATERIAL_COL
+
+# Relative change |Δ| / |A| in percent, added by `rank_changes`
+REL_COL = "Δ %"
+
+
+def field_tolerance(tolerances: Optional[Dict[str, Any]], field: str) -> Tuple[float, float]:
+    """
+    (absolute, relative) tolerance of a field from a mapping's `"tolerances"`, e.g.
+    `{"*": {"abs": 0.001}, "Qto_Base.NetVolume": {"abs": 0.01, "rel": 0.005}}`:
+    the full "Pset.Key" entry, else the key without its Pset, else "*"; (0, 0) if none applies.
+    """
+    tolerances = tolerances or {}
+    entry = tolerances.get(field) or tolerances.get(field.split(".")[-1]) or tolerances.get("*") or {}
+    return float(entry.get("abs", 0.0)), float(entry.get("rel", 0.0))
+
+
+def within_tolerance(a, b, abs_tol: float = 0.0, rel_tol: float = 0.0) -> np.ndarray:
+    """
+    Element-wise: both values are numbers and |b − a| ≤ max(abs_tol, rel_tol · max(|a|, |b|)).
+    Missing or non-numeric values (added / removed rows) are never within tolerance.
+    """
+    a = pd.to_numeric(pd.Series(a, dtype=object), errors="coerce").to_numpy(dtype=float)
+    b = pd.to_numeric(pd.Series(b, dtype=object), errors="coerce").to_numpy(dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.abs(b - a) <= np.maximum(abs_tol, rel_tol * np.maximum(np.abs(a), np.abs(b)))
+
 
-def compare_grouped_quantities(grouped_a: pd.Series, grouped_b: pd.Series, lang=None) -> pd.DataFrame:
+def compare_grouped_quantities(grouped_a: pd.Series, grouped_b: pd.Series, lang: str = "en") -> pd.DataFrame:
     """
     Compare two grouped quantity Series (multi-indexed by Kategorie, Gruppe, Art, Status)
     and return a DataFrame with deltas, direction, and change status.
+    Both Series are aligned on the union of their keys in one step; no per-key lookups.
     """
-    lang = lang or st.session_state.get("lang", "en")
     t = translations[lang]
 
     all_keys = grouped_a.index.union(grouped_b.index)
-    rows = []
-
-    for key in all_keys:
-        val_a = grouped_a[key] if key in grouped_a else ""
-        val_b = grouped_b[key] if key in grouped_b else ""
-
-        if isinstance(val_a, pd.Series):
-            val_a = val_a.values[0]
-        if isinstance(val_b, pd.Series):
-            val_b = val_b.values[0]
-
-        if str(val_a) == str(val_b):
-            status = t["unchanged"]
-        elif str(val_a) == "":
-            status = t["added"]
-        elif str(val_b) == "":
-            status = t["removed"]
-        else:
-            status = t["changed"]
-
-        kategorie, gruppe, art, status_val = (None, None, None, None)
-        if isinstance(key, tuple):
-            kategorie = key[0] if len(key) > 0 else None
-            gruppe = key[1] if len(key) > 1 else None
-            art = key[2] if len(key) > 2 else None
-            status_val = key[3] if len(key) > 3 else None
-
-        rows.append({
-            "Kategorie": kategorie,
-            "Gruppe": gruppe,
-            "Art": art,
-            "Status": status_val,
-            "Wert A": val_a,
-            "Wert B": val_b,
-            "Delta": val_b - val_a if isinstance(val_a, (int, float)) and isinstance(val_b, (int, float)) else "",
-            "Change": status
-        })
-
-    df = pd.DataFrame(rows)
+    if len(all_keys) == 0:
+        return pd.DataFrame()
+
+    # Duplicate keys keep their rows; the first value of a key counts
+    first_a = grouped_a[~grouped_a.index.duplicated()]
+    first_b = grouped_b[~grouped_b.index.duplicated()]
+    in_a = all_keys.isin(first_a.index)
+    in_b = all_keys.isin(first_b.index)
+    a = first_a.reindex(all_keys).to_numpy(dtype=object)
+    b = first_b.reindex(all_keys).to_numpy(dtype=object)
+    with np.errstate(invalid="ignore"):
+        same = in_a & in_b & ((a == b) | (pd.isna(a) & pd.isna(b)))
+
+    status = np.select(
+        [same, ~in_a, ~in_b],
+        [t["unchanged"], t["added"], t["removed"]],
+        t["changed"],
+    )
+    val_a = np.where(in_a, a, "")
+    val_b = np.where(in_b, b, "")
+    delta = np.full(len(all_keys), "", dtype=object)
+    both = in_a & in_b
+    delta[both] = b[both] - a[both]
+
+    def level(name):
+        # By name: a group column the aggregation removed must not shift the later ones into its place
+        if name in all_keys.names:
+            return all_keys.get_level_values(name).tolist()
+        return [None] * len(all_keys)
+
+    data = {
+        "Kategorie": level("Kategorie"),
+        "Gruppe": level("Gruppe"),
+        "Art": level("Art"),
+        "Status": level("Status"),
+        "Wert A": val_a.tolist(),
+        "Wert B": val_b.tolist(),
+        "Delta": delta.tolist(),
+        "Change": status.tolist(),
+    }
+    if MATERIAL_COL in all_keys.names:
+        data[MATERIAL_COL] = all_keys.get_level_values(all_keys.names.index(MATERIAL_COL)).tolist()
+    df = pd.DataFrame(data)
 
     # Drop empty columns if needed
     for col in ["Gruppe", "Art", "Status"]:
@@ -59,3 +92,27 @@ def compare_grouped_quantities(grouped_a: pd.Series, grouped_b: pd.Series, lang=
             df.drop(columns=col, inplace=True)
 
     return df
+
+
+def rank_changes(diff: pd.DataFrame, n: int = 20, by: str = "abs", lang: str = "en") -> pd.DataFrame:
+    """
+    The `n` rows of a finalised comparison with the largest absolute (`by="abs"`) or relative
+    (`by="rel"`, |Δ| / |A|, infinite for A = 0) change, largest first, with the relative change in
+    percent as `REL_COL`. Rows without a numeric delta (added / removed groups, text) are not ranked.
+    Selects with `np.argpartition`, so only the top `n` are sorted.
+    """
+    t = translations[lang]
+    if diff.empty or "Delta" not in diff.columns:
+        return diff.iloc[0:0]
+
+    delta = pd.to_numeric(diff["Delta"], errors="coerce").to_numpy(dtype=float)
+    base = pd.to_numeric(diff[t["Wert A"]], errors="coerce").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.abs(delta) / np.abs(base)
+    score = np.abs(delta) if by == "abs" else relative
+
+    candidates = np.flatnonzero(~np.isnan(score) & ~np.isnan(delta) & (delta != 0))
+    if len(candidates) > n:
+        candidates = candidates[np.argpartition(-score[candidates], n - 1)[:n]]
+    order = candidates[np.argsort(-score[candidates], kind="stable")]
+    return diff.iloc[order].assign(**{REL_COL: relative[order] * 100}).reset_index(drop=True)
@@ -0,0 +1,127 @@
+# 📁 tools/federation.py — Several discipline models (landscape, civil, drainage …) aggregated as one virtual model
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Callable
+
+import pandas as pd
+
+from ifc_processing.material_index import split_by_material
+from ifc_processing.query_plan import plan_extraction
+from ifc_processing.units import convert_units, unit_factors
+from ifc_processing.transform import aggregate_by_mapping_per_class, simplify_text_fields, SOURCE_COL
+from tools.core import ExtractOptions, extract, mapped_rows
+
+
+def model_rows(path, mapping: Dict[str, Any], cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Long rows of one model as `tools.core.aggregate` builds them for the preview: only the mapped classes,
+    under their mapped categories, typed by the model schema and converted to the mapping's units.
+    The model's property store is attached from its per-file snapshot if it was extracted before.
+    """
+    model = extract(path, ExtractOptions(cache_dir=cache_dir))
+    df = pd.DataFrame(mapped_rows(model, plan_extraction(mapping)))
+    if df.empty:
+        return df
+    df = convert_units(df, model.model, mapping, unit_factors(model.model, mapping, model.schema))
+    return split_by_material(df, model.model, mapping, model.material_index)
+
+
+def _rows_worker(args: Tuple[str, Dict[str, Any], Optional[str]]) -> pd.DataFrame:
+    path, mapping, cache_dir = args
+    return model_rows(path, mapping, cache_dir)
+
+
+def load_model_rows(
+    paths: Sequence[str],
+    mapping: Dict[str, Any],
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> List[pd.DataFrame]:
+    """
+    Long rows of every model, in order, extracted concurrently, one worker process per file.
+    Each worker goes through `tools.core.extract`, so the file's property store is attached from (or
+    lands in) its per-file snapshot, shared with the other tabs.
+    """
+    todo = [(str(p), mapping, str(cache_dir) if cache_dir else None) for p in paths]
+    if progress:
+        progress(0, len(paths))
+    frames: List[pd.DataFrame] = [pd.DataFrame()] * len(todo)
+    if len(todo) == 1:
+        frames[0] = _rows_worker(todo[0])
+        if progress:
+            progress(1, 1)
+    elif todo:
+        workers = min(len(todo), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_rows_worker, args): i for i, args in enumerate(todo)}
+            for done, future in enumerate(as_completed(futures), 1):
+                frames[futures[future]] = future.result()
+                if progress:
+                    progress(done, len(paths))
+    return frames
+
+
+def federate_rows(frames: Sequence[pd.DataFrame], labels: Sequence[str], by_source: bool = True) -> pd.DataFrame:
+    """
+    Long rows of all models as one virtual model.
+    With `by_source`, the source model is one more grouping dimension (`SOURCE_COL`); otherwise
+    groups span the models and every element adds its model's label as a text value.
+    """
+    parts = []
+    for rows, label in zip(frames, labels):
+        if rows.empty:
+            continue
+        if by_source:
+            parts.append(rows.assign(**{SOURCE_COL: label}))
+        else:
+            # One count row per element: the anchor for its source label
+            counts = rows[rows["Eigenschaft"] == "Stückzahl"]
+            parts += [rows, counts.assign(Eigenschaft=SOURCE_COL, Wert=label)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def unique_labels(names: Sequence[str]) -> List[str]:
+    """Source labels for `names`, with " (2)", " (3)" … appended to repeats so no two models share one."""
+    labels: List[str] = []
+    for name in names:
+        label, n = name, 1
+        while label in labels:
+            n += 1
+            label = f"{name} ({n})"
+        labels.append(label)
+    return labels
+
+
+def _with_source_text(mapping: Dict[str, Any], classes) -> Dict[str, Any]:
+    """The mapping with `SOURCE_COL` as a text field of every class, so labels are never summed."""
+    rules = mapping.get("rules", {})
+    return {**mapping, "rules": {
+        **rules,
+        **{cls: {**rules.get(cls, {}), "text": list(rules.get(cls, {}).get("text", [])) + [SOURCE_COL]} for cls in classes},
+    }}
+
+
+def build_federated_table(
+    paths: Sequence[str],
+    mapping: Dict[str, Any],
+    labels: Optional[Sequence[str]] = None,
+    by_source: bool = True,
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> pd.DataFrame:
+    """
+    Extract several IFC models under one mapping and aggregate them into a single grouped quantity table.
+    `labels` default to the file stems; repeated labels are made unique (see `unique_labels`).
+    """
+    labels = unique_labels(list(labels) if labels else [Path(p).stem for p in paths])
+    frames = load_model_rows(paths, mapping, cache_dir=cache_dir, max_workers=max_workers, progress=progress)
+    df = federate_rows(frames, labels, by_source)
+    if df.empty:
+        return df
+    if not by_source:
+        mapping = _with_source_text(mapping, df["OriginalClass"].unique())
+    return simplify_text_fields(aggregate_by_mapping_per_class(df, mapping), mapping)
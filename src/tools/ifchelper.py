@@ -1,8 +1,11 @@
 # 📁 tools/ifchelper.py — Extraction logic for grouped quantities with SmartHash support
 
-import ifcopenshell
 from collections import defaultdict
+from pathlib import Path
 import hashlib
+import json
+import os
+import tempfile
 
 
 def get_elements_by_class(ifc_model, class_names):
@@ -30,6 +33,38 @@ def extract_psets(element):
     return props
 
 
+def file_hash(path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's content, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(data, name: str, cache_dir) -> Path:
+    """
+    Write uploaded bytes to `<cache_dir>/uploads/<SHA-256>/<name>` and return that path.
+    The directory is the content hash (= `file_hash` of the file), so a new revision under the same
+    name never reuses an older copy, and sessions only share a file if its content is identical.
+    """
+    path = Path(cache_dir) / "uploads" / hashlib.sha256(data).hexdigest() / Path(name).name
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Written under a temporary name first, so concurrent sessions never read a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return path
+
+
+def mapping_hash(mapping) -> str:
+    """SHA-256 of a mapping in canonical JSON form (sorted keys), so equal mappings hash equal."""
+    canonical = json.dumps(mapping, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def smart_hash(element, keys=None):
     """
     Generate a stable hash based on type, selected props, and volume.
@@ -51,27 +86,25 @@ def smart_hash(element, keys=None):
 
 def extract_grouped_quantities(ifc_model, mapping):
     """
-    Applies mapping to elements and returns dict of ((Group, Category, Key) → Sum).
+    Applies mapping to elements and returns dict of ((Group, Category, Key) → Sum) for every summed
+    field of the mapping's `{"rules": {class: {"sum": [...], ...}}}` rules, in the target units.
     """
-    quantities = defaultdict(float)
-
-    for class_name, rules in mapping.get("rules", {}).items():
-        elements = ifc_model.by_type(class_name)
-        for el in elements:
-            props = extract_psets(el)
-            volume = compute_volume(el)
+    import pandas as pd
+    from tools.core import aggregate
 
-            for rule in rules:
-                group = rule.get("group", "")
-                category = rule.get("category", class_name)
-                key = rule.get("key", "Volume")
-
-                val = props.get(key, volume if key == "Volume" else 0.0)
-                try:
-                    val = float(val)
-                except:
-                    val = 0.0
-
-                quantities[(group, category, key)] += val
+    table = aggregate(ifc_model, mapping)
+    quantities = defaultdict(float)
+    if table.empty:
+        return {}
+
+    fields = list(dict.fromkeys(field for rules in mapping.get("rules", {}).values() for field in rules.get("sum", [])))
+    for field in fields:
+        # The table names its columns by the key without the Pset prefix
+        column = field.split(".")[-1]
+        if column not in table.columns:
+            continue
+        values = pd.to_numeric(table[column], errors="coerce").fillna(0.0)
+        for (group, category), total in values.groupby([table["Gruppe"], table["Kategorie"]]).sum().items():
+            quantities[(group, category, field)] += float(total)
 
     return dict(quantities)
@@ -0,0 +1,215 @@
+# 📁 tools/jobs.py — Background jobs with progress reporting, cancellation and result handoff
+
+import threading
+import time
+import traceback
+import uuid
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once cancellation was requested."""
+
+
+class Job:
+    """
+    State of one background computation. The worker reports progress through `report()`,
+    which is also the cancellation point; the UI only ever reads the attributes.
+    """
+
+    def __init__(self, key: str, name: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.name = name
+        self.status = PENDING
+        self.stage = ""
+        self.progress = 0.0
+        # Part name → progress of jobs that process several inputs at once (e.g. one per file)
+        self.parts: Dict[str, float] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.accessed = self.created
+        self.finished: Optional[float] = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        if self.status == PENDING:
+            self.status = CANCELLED
+            self.finished = time.time()
+
+    def report(self, stage: Optional[str] = None, progress: Optional[float] = None) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+        if stage is not None:
+            self.stage = stage
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+
+    def report_part(self, part: str, progress: float) -> None:
+        """Progress of one part; the job's progress is the mean over all parts."""
+        self.parts[part] = max(0.0, min(1.0, progress))
+        self.report(progress=sum(self.parts.values()) / len(self.parts))
+
+    def progress_callback(self, stage: str, start: float = 0.0, end: float = 1.0) -> Callable[[int, int], None]:
+        """`(done, total)` callback for extraction loops, mapped onto the [start, end] share of this job."""
+        def callback(done: int, total: int) -> None:
+            self.report(stage, start + (end - start) * (done / total if total else 1.0))
+        return callback
+
+
+# One lock per opened model; ifcopenshell files must not be read from several threads at once
+_model_locks: "weakref.WeakKeyDictionary[Any, threading.Lock]" = weakref.WeakKeyDictionary()
+_model_locks_guard = threading.Lock()
+
+
+@contextmanager
+def using_models(job: Job, *models) -> Iterator[None]:
+    """
+    Hold the given opened models for the block, so jobs reading the same model run one after another.
+    Locks are taken in a fixed order (no deadlock between two-model jobs); waiting stays cancellable.
+    """
+    with _model_locks_guard:
+        locks = {id(lock): lock for lock in (_model_locks.setdefault(m, threading.Lock()) for m in models if m is not None)}
+    held = []
+    try:
+        for _, lock in sorted(locks.items()):
+            while not lock.acquire(timeout=0.2):
+                job.report()
+            held.append(lock)
+        yield
+    finally:
+        for lock in reversed(held):
+            lock.release()
+
+
+_Pending = Tuple[Job, Callable[..., Any], tuple, Dict[str, Any]]
+
+
+class JobRunner:
+    """
+    Runs jobs on a bounded thread pool. Jobs are looked up by key, so resubmitting the same
+    key while a job is pending, running or finished returns that job instead of starting over.
+
+    - Jobs belong to a `group` (one session). Free workers take pending jobs round-robin across groups,
+      and a group runs at most `per_group` jobs at once, so one session's extraction does not hold up the others.
+    - A job submitted into a `slot` replaces the slot's previous job (cancelled and forgotten).
+    - Finished jobs are forgotten `ttl` seconds after they were last looked up; beyond `max_finished`
+      the least recently used go first.
+    """
+
+    def __init__(self, max_workers: int = 2, per_group: int = 1, max_finished: int = 64, ttl: float = 3600.0):
+        self.max_workers = max_workers
+        self.per_group = per_group
+        self.max_finished = max_finished
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ifc2quant-job")
+        self._jobs: Dict[str, Job] = {}
+        self._slots: Dict[str, str] = {}
+        self._pending: "OrderedDict[str, Deque[_Pending]]" = OrderedDict()
+        self._running: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, name: str, fn: Callable[..., Any], *args, group: str = "", slot: Optional[str] = None, **kwargs) -> Job:
+        """Queue `fn(job, *args, **kwargs)` unless a live or finished job with this key exists."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status not in (FAILED, CANCELLED):
+                job.accessed = time.time()
+                return job
+            job = self._jobs[key] = Job(key, name)
+            if slot is not None:
+                previous = self._slots.get(slot)
+                if previous is not None and previous != key and previous in self._jobs:
+                    self._jobs.pop(previous).cancel()
+                self._slots[slot] = key
+            self._pending.setdefault(group, deque()).append((job, fn, args, kwargs))
+            self._evict()
+            self._dispatch()
+        return job
+
+    def get(self, key: str) -> Optional[Job]:
+        job = self._jobs.get(key)
+        if job is not None:
+            job.accessed = time.time()
+        return job
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            job = self._jobs.pop(key, None)
+        if job is not None:
+            job.cancel()
+
+    def discard_prefix(self, prefix: str) -> None:
+        """Cancel and forget all jobs whose key starts with `prefix` (e.g. one session)."""
+        with self._lock:
+            keys = [k for k in self._jobs if k.startswith(prefix)]
+        for key in keys:
+            self.discard(key)
+
+    def _dispatch(self) -> None:
+        """Hand pending jobs to free workers, one per group in turn (lock held)."""
+        active = sum(self._running.values())
+        while active < self.max_workers:
+            for group in list(self._pending):
+                queue = self._pending[group]
+                while queue and queue[0][0].status == CANCELLED:
+                    queue.popleft()
+                if not queue:
+                    del self._pending[group]
+                elif self._running.get(group, 0) < self.per_group:
+                    self._running[group] = self._running.get(group, 0) + 1
+                    self._pending.move_to_end(group)
+                    self._pool.submit(self._run, group, *queue.popleft())
+                    active += 1
+                    break
+            else:
+                return
+
+    def _evict(self) -> None:
+        """Forget expired finished jobs, then the least recently used beyond `max_finished` (lock held)."""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.accessed)
+        expired = [job for job in finished if now - job.accessed > self.ttl]
+        kept = [job for job in finished if now - job.accessed <= self.ttl]
+        for job in expired + kept[:max(0, len(kept) - self.max_finished)]:
+            del self._jobs[job.key]
+        self._slots = {slot: key for slot, key in self._slots.items() if key in self._jobs}
+
+    def _run(self, group: str, job: Job, fn: Callable[..., Any], args, kwargs) -> None:
+        try:
+            if job.status == CANCELLED:
+                return
+            job.status = RUNNING
+            try:
+                job.result = fn(job, *args, **kwargs)
+                job.progress = 1.0
+                job.status = DONE
+            except JobCancelled:
+                job.status = CANCELLED
+            except Exception:
+                job.error = traceback.format_exc()
+                job.status = FAILED
+            finally:
+                job.finished = time.time()
+        finally:
+            with self._lock:
+                self._running[group] -= 1
+                if not self._running[group]:
+                    del self._running[group]
+                self._dispatch()
@@ -0,0 +1,214 @@
+# 📁 tools/ooc_compare.py — Out-of-core model comparison: extract, spill to SQLite, release, diff per category
+
+import gc
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+import ifcopenshell
+import pandas as pd
+
+from ifc_processing.aggregate_rows_custom import iter_rows_custom
+from ifc_processing.material_index import build_material_index, split_by_material, MATERIAL_COL
+from ifc_processing.schema import NUMERIC, TEXT
+from ifc_processing.transform import dropped_group_columns
+from ifc_processing.units import convert_units, unit_factors
+from tools.comparison_logic import diff_tables, finalise_diff
+
+DEFAULT_MEMORY_LIMIT_MB = 2048
+
+# Rough in-memory cost of one long row while it is buffered / aggregated (dict + DataFrame copies)
+ROW_BYTES = 1024
+
+ROW_COLUMNS = ["Kategorie", "Gruppe", "Status", "Art", MATERIAL_COL, "Eigenschaft", "Wert", "OriginalClass", "GlobalId"]
+
+# `Wert` has no declared type so SQLite keeps numbers as numbers and text as text
+_CREATE = """
+CREATE TABLE {table} (
+    Kategorie TEXT, Gruppe TEXT, Status TEXT, Art TEXT, {material} TEXT,
+    Eigenschaft TEXT, Wert, OriginalClass TEXT, GlobalId TEXT
+)
+"""
+
+
+def row_budget(memory_limit_mb: int) -> int:
+    """Rows that may be held in memory at once under the ceiling."""
+    return max(1000, int(memory_limit_mb * 1024 * 1024 / ROW_BYTES))
+
+
+def spill_model(
+    path: str,
+    mapping: Dict[str, Any],
+    conn: sqlite3.Connection,
+    table: str,
+    chunk_rows: int,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Extract the long rows of one model into `table`, `chunk_rows` at a time, and release the model.
+    Unit conversion and the material split are applied per chunk. Returns the number of rows written.
+    """
+    conn.execute(f"DROP TABLE IF EXISTS {table}")
+    conn.execute(_CREATE.format(table=table, material=MATERIAL_COL))
+
+    model = ifcopenshell.open(path)
+    factors = unit_factors(model, mapping)
+    material_index = build_material_index(model) if any(r.get("material") for r in mapping.get("rules", {}).values()) else None
+
+    written = 0
+    buffer: List[Dict[str, Any]] = []
+
+    def flush():
+        nonlocal written
+        df = convert_units(pd.DataFrame(buffer), model, mapping, factors)
+        df = split_by_material(df, model, mapping, material_index)
+        df = df.reindex(columns=ROW_COLUMNS).fillna({MATERIAL_COL: ""})
+        df.to_sql(table, conn, if_exists="append", index=False)
+        written += len(df)
+        buffer.clear()
+
+    for row in iter_rows_custom(model, mapping, progress):
+        buffer.append(row)
+        if len(buffer) >= chunk_rows:
+            flush()
+    if buffer:
+        flush()
+
+    conn.execute(f"CREATE INDEX {table}_category ON {table}(Kategorie, Gruppe)")
+    conn.commit()
+
+    # Only the spilled table is needed from here on
+    del model, material_index
+    gc.collect()
+    return written
+
+
+def iter_partitions(conn: sqlite3.Connection, budget: int) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    (category, group or None) partitions whose rows from both tables fit the row budget.
+    Partitions follow the mapped category, the first key of the diff, so classes that a category
+    mapping merges are diffed together as in `prepare_comparison`. Categories are diffed as a whole
+    when they fit, otherwise group by group.
+    """
+    counts = conn.execute(
+        "SELECT Kategorie, COUNT(*) FROM (SELECT Kategorie FROM rows_a UNION ALL SELECT Kategorie FROM rows_b) "
+        "GROUP BY Kategorie ORDER BY Kategorie"
+    ).fetchall()
+    for category, n in counts:
+        if n <= budget:
+            yield category, None
+            continue
+        groups = conn.execute(
+            "SELECT Gruppe FROM rows_a WHERE Kategorie = ? UNION SELECT Gruppe FROM rows_b WHERE Kategorie = ? ORDER BY 1",
+            (category, category),
+        ).fetchall()
+        for (group,) in groups:
+            yield category, group
+
+
+def _load(conn: sqlite3.Connection, table: str, category: str, group: Optional[str], material: bool) -> pd.DataFrame:
+    query = f"SELECT * FROM {table} WHERE Kategorie = ?"
+    params: Tuple = (category,)
+    if group is not None:
+        query += " AND Gruppe = ?"
+        params += (group,)
+    df = pd.read_sql_query(query, conn, params=params)
+    return df if material else df.drop(columns=MATERIAL_COL)
+
+
+def has_material_split(conn: sqlite3.Connection, table: str, mapping: Dict[str, Any]) -> bool:
+    """
+    Whether `split_by_material` gave the whole model a material column, i.e. it has rows of a
+    class flagged with `"material": true`. Decided once per model so that every partition is
+    diffed on the same index columns as `prepare_comparison`.
+    """
+    classes = [cls for cls, r in mapping.get("rules", {}).items() if r.get("material")]
+    if not classes:
+        return False
+    marks = ",".join("?" * len(classes))
+    return conn.execute(f"SELECT 1 FROM {table} WHERE OriginalClass IN ({marks}) LIMIT 1", classes).fetchone() is not None
+
+
+class SpillKinds:
+    """
+    NUMERIC / TEXT per (class, "Pset.Key") over a whole spilled table, for the `schema` argument of the
+    aggregation. Without it, a class diffed group by group would parse each field's type per group, and
+    a field with text in some groups only would be summed in the others (in memory it is text throughout).
+    """
+
+    def __init__(self, conn: sqlite3.Connection, table: str, chunk_rows: int):
+        self.text = set()
+        query = f"SELECT DISTINCT OriginalClass, Eigenschaft, Wert FROM {table} WHERE typeof(Wert) = 'text'"
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_rows):
+            # Same test as the aggregation: a value that does not parse as a number makes the field text
+            bad = pd.to_numeric(chunk["Wert"], errors="coerce").isna()
+            self.text.update(zip(chunk.loc[bad, "OriginalClass"], chunk.loc[bad, "Eigenschaft"]))
+
+    def kind(self, ifc_class: str, key: str) -> str:
+        return TEXT if (ifc_class, key) in self.text else NUMERIC
+
+
+def _non_empty(conn: sqlite3.Connection, col: str) -> bool:
+    return conn.execute(f"SELECT 1 FROM rows_a WHERE {col} != '' UNION ALL SELECT 1 FROM rows_b WHERE {col} != '' LIMIT 1").fetchone() is not None
+
+
+def compare_out_of_core(
+    path_a: str,
+    path_b: str,
+    mapping_a: Dict[str, Any],
+    mapping_b: Dict[str, Any],
+    lang: str = "en",
+    memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+    work_dir: Optional[Path] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+) -> pd.DataFrame:
+    """
+    Same result as `prepare_comparison`, for models too large to hold twice in memory.
+
+    Model A is extracted into a SQLite file and released before model B is opened; both row tables
+    are then aggregated and diffed one category (or, for oversized categories, one group) at a time, so
+    at most `memory_limit_mb` worth of rows is materialised besides the model being extracted.
+    `progress(stage, fraction)` is called between the steps.
+    """
+    budget = row_budget(memory_limit_mb)
+    report = progress or (lambda stage, fraction: None)
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        conn = sqlite3.connect(Path(tmp) / "compare.sqlite")
+        try:
+            report("extract A", 0.0)
+            spill_model(path_a, mapping_a, conn, "rows_a", min(budget, 50_000))
+            report("extract B", 0.35)
+            spill_model(path_b, mapping_b, conn, "rows_b", min(budget, 50_000))
+
+            material_a = has_material_split(conn, "rows_a", mapping_a)
+            material_b = has_material_split(conn, "rows_b", mapping_b)
+            partitions = list(iter_partitions(conn, budget))
+            # Field types are decided per class over the whole model, as in memory, once a class is split up
+            kinds_a = kinds_b = None
+            if any(group is not None for _, group in partitions):
+                kinds_a = SpillKinds(conn, "rows_a", min(budget, 50_000))
+                kinds_b = SpillKinds(conn, "rows_b", min(budget, 50_000))
+            diffs = []
+            for i, (category, group) in enumerate(partitions):
+                report(f"diff {category}", 0.7 + 0.3 * i / max(len(partitions), 1))
+                df_a = _load(conn, "rows_a", category, group, material_a)
+                df_b = _load(conn, "rows_b", category, group, material_b)
+                diff = diff_tables(df_a, df_b, mapping_a, mapping_b, lang, kinds_a, kinds_b)
+                if not diff.empty:
+                    diffs.append(diff)
+                del df_a, df_b
+
+            # The numeric diffs drop group columns that are empty for all their keys (`compare_grouped_quantities`).
+            # In memory that is decided over the whole model: a column kept there is "" (not missing) in the
+            # rows of partitions that dropped it. Columns the aggregation removes stay missing.
+            combined = pd.concat(diffs, ignore_index=True, sort=False) if diffs else pd.DataFrame()
+            removed = dropped_group_columns(mapping_a) | dropped_group_columns(mapping_b)
+            for col in ("Gruppe", "Art", "Status"):
+                if col in combined.columns and col not in removed and _non_empty(conn, col):
+                    combined[col] = combined[col].fillna("")
+        finally:
+            conn.close()
+
+    return finalise_diff(combined, lang)
@@ -0,0 +1,211 @@
+# 📁 tools/snapshots.py — Versioned, compressed result snapshots keyed by model, mapping and engine version
+#
+#   cd src && python -m tools.snapshots list [--operation compare]
+#   cd src && python -m tools.snapshots prune [--older-than-days 30] [--keep-other-engines]
+
+import argparse
+import os
+import pickle
+import sys
+import tempfile
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import CacheManager
+
+# Bump whenever aggregation or comparison results change for the same model and mapping
+ENGINE_VERSION = "3"
+
+PREFIX = "snapshot:"
+
+# `ifc_processing.columnar.MAGIC`, repeated so reading snapshots does not import numpy
+COLUMNAR_MAGIC = b"IFQCOL1\n"
+
+# Share of a model's elements (by GlobalId) the previous model must also have to be used as its base revision
+REVISION_OVERLAP = 0.5
+
+
+def snapshot_key(operation: str, *parts: str, engine: str = ENGINE_VERSION) -> str:
+    """`snapshot:<engine>:<operation>:<parts…>`; parts are the model hash(es), mapping hash(es) and e.g. the language."""
+    return PREFIX + ":".join([engine, operation, *parts])
+
+
+def _split_key(key: str) -> Tuple[str, str]:
+    """(engine, operation) of a snapshot key."""
+    engine, operation = key[len(PREFIX):].split(":", 2)[:2]
+    return engine, operation
+
+
+class SnapshotStore:
+    """
+    Aggregation and comparison results persisted in the `CacheManager` store, shared by the UI,
+    the service and its workers across sessions and restarts.
+
+    Results are pickled and zlib-compressed; the store deduplicates equal blobs by content digest.
+    The entry metadata records the operation, engine version, row count, sizes and timings.
+
+    With `columnar=True`, DataFrames and property stores are written uncompressed in the memory-mappable
+    format of `ifc_processing.columnar` instead: reading them maps the blob rather than unpickling it, so
+    every process reading the same snapshot shares its pages.
+    """
+
+    def __init__(self, cache: Optional[CacheManager] = None, level: int = 6):
+        self.cache = cache or CacheManager()
+        self.level = level
+
+    def get(self, key: str) -> Any:
+        path = self.cache.get_path(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read(len(COLUMNAR_MAGIC))
+                columnar = data == COLUMNAR_MAGIC
+                if not columnar:
+                    data += f.read()
+        except FileNotFoundError:  # evicted by another process in between
+            return None
+        if columnar:
+            # numpy/pandas are only imported for columnar snapshots
+            from ifc_processing.columnar import attach
+            return attach(path)
+        return pickle.loads(zlib.decompress(data))
+
+    def put(self, key: str, result: Any, timings: Optional[Dict[str, float]] = None, columnar: bool = False, **meta) -> str:
+        engine, operation = _split_key(key)
+        meta = {
+            "operation": operation,
+            "engine": engine,
+            "rows": len(result) if hasattr(result, "__len__") else None,
+            "timings": timings or {},
+            **meta,
+        }
+        if columnar:
+            from ifc_processing.columnar import save
+            self.cache.setup()
+            fd, tmp = tempfile.mkstemp(dir=self.cache.cache_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                save(result, tmp)
+                # Renamed into the store, not read back into memory
+                return self.cache.put_file(key, tmp, {**meta, "format": "columnar", "raw_size": os.path.getsize(tmp)}, move=True)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+        raw = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        return self.cache.put_bytes(key, zlib.compress(raw, self.level), {**meta, "raw_size": len(raw)})
+
+    def fetch(self, key: str, compute: Callable[[], Any], **meta) -> Tuple[Any, bool]:
+        """`(result, cached)`: the snapshot under `key`, or `compute()` timed and stored (unless None)."""
+        result = self.get(key)
+        if result is not None:
+            return result, True
+        start = time.perf_counter()
+        result = compute()
+        if result is not None:
+            self.put(key, result, {"compute_s": round(time.perf_counter() - start, 3)}, **meta)
+        return result, False
+
+    def list(self, operation: Optional[str] = None, engine: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Snapshot entries (key, size, created, last access, meta), most recently used first."""
+        return [
+            entry for entry in self.cache.entries(PREFIX)
+            if (operation is None or _split_key(entry["key"])[1] == operation)
+            and (engine is None or _split_key(entry["key"])[0] == engine)
+        ]
+
+    def prune(self, older_than_days: Optional[float] = None, other_engines: bool = True, operation: Optional[str] = None) -> int:
+        """Delete snapshots of other engine versions and/or created more than `older_than_days` ago; returns the count."""
+        cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        pruned = 0
+        for entry in self.list(operation):
+            stale = other_engines and _split_key(entry["key"])[0] != ENGINE_VERSION
+            old = cutoff is not None and entry["created"] < cutoff
+            if stale or old:
+                self.cache.delete(entry["key"])
+                pruned += 1
+        return pruned
+
+
+def model_store(
+    ifc_model,
+    model_hash: str,
+    spatial_index,
+    progress: Optional[Callable[[int, int], None]] = None,
+    snapshots: Optional[SnapshotStore] = None,
+    path: Optional[str] = None,
+    base_hash: Optional[str] = None,
+    revision: bool = False,
+):
+    """
+    The model's `PropertyStore` (Psets plus spatial levels): attached from its columnar snapshot, or
+    extracted and snapshotted. Re-opening a model already seen skips reading its PropertySets.
+
+    With the model's STEP file `path`, per-element STEP hashes are snapshotted alongside the store. If the
+    previous revision `base_hash` has both, only elements whose hashes changed are re-extracted
+    (`ifc_processing.incremental`); the other rows are patched in from the previous revision's store.
+    `base_hash` is only used if the model is marked as its `revision`, or if at least `REVISION_OVERLAP`
+    of the model's elements are in it; an unrelated model is extracted in full.
+    """
+    from ifc_processing.pset_reader import read_psets_from_model
+    from ifc_processing.property_store import PropertyStore
+    from ifc_processing.spatial_index import attach_spatial_psets
+    from ifc_processing.incremental import element_hashes, changed_elements, patched_store
+
+    snapshots = snapshots or SnapshotStore()
+    key = snapshot_key("store", model_hash)
+    store = snapshots.get(key)
+    if store is not None:
+        return store
+
+    start = time.perf_counter()
+    hashes = None
+    if path is not None:
+        hashes = element_hashes(path, ((el.id(), el.GlobalId) for el in ifc_model.by_type("IfcElement")))
+        snapshots.put(snapshot_key("element-hashes", model_hash), hashes, {"compute_s": round(time.perf_counter() - start, 3)})
+
+    base_store = base_hashes = None
+    if hashes is not None and base_hash is not None and base_hash != model_hash:
+        base_hashes = snapshots.get(snapshot_key("element-hashes", base_hash))
+        if base_hashes is not None and not revision and len(hashes.keys() & base_hashes.keys()) < REVISION_OVERLAP * len(hashes):
+            base_hashes = None
+        base_store = snapshots.get(snapshot_key("store", base_hash)) if base_hashes is not None else None
+
+    if base_store is not None:
+        changed = changed_elements(hashes, base_hashes)
+        store = patched_store(ifc_model, base_store, changed, spatial_index, progress=progress)
+        meta = {"base": base_hash, "changed": len(changed)}
+    else:
+        psets = read_psets_from_model(ifc_model, progress=progress)
+        store = PropertyStore.from_psets(attach_spatial_psets(ifc_model, psets, spatial_index))
+        meta = {}
+    snapshots.put(key, store, {"compute_s": round(time.perf_counter() - start, 3)}, columnar=True, **meta)
+    return store
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="List or prune ifc2quant result snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_cmd = sub.add_parser("list")
+    list_cmd.add_argument("--operation")
+    prune_cmd = sub.add_parser("prune")
+    prune_cmd.add_argument("--operation")
+    prune_cmd.add_argument("--older-than-days", type=float)
+    prune_cmd.add_argument("--keep-other-engines", action="store_true", help="only prune by age")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore()
+    if args.command == "list":
+        for entry in store.list(args.operation):
+            meta = entry["meta"]
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["created"]))
+            print(f"{created}  {meta.get('operation', ''):<10} engine {meta.get('engine', '')}  {meta.get('rows')} rows  "
+                  f"{entry['size'] / 1024:8.1f} KiB  {meta.get('timings', {})}  {entry['key']}")
+    else:
+        print(f"{store.prune(args.older_than_days, not args.keep_other_engines, args.operation)} snapshots pruned")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
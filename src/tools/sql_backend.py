@@ -0,0 +1,202 @@
+# 📁 tools/sql_backend.py — Element × property table in SQLite for ad-hoc SQL and SQL-compiled aggregation
+
+import os
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ifc_processing.compiled_mapping import compile_mapping
+from ifc_processing.property_store import PropertyStore
+
+SCHEMA_VERSION = "1"
+
+SQL_DIR = Path(__file__).resolve().parents[2] / "cache" / "sql"
+
+
+def quote(name: str) -> str:
+    """SQL identifier quoting ("LL AM.Volumen" → "\"LL AM.Volumen\"")."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class _OrderedJoin:
+    """`ordered_join(x)`: distinct non-empty values in first-seen order, joined with " | " (like the pandas path)."""
+
+    def __init__(self):
+        self.values: "OrderedDict[str, None]" = OrderedDict()
+
+    def step(self, value):
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        text = "" if value is None else str(value).strip()
+        if text:
+            self.values[text] = None
+
+    def finalize(self):
+        return " | ".join(self.values)
+
+
+def connect(db_path, readonly: bool = True) -> sqlite3.Connection:
+    if readonly:
+        conn = sqlite3.connect(f"file:{Path(db_path).as_posix()}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(db_path)
+    conn.create_aggregate("ordered_join", 1, _OrderedJoin)
+    return conn
+
+
+def db_path_for(model_key: str, sql_dir: Optional[Path] = None) -> Path:
+    return Path(sql_dir or SQL_DIR) / f"{model_key}.sqlite"
+
+
+def build_sql_db(store: PropertyStore, db_path) -> Path:
+    """
+    Write the property store as one wide table per IFC class (`gid` + one column per "Pset.Key")
+    plus an `elements(gid, ifc_class)` table. Written to a temp file and renamed into place.
+    """
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=db_path.parent, suffix=".tmp")
+    os.close(fd)
+
+    conn = sqlite3.connect(tmp)
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("INSERT INTO meta VALUES ('schema_version', ?)", (SCHEMA_VERSION,))
+        conn.execute("CREATE TABLE elements (gid TEXT PRIMARY KEY, ifc_class TEXT NOT NULL)")
+
+        for ifc_class in store.classes():
+            gids = store.gids(ifc_class)
+            keys = store.keys_for_class(ifc_class)
+            conn.executemany("INSERT INTO elements VALUES (?, ?)", ((gid, ifc_class) for gid in gids))
+            # Untyped columns: SQLite keeps numbers numeric and text as text
+            columns = ", ".join(["gid TEXT PRIMARY KEY"] + [quote(k) for k in keys])
+            conn.execute(f"CREATE TABLE {quote(ifc_class)} ({columns})")
+            placeholders = ", ".join("?" * (len(keys) + 1))
+            conn.executemany(
+                f"INSERT INTO {quote(ifc_class)} VALUES ({placeholders})",
+                ((gid, *(store.get(gid, k) for k in keys)) for gid in gids),
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp, db_path)
+    return db_path
+
+
+def ensure_sql_db(store: PropertyStore, model_key: str, sql_dir: Optional[Path] = None) -> Path:
+    """Path of the model's SQL table, built from the store only if it does not exist yet."""
+    db_path = db_path_for(model_key, sql_dir)
+    if db_path.exists():
+        try:
+            with closing(connect(db_path)) as conn:
+                version = conn.execute("SELECT value FROM meta WHERE name = 'schema_version'").fetchone()
+            if version and version[0] == SCHEMA_VERSION:
+                return db_path
+        except sqlite3.DatabaseError:
+            pass
+    return build_sql_db(store, db_path)
+
+
+def table_columns(db_path) -> Dict[str, List[str]]:
+    """Table name → column names (for the query panel and the mapping compiler)."""
+    with closing(connect(db_path)) as conn:
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+        return {t: [r[1] for r in conn.execute(f"PRAGMA table_info({quote(t)})")] for t in tables}
+
+
+def run_query(db_path, sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
+    """Run a read-only ad-hoc query against a model's SQL table."""
+    with closing(connect(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=list(params))
+
+
+def _label_expr(keys: Sequence[str], columns: List[str]) -> str:
+    """SQL for `ClassSelector.label`: the key values, trimmed, "" if absent, joined with " / "."""
+    if not keys:
+        return "''"
+    parts = [f"COALESCE(TRIM(CAST({quote(k)} AS TEXT)), '')" if k in columns else "''" for k in keys]
+    return " || ' / ' || ".join(parts)
+
+
+def compile_mapping_sql(
+    mapping: Dict[str, Any],
+    columns_by_class: Dict[str, List[str]],
+    factors: Optional[Dict[Tuple[str, str], float]] = None,
+) -> Tuple[str, List[Any], List[Tuple[str, str]]]:
+    """
+    Compile the mapping into one statement: a UNION ALL of per-class projections (category,
+    labels, selected fields) under a single GROUP BY. Sum fields are summed (scaled by the unit
+    `factors` if given), text fields joined with `ordered_join`. Returns (sql, params, [(field, kind)]).
+    """
+    compiled = compile_mapping(mapping)
+    fields: "OrderedDict[str, str]" = OrderedDict()
+    for selector in compiled.selectors.values():
+        for key in selector.rules.get("sum", []):
+            fields.setdefault(key, "sum")
+        for key in selector.rules.get("text", []):
+            fields[key] = "text"
+    field_names = list(fields)
+
+    selects: List[str] = []
+    params: List[Any] = []
+    for ifc_class, selector in compiled.selectors.items():
+        columns = columns_by_class.get(ifc_class)
+        if columns is None:
+            continue
+        projection = [
+            "? AS OriginalClass",
+            "? AS Kategorie",
+            f"{_label_expr(selector.rules.get('group', []), columns)} AS Gruppe",
+            f"{_label_expr(selector.rules.get('group2', []), columns)} AS Art",
+            f"{_label_expr(selector.rules.get('group3', []), columns)} AS Status",
+        ]
+        params += [ifc_class, selector.category]
+        for i, field in enumerate(field_names):
+            selected = field in selector.sum_fields or field in selector.text_fields
+            if not selected or field not in columns:
+                projection.append(f"NULL AS f{i}")
+            elif fields[field] == "sum" and factors and (ifc_class, field) in factors:
+                projection.append(f"{quote(field)} * {float(factors[(ifc_class, field)])!r} AS f{i}")
+            else:
+                projection.append(f"{quote(field)} AS f{i}")
+        selects.append(f"SELECT {', '.join(projection)} FROM {quote(ifc_class)}")
+
+    if not selects:
+        return "", [], []
+
+    aggregates = [
+        (f"SUM(f{i})" if fields[f] == "sum" else f"ordered_join(f{i})") + f" AS {quote(f)}"
+        for i, f in enumerate(field_names)
+    ]
+    sql = (
+        "SELECT Kategorie, Gruppe, Art, Status, "
+        + ", ".join(aggregates + ['COUNT(*) AS "Stückzahl"'])
+        + " FROM (" + " UNION ALL ".join(selects) + ")"
+        + " GROUP BY OriginalClass, Kategorie, Gruppe, Art, Status"
+        + " ORDER BY OriginalClass, Gruppe, Art, Status"
+    )
+    return sql, params, list(fields.items())
+
+
+def aggregate_sql(db_path, mapping: Dict[str, Any], factors: Optional[Dict[Tuple[str, str], float]] = None) -> pd.DataFrame:
+    """Aggregated table for a mapping computed by SQLite, with the column naming of `aggregate_by_mapping_per_class`."""
+    sql, params, fields = compile_mapping_sql(mapping, table_columns(db_path), factors)
+    if not sql:
+        return pd.DataFrame()
+    df = run_query(db_path, sql, params)
+
+    for field, kind in fields:
+        df[field] = df[field].fillna(0) if kind == "sum" else df[field].fillna("").astype(str)
+    df = df.rename(columns={f: f.split(".")[-1] for f, _ in fields if "." in f})
+
+    # Like the pandas path: columns named after a grouping key are dropped
+    group_keys = {k.split(".")[-1] for rules in mapping.get("rules", {}).values() for g in ("group", "group2", "group3") for k in rules.get(g, [])}
+    return df.drop(columns=[c for c in df.columns if c in group_keys])
@@ -0,0 +1,94 @@
+# 📁 tools/startup_profile.py — Import-time breakdown and cold-start budget of the entry points
+#
+#   python src/tools/startup_profile.py            # report
+#   python src/tools/startup_profile.py --check    # exit 1 if a target is over budget or loads a heavy module
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+# Modules that must only load once the stage that needs them runs
+HEAVY_MODULES = ("ifcopenshell", "pandas", "numpy", "openpyxl", "xlsxwriter")
+
+# Target → (modules imported at startup, forbidden modules, budget in seconds)
+TARGETS: Dict[str, Tuple[List[str], Tuple[str, ...], float]] = {
+    # Everything `ui.py` imports before the first page is drawn
+    "ui": (
+        ["upload", "mapping", "preview", "download", "comparison_tab", "timeline_tab", "query_tab", "federation_tab"],
+        HEAVY_MODULES,
+        1.5,
+    ),
+    # `service.py` CLI and its (spawned) worker processes, which re-import it
+    "service": (["service"], HEAVY_MODULES + ("streamlit",), 0.3),
+    # The UI-free library used by workers, batch jobs and the service: may load the pipeline, never the UI
+    "core": (["tools.core", "tools.comparison_logic"], ("streamlit",), 3.0),
+}
+
+
+def profile_imports(modules: List[str]) -> List[Tuple[str, int, int]]:
+    """(module, self µs, cumulative µs) of every import done by importing `modules` in a fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.environ.get("PYTHONPATH")]))}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+        cwd=SRC_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"import of {modules} failed")
+
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def report(target: str, top: int = 10) -> Tuple[float, List[str], List[Tuple[str, int]]]:
+    """Total import seconds, loaded forbidden modules and the `top` slowest top-level imports of `target`."""
+    modules, forbidden, _ = TARGETS[target]
+    entries = profile_imports(modules)
+    total = sum(self_us for _, self_us, _ in entries) / 1e6
+    loaded = sorted({name for name, _, _ in entries if name in forbidden})
+    # Top-level packages carry the cumulative time of everything they pulled in
+    roots: Dict[str, int] = {}
+    for name, _, cumulative_us in entries:
+        root = name.split(".")[0]
+        if name == root:
+            roots[root] = max(roots.get(root, 0), cumulative_us)
+    slowest = sorted(roots.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total, loaded, slowest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold-start import profile of the ifc2quant entry points")
+    parser.add_argument("targets", nargs="*", help=f"any of {', '.join(sorted(TARGETS))} (default: all)")
+    parser.add_argument("--top", type=int, default=10, help="slowest top-level imports to list")
+    parser.add_argument("--budget", type=float, help="override the per-target budget (seconds)")
+    parser.add_argument("--check", action="store_true", help="exit 1 if a target is over budget or loads a heavy module")
+    args = parser.parse_args(argv)
+    unknown = [target for target in args.targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)}")
+
+    failed = False
+    for target in args.targets or sorted(TARGETS):
+        total, loaded, slowest = report(target, args.top)
+        budget = args.budget if args.budget is not None else TARGETS[target][2]
+        ok = total <= budget and not loaded
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {target}: {total:.3f}s (budget {budget:.2f}s)")
+        for name, cumulative_us in slowest:
+            print(f"    {cumulative_us / 1e6:8.3f}s  {name}")
+        if loaded:
+            print(f"    heavy modules loaded at startup: {', '.join(loaded)}")
+    return 1 if args.check and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
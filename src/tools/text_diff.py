@@ -1,15 +1,15 @@
 # 📁 tools/text_diff.py — Compare non-aggregated text fields between models
 
 import pandas as pd
-import streamlit as st
 from translations import translations
+from tools.diff import field_tolerance, within_tolerance
 
-def compare_text_fields(df_a: pd.DataFrame, df_b: pd.DataFrame, lang=None) -> pd.DataFrame:
+def compare_text_fields(df_a: pd.DataFrame, df_b: pd.DataFrame, lang: str = "en", tolerances=None) -> pd.DataFrame:
     """
     Compare text fields between two dataframes on grouped keys.
     Keys: Kategorie, Gruppe, Art, Status, Eigenschaft
+    Values that read as numbers get a Delta unless it is within the field's tolerance (see `field_tolerance`).
     """
-    lang = lang or st.session_state.get("lang", "en")
     t = translations[lang]
 
     # Always use internal column keys for logic
@@ -61,14 +61,15 @@ def compare_text_fields(df_a: pd.DataFrame, df_b: pd.DataFrame, lang=None) -> pd
 
     df = pd.DataFrame(rows)
 
-    def try_delta(row):
-        try:
-            a, b = float(row["Wert A"]), float(row["Wert B"])
-            return "" if abs(b - a) < 1e-6 else b - a
-        except:
-            return ""
-
-    df["Delta"] = df.apply(try_delta, axis=1)
+    if not df.empty:
+        # Column-wise, with each field's tolerance looked up once (as in diff_tables)
+        a = pd.to_numeric(df["Wert A"], errors="coerce")
+        b = pd.to_numeric(df["Wert B"], errors="coerce")
+        delta = b - a
+        blank = (delta.isna() | (delta.abs() < 1e-6)).to_numpy(copy=True)
+        for field, rows in df.groupby(df["Eigenschaft"].fillna(""), sort=False).indices.items():
+            blank[rows] |= within_tolerance(a.iloc[rows], b.iloc[rows], *field_tolerance(tolerances, field))
+        df["Delta"] = delta.astype(object).where(~blank, "")
 
     # Ensure all necessary columns are present
     for col in ["Kategorie", "Gruppe", "Art", "Status", "Eigenschaft", "Wert A", "Wert B", "Delta", "Change"]:
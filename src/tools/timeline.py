@@ -0,0 +1,119 @@
+# 📁 tools/timeline.py — Quantity timeline across an ordered series of model revisions
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ifc_processing.material_index import MATERIAL_COL
+from cache import CacheManager
+from tools.core import ExtractOptions, aggregate, extract
+from tools.ifchelper import file_hash, mapping_hash
+from tools.snapshots import SnapshotStore, snapshot_key
+
+GROUP_COLS = ["Kategorie", "Gruppe", "Art", "Status", MATERIAL_COL]
+
+
+def _revision_key(model_key: str, map_key: str) -> str:
+    # Same snapshot as the service's /aggregate of that model and mapping
+    return snapshot_key("aggregate", model_key, map_key)
+
+
+def revision_table(path, mapping: Dict[str, Any], cache_dir: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Extract and aggregate one revision into its grouped quantity table, through `tools.core` like the
+    preview: only the mapped classes, under their mapped categories.
+    """
+    table = aggregate(extract(path, ExtractOptions(cache_dir=cache_dir)), mapping)
+    return table if not table.empty else pd.DataFrame(columns=GROUP_COLS)
+
+
+def _revision_worker(args: Tuple[str, Dict[str, Any], str, Optional[str]]) -> str:
+    path, mapping, key, cache_dir = args
+    start = time.perf_counter()
+    table = revision_table(path, mapping, cache_dir)
+    SnapshotStore(CacheManager(cache_dir)).put(key, table, {"compute_s": round(time.perf_counter() - start, 3)}, columnar=True, source=Path(path).name)
+    return key
+
+
+def load_revision_tables(
+    paths: Sequence[str],
+    mapping: Dict[str, Any],
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> List[pd.DataFrame]:
+    """
+    Grouped tables for all revisions, in order.
+    Revisions whose (file hash, mapping hash) table is already snapshotted are not re-processed;
+    the remaining ones are extracted in parallel worker processes.
+    """
+    cache = CacheManager(cache_dir)
+    snapshots = SnapshotStore(cache)
+    cache_dir = str(cache.cache_dir)
+    map_key = mapping_hash(mapping)
+
+    keys = [_revision_key(file_hash(p), map_key) for p in paths]
+    todo = [(str(p), mapping, k, cache_dir) for p, k in zip(paths, keys) if not cache.contains(k)]
+
+    if len(todo) == 1:
+        _revision_worker(todo[0])
+    elif todo:
+        workers = min(len(todo), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_revision_worker, todo))
+
+    tables = []
+    for path, key in zip(paths, keys):
+        table = snapshots.get(key)
+        # Evicted in the meantime (tiny cache limit): compute inline
+        tables.append(table if table is not None else revision_table(path, mapping, cache_dir))
+    return tables
+
+
+def _long_quantities(table: pd.DataFrame) -> pd.Series:
+    """Grouped table → Series indexed by (group cols..., Eigenschaft) over its numeric columns."""
+    group_cols = [c for c in GROUP_COLS if c in table.columns]
+    value_cols = [c for c in table.columns if c not in group_cols and pd.api.types.is_numeric_dtype(table[c])]
+    if not value_cols:
+        return pd.Series(dtype=float)
+    long_df = table.melt(id_vars=group_cols, value_vars=value_cols, var_name="Eigenschaft", value_name="Wert")
+    for col in GROUP_COLS:
+        if col not in long_df.columns:
+            long_df[col] = ""
+    long_df[GROUP_COLS] = long_df[GROUP_COLS].fillna("").astype(str)
+    return long_df.groupby(GROUP_COLS + ["Eigenschaft"])["Wert"].sum()
+
+
+def timeline_matrix(tables: Sequence[pd.DataFrame], labels: Sequence[str]) -> pd.DataFrame:
+    """
+    Quantity-per-group × revision matrix.
+    One column per revision plus a `Δ <label>` column with the change against the previous revision.
+    """
+    series = [_long_quantities(t).rename(label) for t, label in zip(tables, labels)]
+    if not series:
+        return pd.DataFrame()
+
+    matrix = pd.concat(series, axis=1).fillna(0.0)
+    columns = [labels[0]]
+    for prev, label in zip(labels, labels[1:]):
+        delta = f"Δ {label}"
+        matrix[delta] = matrix[label] - matrix[prev]
+        columns += [label, delta]
+
+    return matrix[columns].reset_index()
+
+
+def build_timeline(
+    paths: Sequence[str],
+    mapping: Dict[str, Any],
+    labels: Optional[Sequence[str]] = None,
+    cache_dir: Optional[Path] = None,
+    max_workers: Optional[int] = None,
+) -> pd.DataFrame:
+    """Load an ordered series of IFC revisions and return their quantity timeline with successive deltas."""
+    labels = list(labels) if labels else [Path(p).stem for p in paths]
+    tables = load_revision_tables(paths, mapping, cache_dir=cache_dir, max_workers=max_workers)
+    return timeline_matrix(tables, labels)
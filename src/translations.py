@@ -32,12 +32,15 @@ translations = {
         "Gruppe": "Group",
         "Art": "Type",
         "Status": "Status",
+        "Baustoff": "Material",
+        "Modell": "Model",
         "rule_group": "Group",
         "rule_type": "Type",
         "rule_status": "Status",
         "rule_sum": "Summed fields",
         "rule_text": "Property",
         "rule_ignore": "Ignored",
+        "rule_material": "Split quantities by material (layer thickness)",
         "download_json": "Download mapping as JSON",
         "save_mapping_button": "Save mapping to folder",
         "download_csv": "Download CSV",
@@ -52,6 +55,14 @@ translations = {
         "comparison_model_b_loaded": "Model B",
         "no_differences": "No differences detected between Model A and Model B.",
         "rules_for": "Rules for",
+        "rule_editor_search": "Search classes or keys",
+        "rule_editor_open": "Edit classes",
+        "rule_editor_apply": "Apply",
+        "rule_editor_hint": "Search or pick classes to edit their rules.",
+        "rule_editor_more": "{n} more classes match, refine the search.",
+        "rule_editor_class": "IFC class",
+        "rule_editor_active": "Active",
+        "rule_editor_category": "Category",
         "download_warning": "Please define rules and generate a preview first.",
         "saved_as": "Saved as",
         "saved_under": "Saved under",
@@ -62,7 +73,47 @@ translations = {
         "removed": "Removed",
         "Wert A": "Value A",
         "Wert B": "Value B",
-        "Property": "Property"
+        "Property": "Property",
+        "timeline_tab_title": "Timeline",
+        "timeline_upload_prompt": "Upload revisions",
+        "timeline_order_hint": "Revisions are ordered by file name; already processed revisions are served from the cache.",
+        "timeline_running": "Building timeline …",
+        "federation_tab_title": "Federated models",
+        "federation_upload_prompt": "Upload discipline models",
+        "federation_hint": "All models are aggregated as one under the current mapping, each in its own project units; already processed models are served from the cache.",
+        "federation_by_source": "One row per source model",
+        "federation_running": "Extracting models …",
+        "comparison_unchanged_classes": "Unchanged classes (skipped)",
+        "comparison_abs_tolerance": "Absolute tolerance",
+        "comparison_rel_tolerance": "Relative tolerance (%)",
+        "comparison_tolerance_hint": "Deltas within the tolerance are not reported; per-field values can be set under \"tolerances\" in the mapping JSON.",
+        "comparison_top_changes": "Largest changes",
+        "comparison_rank_by": "Rank by",
+        "comparison_rank_abs": "Absolute change",
+        "comparison_rank_rel": "Relative change",
+        "comparison_top_n": "Rows",
+        "query_tab_title": "SQL Query",
+        "query_warning": "Please upload an IFC file first.",
+        "query_building": "Building SQL table …",
+        "query_hint": "One table per IFC class with a column per \"Pset.Key\" (incl. Spatial.*); quote names with double quotes.",
+        "query_tables": "Tables and columns",
+        "query_table": "Table",
+        "query_run": "Run query",
+        "preview_use_sql": "Aggregate with the SQL backend",
+        "preview_quick": "Quick preview from a sample while the exact table is computed",
+        "preview_quick_job": "Quick preview",
+        "preview_estimate_note": "Estimated from {n} of {total} elements; ± is the 95 % error bound. The exact table replaces it when ready.",
+        "job_cancel": "Cancel",
+        "job_failed": "Job failed",
+        "job_cancelled": "Job cancelled",
+        "job_open_ifc": "Opening IFC …",
+        "job_read_psets": "Reading PropertySets …",
+        "job_aggregate": "Aggregating …",
+        "upload_batch_job": "Loading models",
+        "upload_active_model": "Active model",
+        "upload_revision": "Revision of the previously loaded model",
+        "upload_batch_hint": "All files are in the model cache; switching the active model does not read them again.",
+        "comparison_pick_loaded": "… or pick a loaded model"
     },
     "de": {
         "app_title": "IFC Mengenauswertung",
@@ -95,12 +146,15 @@ translations = {
         "Gruppe": "Gruppe",
         "Art": "Art",
         "Status": "Status",
+        "Baustoff": "Baustoff",
+        "Modell": "Modell",
         "rule_group": "Gruppe",
         "rule_type": "Art",
         "rule_status": "Status",
         "rule_sum": "Summenfelder",
         "rule_text": "Eigenschaft",
         "rule_ignore": "Ignorieren",
+        "rule_material": "Mengen nach Baustoff aufteilen (Schichtdicke)",
         "download_json": "Mapping als JSON herunterladen",
         "save_mapping_button": "Mapping im Ordner speichern",
         "download_csv": "CSV herunterladen",
@@ -115,6 +169,14 @@ translations = {
         "comparison_model_b_loaded": "Modell B",
         "no_differences": "Keine Unterschiede zwischen Modell A und Modell B erkannt.",
         "rules_for": "Regeln für",
+        "rule_editor_search": "Klassen oder Merkmale suchen",
+        "rule_editor_open": "Klassen bearbeiten",
+        "rule_editor_apply": "Übernehmen",
+        "rule_editor_hint": "Klassen suchen oder auswählen, um ihre Regeln zu bearbeiten.",
+        "rule_editor_more": "{n} weitere Klassen passen, Suche verfeinern.",
+        "rule_editor_class": "IFC-Klasse",
+        "rule_editor_active": "Aktiv",
+        "rule_editor_category": "Kategorie",
         "download_warning": "Bitte Regeln definieren und eine Vorschau generieren.",
         "saved_as": "Gespeichert als",
         "saved_under": "Gespeichert unter",
@@ -125,6 +187,46 @@ translations = {
         "removed": "Entfernt",
         "Wert A": "Wert A",
         "Wert B": "Wert B",
-        "Property": "Eigenschaft"
+        "Property": "Eigenschaft",
+        "timeline_tab_title": "Zeitverlauf",
+        "timeline_upload_prompt": "Revisionen hochladen",
+        "timeline_order_hint": "Revisionen werden nach Dateiname sortiert; bereits verarbeitete Revisionen kommen aus dem Cache.",
+        "timeline_running": "Zeitverlauf wird erstellt …",
+        "federation_tab_title": "Föderierte Modelle",
+        "federation_upload_prompt": "Fachmodelle hochladen",
+        "federation_hint": "Alle Modelle werden mit dem aktuellen Mapping als ein Modell ausgewertet, jedes in seinen eigenen Projekteinheiten; bereits verarbeitete Modelle kommen aus dem Cache.",
+        "federation_by_source": "Eine Zeile je Quellmodell",
+        "federation_running": "Modelle werden extrahiert …",
+        "comparison_unchanged_classes": "Unveränderte Klassen (übersprungen)",
+        "comparison_abs_tolerance": "Absolute Toleranz",
+        "comparison_rel_tolerance": "Relative Toleranz (%)",
+        "comparison_tolerance_hint": "Abweichungen innerhalb der Toleranz werden nicht gemeldet; Werte je Feld lassen sich unter \"tolerances\" im Mapping-JSON festlegen.",
+        "comparison_top_changes": "Größte Änderungen",
+        "comparison_rank_by": "Sortieren nach",
+        "comparison_rank_abs": "Absolute Änderung",
+        "comparison_rank_rel": "Relative Änderung",
+        "comparison_top_n": "Zeilen",
+        "query_tab_title": "SQL-Abfrage",
+        "query_warning": "Bitte zuerst eine IFC-Datei hochladen.",
+        "query_building": "SQL-Tabelle wird erstellt …",
+        "query_hint": "Eine Tabelle je IFC-Klasse mit einer Spalte je \"Pset.Key\" (inkl. Spatial.*); Namen in doppelte Anführungszeichen setzen.",
+        "query_tables": "Tabellen und Spalten",
+        "query_table": "Tabelle",
+        "query_run": "Abfrage ausführen",
+        "preview_use_sql": "Mit dem SQL-Backend aggregieren",
+        "preview_quick": "Schnellvorschau aus einer Stichprobe, während die exakte Tabelle berechnet wird",
+        "preview_quick_job": "Schnellvorschau",
+        "preview_estimate_note": "Hochgerechnet aus {n} von {total} Elementen; ± ist die 95-%-Fehlerschranke. Die exakte Tabelle ersetzt sie, sobald sie fertig ist.",
+        "job_cancel": "Abbrechen",
+        "job_failed": "Berechnung fehlgeschlagen",
+        "job_cancelled": "Berechnung abgebrochen",
+        "job_open_ifc": "IFC öffnen …",
+        "job_read_psets": "PropertySets auslesen …",
+        "job_aggregate": "Aggregieren …",
+        "upload_batch_job": "Modelle laden",
+        "upload_active_model": "Aktives Modell",
+        "upload_revision": "Revision des zuvor geladenen Modells",
+        "upload_batch_hint": "Alle Dateien liegen im Modell-Cache; beim Wechsel des aktiven Modells werden sie nicht erneut gelesen.",
+        "comparison_pick_loaded": "… oder ein geladenes Modell wählen"
     }
 }
\ No newline at end of file
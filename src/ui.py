@@ -7,6 +7,9 @@ from mapping import render_rename_tab
 from preview import render_preview_tab
 from download import render_download_tab
 from comparison_tab import render_comparison_tab
+from timeline_tab import render_timeline_tab
+from query_tab import render_query_tab
+from federation_tab import render_federation_tab
 
 # Load language
 lang = st.session_state.get("lang", "en")
@@ -16,19 +19,25 @@ st.set_page_config(page_title=t["app_title"])
 st.title(f"📐 {t['app_title']}")
 st.caption("powered by Streamlit + IfcOpenShell")
 
-# Create tabs (now 5)
+# Create tabs (now 8)
 (
     tab_upload,
     tab_mapping,
     tab_preview,
     tab_download,
     tab_comparison,
+    tab_timeline,
+    tab_query,
+    tab_federation,
 ) = st.tabs([
     f"📂 {t['upload_tab']}",
     f"🛠️ {t['mapping_tab']}",
     f"📊 {t['preview_tab']}",
     f"📥 {t['download_tab']}",
     f"🔁 {t.get('comparison_tab_title', 'Comparison')}",
+    f"📈 {t.get('timeline_tab_title', 'Timeline')}",
+    f"🗄️ {t.get('query_tab_title', 'SQL Query')}",
+    f"🧩 {t.get('federation_tab_title', 'Federated models')}",
 ])
 
 with tab_upload:
@@ -44,4 +53,13 @@ with tab_download:
     render_download_tab()
 
 with tab_comparison:
-    render_comparison_tab()
\ No newline at end of file
+    render_comparison_tab()
+
+with tab_timeline:
+    render_timeline_tab()
+
+with tab_query:
+    render_query_tab()
+
+with tab_federation:
+    render_federation_tab()
\ No newline at end of file
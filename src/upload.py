@@ -1,9 +1,90 @@
 import streamlit as st
-import ifcopenshell
 import json
 from pathlib import Path
-from ifc_processing.pset_reader import read_psets_from_model, flatten_psets
 from translations import translations
+from job_ui import run_job, job_ready, is_new_result
+from tools.ifchelper import save_upload
+
+def _extract_ifc(job, ifc_path: str, t, base_hash=None, revision=False) -> dict:
+    # ifcopenshell / pandas / numpy load with the first extraction, not with the page
+    from tools.core import ExtractOptions, extract
+
+    job.report("📂 " + t.get("job_open_ifc", "Opening IFC …"), 0.0)
+    model = extract(ifc_path, ExtractOptions(
+        progress=job.progress_callback("🔍 " + t.get("job_read_psets", "Reading PropertySets …"), 0.1, 0.9),
+        base_hash=base_hash,
+        revision=revision,
+    ))
+    return {
+        "ifc_model": model.model,
+        "ifc_filename": Path(ifc_path).stem,
+        "ifc_path": ifc_path,
+        "model_hash": model.model_hash,
+        "property_store": model.property_store,
+        "schema": model.schema,
+        "spatial_index": model.spatial_index,
+        "material_index": model.material_index,
+        "all_classes": model.classes(),
+        "class_keys_map": model.class_keys(),
+    }
+
+def _preload_job(job, paths, t) -> list:
+    from tools.core import preload
+
+    names = [Path(p).name for p in paths]
+    for name in names:
+        job.report_part(name, 0.0)
+    job.report("🔍 " + t.get("job_read_psets", "Reading PropertySets …"))
+    return preload(paths, progress=lambda index, done, total: job.report_part(names[index], done / total if total else 1.0))
+
+def _activate_model(t, ifc_path: Path, key: str, base_hash=None, revision=False):
+    # Runs once per model; reruns only poll the job. A preloaded model attaches its cached PropertySets
+    job = run_job(t.get("upload_tab", "Upload"), key, _extract_ifc, str(ifc_path), t, base_hash, revision)
+    if job_ready(job):
+        if is_new_result(job, "upload_job"):
+            st.session_state.update(job.result)
+        st.success(t["upload_success"])
+
+def _render_ifc_upload(t):
+    # Asked before the upload: the extraction job starts as soon as the file arrives
+    base_hash = st.session_state.get("model_hash")
+    revision = base_hash is not None and st.checkbox(
+        t.get("upload_revision", "Revision of the previously loaded model"), key="upload_revision",
+    )
+    uploaded = st.file_uploader(t["upload_prompt"], type=["ifc"], accept_multiple_files=True)
+    if not uploaded:
+        return
+
+    project_root = Path(__file__).resolve().parent.parent
+    cache_dir = project_root / "cache"
+    cache_dir.mkdir(exist_ok=True)
+
+    paths = {file.file_id: save_upload(file.getbuffer(), file.name, cache_dir) for file in sorted(uploaded, key=lambda f: f.name)}
+    loaded = st.session_state.setdefault("loaded_models", {})
+
+    if len(uploaded) == 1:
+        file_id, ifc_path = next(iter(paths.items()))
+        st.write(f"📁 IFC → {ifc_path}")
+        loaded[ifc_path.stem] = str(ifc_path)
+        # The previously loaded model is the base revision if the upload is marked as one, or if most of
+        # its elements are in it: only the changed elements are re-extracted
+        _activate_model(t, ifc_path, file_id, base_hash, revision)
+        return
+
+    # Several files: all are extracted concurrently into the model cache, then any of them is activated
+    batch_key = ":".join(sorted(paths))
+    batch = run_job(t.get("upload_batch_job", "Loading models"), batch_key, _preload_job, [str(p) for p in paths.values()], t)
+    if not job_ready(batch):
+        return
+    loaded.update({p.stem: str(p) for p in paths.values()})
+
+    file_ids = list(paths)
+    active = st.selectbox(
+        "🗂️ " + t.get("upload_active_model", "Active model"), file_ids,
+        format_func=lambda file_id: paths[file_id].name, key="upload_active_model",
+    )
+    st.caption(t.get("upload_batch_hint", "All files are in the model cache; switching the active model does not read them again."))
+    _activate_model(t, paths[active], active)
 
 def render_upload_tab():
     # Store the current language if not set
@@ -27,39 +108,7 @@ def render_upload_tab():
     t = translations[st.session_state["lang"]]
 
 
-    uploaded_ifc = st.file_uploader(t["upload_prompt"], type=["ifc"])
-
-    if uploaded_ifc:
-        project_root = Path(__file__).resolve().parent.parent
-        cache_dir = project_root / "cache"
-        cache_dir.mkdir(exist_ok=True)
-
-        ifc_path = cache_dir / uploaded_ifc.name
-        ifc_path.write_bytes(uploaded_ifc.getbuffer())
-        st.write(f"📁 IFC → {ifc_path}")
-
-        st.session_state["ifc_filename"] = ifc_path.stem
-
-        ifc_model = ifcopenshell.open(str(ifc_path))
-        st.session_state["ifc_model"] = ifc_model
-
-        with st.spinner("🔍 PropertySets auslesen …"):
-            psets = read_psets_from_model(ifc_model)
-            flat_data = flatten_psets(psets)
-
-        st.session_state["flat_data"] = flat_data
-
-        all_classes = sorted({el.is_a() for el in ifc_model.by_type("IfcElement")})
-        class_keys_map = {
-            cls: sorted({k for gid, props in flat_data.items()
-                         if ifc_model.by_id(gid).is_a() == cls
-                         for k in props if not k.lower().startswith("type")})
-            for cls in all_classes
-        }
-        st.session_state["all_classes"] = all_classes
-        st.session_state["class_keys_map"] = class_keys_map
-
-        st.success(t["upload_success"])
+    _render_ifc_upload(t)
 
     uploaded_json = st.file_uploader(t["upload_mapping_prompt"], type=["json"], key="map_json")
     if uploaded_json: